@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""
+Load test of the API against the bundled data, offline. Drives /, /votes/matrix and /votes/disagreements (cycling
+through every party pair) one endpoint at a time with concurrent clients, with authentication on and off, and reports
+throughput and p50/p95/p99 latency per endpoint.
+
+The app runs in-process (driven through httpx's ASGI transport, so only the app is measured) or as a local server
+started with `python -m src.server` (HTTP included). Each configuration gets a fresh process, started with
+APP_ENV=production so logging is as in production.
+
+Without --rate, every client sends its next request as soon as the previous one is answered (the throughput the app
+can sustain). With --rate, requests are started at that many per second in total, at most --concurrency at a time, and
+latency is measured from when a request was due, so requests held up by slow ones are not left out.
+
+Results are written as JSON. With --compare, they are checked against an earlier result file, and the run fails when
+the throughput dropped or the p99 latency rose by more than --tolerance.
+
+Usage (from the Backend directory):
+    python -m benchmarks.bench_api --duration 10 --concurrency 16
+    python -m benchmarks.bench_api --target server --workers 2 --rate 500 --compare benchmarks/results/api-baseline.json
+"""
+import argparse
+import asyncio
+import datetime
+import itertools
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from src.api.schemas import parties
+
+BACKEND_DIR = Path(__file__).parent.parent
+RESULTS_DIR = Path(__file__).parent / "results"
+API = "/api/v1"
+TOKEN = "bench-token"
+PAIRS = [tuple(sorted(pair)) for pair in itertools.combinations(parties, 2)]
+
+ENDPOINTS: Dict[str, Callable[[int], str]] = {
+    "root": lambda k: "/",
+    "matrix": lambda k: f"{API}/votes/matrix",
+    "disagreements": lambda k: f"{API}/votes/disagreements?party_a={PAIRS[k % len(PAIRS)][0]}&party_b={PAIRS[k % len(PAIRS)][1]}",
+}
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "throughput_rps": round(len(ordered) / elapsed, 1),
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
+
+
+async def fetch(client: httpx.AsyncClient, path: str, headers: Dict[str, str]) -> bool:
+    # The body is read without decoding it, so the client does not spend time decompressing
+    async with client.stream("GET", path, headers=headers) as response:
+        async for _ in response.aiter_raw():
+            pass
+        return response.status_code == 200
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    path_for: Callable[[int], str],
+    headers: Dict[str, str],
+    concurrency: int,
+    rate: Optional[float],
+    duration: float,
+) -> Dict[str, float]:
+    latencies: List[float] = []
+    errors = 0
+    start = time.perf_counter()
+    deadline = start + duration
+
+    async def closed_loop(client_id: int) -> None:
+        nonlocal errors
+        k = client_id
+        while time.perf_counter() < deadline:
+            sent = time.perf_counter()
+            if not await fetch(client, path_for(k), headers):
+                errors += 1
+            latencies.append(time.perf_counter() - sent)
+            k += concurrency
+
+    async def due(k: int, semaphore: asyncio.Semaphore) -> None:
+        nonlocal errors
+        scheduled = start + k / rate
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        async with semaphore:
+            if not await fetch(client, path_for(k), headers):
+                errors += 1
+        latencies.append(time.perf_counter() - scheduled)
+
+    if rate:
+        semaphore = asyncio.Semaphore(concurrency)
+        await asyncio.gather(*[due(k, semaphore) for k in range(int(rate * duration))])
+    else:
+        await asyncio.gather(*[closed_loop(client_id) for client_id in range(concurrency)])
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+async def run_endpoints(client: httpx.AsyncClient, args: argparse.Namespace, auth: bool) -> List[Dict[str, object]]:
+    headers = {"Authorization": f"Bearer {TOKEN}"} if auth else {}
+    headers["Accept-Encoding"] = args.accept_encoding
+    results = []
+    for endpoint in args.endpoints:
+        path_for = ENDPOINTS[endpoint]
+        await drive(client, path_for, headers, args.concurrency, None, args.warmup)
+        result = await drive(client, path_for, headers, args.concurrency, args.rate, args.duration)
+        print(
+            f"  auth {'on ' if auth else 'off'} {endpoint:>13}: {result['throughput_rps']:8.1f} req/s, "
+            f"p50 {result['p50_ms']:7.2f} ms, p95 {result['p95_ms']:7.2f} ms, p99 {result['p99_ms']:7.2f} ms, "
+            f"{result['errors']} errors",
+            flush=True,
+        )
+        results.append({"auth": auth, "endpoint": endpoint, **result})
+    return results
+
+
+async def run_inprocess(args: argparse.Namespace, auth: bool) -> List[Dict[str, object]]:
+    from src.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return await run_endpoints(client, args, auth)
+
+
+def app_env(auth: bool) -> Dict[str, str]:
+    return {
+        **os.environ,
+        "APP_ENV": "production",
+        "API_V1_STR": API,
+        "AUTH_ENABLED": "true" if auth else "false",
+        "AUTH_TOKENS": TOKEN,
+        "DATA_RELOAD_INTERVAL": "0",
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_server(args: argparse.Namespace, auth: bool) -> List[Dict[str, object]]:
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "src.server", "--port", str(port), "--workers", str(args.workers)],
+        cwd=BACKEND_DIR,
+        env=app_env(auth),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits) as client:
+            for _ in range(300):
+                if server.poll() is not None:
+                    raise RuntimeError(f"Server exited with {server.returncode}")
+                try:
+                    await client.get("/", headers={"Authorization": f"Bearer {TOKEN}"})
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+            return await run_endpoints(client, args, auth)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Settings that must match for two runs to be comparable
+CONFIGURATION = ("target", "workers", "concurrency", "rate", "accept_encoding", "cpus")
+
+
+def compare(report: Dict[str, object], baseline_file: Path, tolerance: float) -> List[str]:
+    """
+    Compares every auth/endpoint result with the same one in `baseline_file`, printing the changes, and returns the
+    regressions beyond `tolerance` (a fraction).
+    """
+    baseline_report = json.loads(baseline_file.read_text())
+    baseline = {(r["auth"], r["endpoint"]): r for r in baseline_report["results"]}
+    regressions = []
+    print(f"\nCompared with {baseline_file} ({baseline_report['meta'].get('commit') or 'unknown commit'}):")
+    for key in CONFIGURATION:
+        if baseline_report["meta"].get(key) != report["meta"][key]:
+            print(f"  WARNING: {key} differs: {baseline_report['meta'].get(key)} then, {report['meta'][key]} now")
+    results: List[Dict[str, object]] = report["results"]
+    for result in results:
+        before = baseline.get((result["auth"], result["endpoint"]))
+        if before is None:
+            continue
+        name = f"auth {'on' if result['auth'] else 'off'} {result['endpoint']}"
+        throughput = result["throughput_rps"] / before["throughput_rps"] - 1
+        p99 = result["p99_ms"] / before["p99_ms"] - 1
+        print(f"  {name:>22}: throughput {throughput:+7.1%}, p99 {p99:+7.1%}")
+        if throughput < -tolerance:
+            regressions.append(f"{name}: throughput {throughput:+.1%}")
+        if p99 > tolerance:
+            regressions.append(f"{name}: p99 latency {p99:+.1%}")
+    return regressions
+
+
+def main(args: argparse.Namespace) -> int:
+    print(
+        f"{args.target}{f' ({args.workers} workers)' if args.target == 'server' else ''}, {args.concurrency} clients, "
+        f"{f'{args.rate:g} requests/s' if args.rate else 'as fast as possible'}, {args.duration:g} s per endpoint"
+    )
+    results: List[Dict[str, object]] = []
+    for auth in args.auth:
+        if args.target == "server":
+            results += asyncio.run(run_server(args, auth))
+            continue
+        # The settings are read when the app is imported, so each auth setting runs in a fresh process
+        with tempfile.NamedTemporaryFile(suffix=".json") as output:
+            command = [sys.executable, "-m", "benchmarks.bench_api", *sys.argv[1:], "--child-output", output.name]
+            command += ["--auth", "on" if auth else "off"]
+            subprocess.run(command, cwd=BACKEND_DIR, env=app_env(auth), check=True)
+            results += json.loads(Path(output.name).read_text())
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "target": args.target,
+            "workers": args.workers if args.target == "server" else None,
+            "concurrency": args.concurrency,
+            "rate": args.rate,
+            "duration_s": args.duration,
+            "accept_encoding": args.accept_encoding,
+        },
+        "results": results,
+    }
+    output = args.output or RESULTS_DIR / f"api-{datetime.datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Wrote {output}")
+
+    if args.compare is None:
+        return 0
+    regressions = compare(report, args.compare, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION: {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=["inprocess", "server"], default="inprocess")
+    parser.add_argument("--workers", type=int, default=1, help="Server workers, with --target server")
+    parser.add_argument("--endpoints", nargs="+", choices=list(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument(
+        "--auth", nargs="+", choices=["on", "off"], default=["on", "off"], help="Run with authentication on, off or both"
+    )
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients (requests in flight)")
+    parser.add_argument("--rate", type=float, default=None, help="Requests per second in total, instead of flat out")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per endpoint")
+    parser.add_argument("--warmup", type=float, default=1.0, help="Seconds of unmeasured requests per endpoint")
+    parser.add_argument("--accept-encoding", default="gzip", help="Accept-Encoding header of the requests")
+    parser.add_argument("--output", type=Path, default=None, help="Result file, by default in benchmarks/results")
+    parser.add_argument("--compare", type=Path, default=None, help="Earlier result file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed relative change before a regression")
+    parser.add_argument("--child-output", type=Path, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.auth = [value == "on" for value in args.auth]
+
+    if args.child_output is not None:
+        args.child_output.write_text(json.dumps(asyncio.run(run_inprocess(args, args.auth[0]))))
+    else:
+        sys.exit(main(args))
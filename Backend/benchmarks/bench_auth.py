@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Load test comparing the original BaseHTTPMiddleware auth check with the pure ASGI AuthMiddleware. Both guard the same
+trivial endpoint and are driven in-process by concurrent clients, so the difference is the middleware overhead.
+
+Usage (from the Backend directory):
+    python -m benchmarks.bench_auth --requests 20000 --concurrency 50
+"""
+import argparse
+import asyncio
+import time
+from typing import Callable, List
+
+import httpx
+from fastapi import FastAPI
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+from src.api.middlewares.auth import AuthMiddleware, TokenSet
+
+TOKENS: List[str] = [f"token-{k}" for k in range(20)]
+
+
+class LegacyAuthMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        auth_header = request.headers.get("Authorization")
+        if not auth_header or not auth_header.startswith("Bearer "):
+            return JSONResponse(status_code=401, content="Unauthorized")
+        token = auth_header[len("Bearer ") :].strip()
+        if "*" not in TOKENS and token not in TOKENS:
+            return JSONResponse(status_code=401, content="Unauthorized")
+        return await call_next(request)
+
+
+def create_app(middleware: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/")
+    async def root() -> dict:
+        return {"status": "healthy"}
+
+    if middleware == "legacy":
+        app.add_middleware(LegacyAuthMiddleware)
+    elif middleware == "asgi":
+        app.add_middleware(AuthMiddleware, tokens=TokenSet(TOKENS))
+    return app
+
+
+async def load_test(app: FastAPI, n_requests: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": f"Bearer {TOKENS[-1]}"}
+    remaining = iter(range(n_requests))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker() -> None:
+            for _ in remaining:
+                response = await client.get("/", headers=headers)
+                assert response.status_code == 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        return time.perf_counter() - start
+
+
+def main(n_requests: int, concurrency: int) -> None:
+    print(f"{n_requests} requests, {concurrency} concurrent clients")
+    for middleware in ("none", "legacy", "asgi"):
+        elapsed = asyncio.run(load_test(create_app(middleware), n_requests, concurrency))
+        print(f"{middleware:>7}: {n_requests / elapsed:8.0f} requests/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    main(args.requests, args.concurrency)
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Cold start regression check for `src.main:app`: starts fresh interpreters that import the app, run its startup and
+answer a first /votes/matrix request (see `src.startup`), and fails when the median of that exceeds the budget, or when
+numpy or pandas are imported before a request needs them.
+
+Usage (from the Backend directory):
+    python -m benchmarks.bench_cold_start --runs 5 --budget 1.0
+"""
+import argparse
+import statistics
+import sys
+from typing import Dict, List
+
+from src.startup import run_probe
+
+# The phases that make up a cold start: until the first request for the prepared data is answered
+COLD_START_PHASES = ("import", "startup", "matrix")
+
+
+def main(runs: int, budget: float) -> int:
+    results = [run_probe() for _ in range(runs)]
+    phases: Dict[str, List[float]] = {name: [result["phases"][name] for result in results] for name in results[0]["phases"]}
+    for name, values in phases.items():
+        print(f"{name:>16}: median {statistics.median(values) * 1000:7.1f} ms, max {max(values) * 1000:7.1f} ms")
+
+    cold_start = statistics.median(sum(result["phases"][name] for name in COLD_START_PHASES) for result in results)
+    process = statistics.median(result["process"] for result in results)
+    print(f"      cold start: median {cold_start * 1000:7.1f} ms (budget {budget * 1000:.0f} ms), process {process * 1000:.0f} ms")
+
+    failures = []
+    if cold_start > budget:
+        failures.append(f"cold start {cold_start * 1000:.0f} ms is over the budget of {budget * 1000:.0f} ms")
+    for moment in ("import", "ready"):
+        heavy = sorted({name for result in results for name, loaded in result[f"imported_at_{moment}"].items() if loaded})
+        if heavy:
+            failures.append(f"{', '.join(heavy)} imported at {moment}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes to start")
+    parser.add_argument("--budget", type=float, default=1.0, help="Seconds allowed for the median cold start")
+    args = parser.parse_args()
+    sys.exit(main(args.runs, args.budget))
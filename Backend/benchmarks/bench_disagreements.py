@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Runs the disagreements pipeline offline against `FakeChatModel` posing as a rate limited API (a call made while
+`--api-limit` calls are in flight gets a 429), comparing the old structure, which starts all pairs at once, reads the
+votes per pair and on a rate limit blocks the event loop with `time.sleep`, with the staged pipeline: one vectorized
+selection of the titles and an `LLMPool` with non-blocking backoff. Reports wall time, completed pairs, LLM calls
+made, and the longest stall of the event loop.
+
+Usage (from the Backend directory):
+    python -m benchmarks.bench_disagreements --latency 0.2 --api-limit 8
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
+
+import openai
+import pandas as pd
+
+from src.api.schemas import parties
+from src.data.votes import VoteStore
+from src.disagreements.llm import FakeChatModel, LLMPool, categorize_chain
+from src.disagreements.pairs import PartyPair, disagreeing_titles, party_pairs
+
+
+async def watch_loop(stalls: List[float], interval: float = 0.01) -> None:
+    while True:
+        start = time.monotonic()
+        await asyncio.sleep(interval)
+        stalls.append(time.monotonic() - start - interval)
+
+
+async def timed(run: Callable[[], Awaitable[int]]) -> Dict[str, float]:
+    stalls: List[float] = []
+    watcher = asyncio.create_task(watch_loop(stalls))
+    start = time.perf_counter()
+    completed = await run()
+    elapsed = time.perf_counter() - start
+    watcher.cancel()
+    return {"elapsed_s": elapsed, "completed": completed, "max_stall_s": max(stalls, default=0.0)}
+
+
+def legacy(votes_file: Path, llm: FakeChatModel, retry_sleep: float) -> Callable[[], Awaitable[int]]:
+    async def get_disagreements(pair: PartyPair) -> bool:
+        party_a, party_b = pair
+        df = pd.read_json(votes_file)
+        df = df[["title", party_a, party_b]]
+        df = df[df[party_a] != df[party_b]]
+        titles_list_str = "\n".join("- " + df["title"].str.strip())
+        chain = categorize_chain(llm)
+        retries = 3
+        while retries > 0:
+            try:
+                await chain.ainvoke(dict(motion_titles=titles_list_str, party_a=party_a, party_b=party_b))
+                return True
+            except openai.RateLimitError:
+                retries -= 1
+                time.sleep(retry_sleep)
+        return False
+
+    async def run() -> int:
+        return sum(await asyncio.gather(*[get_disagreements(pair) for pair in party_pairs(parties)]))
+
+    return run
+
+
+def staged(store_file: Path, llm: FakeChatModel, concurrency: int, backoff: float) -> Callable[[], Awaitable[int]]:
+    async def run() -> int:
+        pairs = party_pairs(parties)
+        titles = disagreeing_titles(VoteStore.open(store_file), pairs)
+        pool = LLMPool(categorize_chain(llm), concurrency=concurrency, backoff=backoff)
+        results = await asyncio.gather(
+            *[
+                pool.invoke(dict(motion_titles="\n".join("- " + t for t in titles[pair]), party_a=pair[0], party_b=pair[1]))
+                for pair in pairs
+            ],
+            return_exceptions=True,
+        )
+        print(f"    {pool.stats}")
+        return sum(not isinstance(result, BaseException) for result in results)
+
+    return run
+
+
+def main(latency: float, api_limit: int, concurrency: int, retry_sleep: float) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        votes_file = Path(directory) / "votes.json"
+        store_file = Path(directory) / "votes.bin"
+        store = VoteStore.from_dataset(parties)
+        store.save(store_file)
+        store.to_frame().to_json(votes_file)
+
+        runs = {
+            "legacy": lambda llm: legacy(votes_file, llm, retry_sleep),
+            "staged": lambda llm: staged(store_file, llm, concurrency, retry_sleep),
+        }
+        for name, make in runs.items():
+            llm = FakeChatModel(latency=latency, max_concurrent=api_limit)
+            result = asyncio.run(timed(make(llm)))
+            print(
+                f"{name:>7}: {result['elapsed_s']:6.2f} s, {result['completed']:3d}/105 pairs, {llm.calls:4d} LLM calls, "
+                f"longest event loop stall {result['max_stall_s'] * 1000:7.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per fake LLM call")
+    parser.add_argument("--api-limit", type=int, default=8, help="Calls the fake API allows in flight")
+    parser.add_argument("--concurrency", type=int, default=8, help="Calls in flight in the staged pipeline")
+    parser.add_argument(
+        "--retry-sleep", type=float, default=0.05, help="Legacy retry sleep and staged base backoff, in seconds"
+    )
+    args = parser.parse_args()
+    main(args.latency, args.api_limit, args.concurrency, args.retry_sleep)
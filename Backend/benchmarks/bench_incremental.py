@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+Compares a full rebuild of the pair counts by `run/generate_matrix.py` with adding a batch of new motions to saved
+counts by `run/update_matrix.py`, on the scraped dataset scaled up by repeating its motions under new ids.
+tests/test_update_matrix.py checks that the incremental counts and matrix equal the full rebuild.
+
+Usage (from the Backend directory):
+    python -m benchmarks.bench_incremental --scales 1 10 --new 50
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from src.api.schemas import parties
+from src.data.counts import MatrixCounts
+from src.data.votes import DATASET_FILE, VoteStore, motion_frames
+
+
+def scaled_motions(scale: int) -> List[dict]:
+    motions = [motion for motion in json.loads(DATASET_FILE.read_text(encoding="utf-8"))["motions"] if "votes" in motion]
+    return [{**motion, "id": f"{motion['id']}-{copy}"} for copy in range(scale) for motion in motions]
+
+
+def main(scales: List[int], new: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        dataset_file = Path(directory) / "dataset.json"
+        counts_file = Path(directory) / "matrix_counts.npz"
+        for scale in scales:
+            motions = scaled_motions(scale)
+            history, batch = motions[:-new], motions[-new:]
+            dataset_file.write_text(json.dumps({"motions": history}), encoding="utf-8")
+            MatrixCounts.from_store(VoteStore.from_dataset(parties, dataset_file)).save(counts_file)
+
+            dataset_file.write_text(json.dumps({"motions": motions}), encoding="utf-8")
+            start = time.perf_counter()
+            rebuilt = MatrixCounts.from_store(VoteStore.from_dataset(parties, dataset_file))
+            rebuilt.similarity()
+            full = time.perf_counter() - start
+
+            start = time.perf_counter()
+            counts, _ = MatrixCounts.load(counts_file).update(motion_frames(batch)[0])
+            counts.save(counts_file)
+            counts.similarity()
+            incremental = time.perf_counter() - start
+
+            print(
+                f"{len(motions):>7} motions, {new} new: full rebuild {full * 1000:8.1f} ms, "
+                f"incremental {incremental * 1000:7.1f} ms ({full / incremental:.0f}x)"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--new", type=int, default=50, help="Number of new motions per update")
+    args = parser.parse_args()
+    main(args.scales, args.new)
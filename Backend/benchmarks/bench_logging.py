@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Measures what a log call costs the calling thread: structlog's default, unconfigured chain (what the API used before)
+with the old f-string messages, against the queued pipeline from `src.logging`. Both write to /dev/null, so the
+numbers are the time spent on the request path only.
+
+Usage (from the Backend directory):
+    python -m benchmarks.bench_logging --calls 200000
+"""
+import argparse
+import os
+import time
+from typing import Callable, List
+
+import numpy as np
+import structlog
+
+from src.logging import configure_logging
+
+PARTY_A, PARTY_B = "VVD", "GroenLinks-PvdA"
+
+
+def time_calls(call: Callable[[], None], n_calls: int) -> List[float]:
+    durations = []
+    for _ in range(n_calls):
+        start = time.perf_counter_ns()
+        call()
+        durations.append(time.perf_counter_ns() - start)
+    return durations
+
+
+def report(name: str, durations: List[float]) -> None:
+    d = np.asarray(durations) / 1000
+    print(f"{name:<34} mean {d.mean():6.2f} us   p50 {np.percentile(d, 50):6.2f} us   p99 {np.percentile(d, 99):6.2f} us")
+
+
+def legacy_logger(sink) -> structlog.typing.FilteringBoundLogger:
+    structlog.reset_defaults()
+    structlog.configure(logger_factory=structlog.PrintLoggerFactory(sink), cache_logger_on_first_use=True)
+    return structlog.get_logger()
+
+
+def pipeline_logger(sink, level: str):
+    pipeline = configure_logging(level=level, log_format="json", stream=sink)
+    return pipeline, structlog.get_logger()
+
+
+def main(n_calls: int) -> None:
+    with open(os.devnull, "w") as sink:
+        logger = legacy_logger(sink)
+        durations = time_calls(lambda: logger.info(f"chats - get_disagreements ({PARTY_A}, {PARTY_B})"), n_calls)
+        report("legacy, f-string", durations)
+
+        for level in ("INFO", "WARNING"):
+            pipeline, logger = pipeline_logger(sink, level)
+            durations = time_calls(lambda: logger.info("get_disagreements", party_a=PARTY_A, party_b=PARTY_B), n_calls)
+            pipeline.writer.close(timeout=30)
+            report(f"queued pipeline, level {level}", durations)
+            print(f"{'':<34} {pipeline.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200000)
+    args = parser.parse_args()
+    main(args.calls)
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+Compares the per-pair `calculate_similarity` loop with the batched engine in `src.data.matrix` on the vote store,
+scaled up by repeating the motions. tests/test_matrix.py checks that both give the same matrix.
+
+Usage (from the Backend directory):
+    python -m benchmarks.bench_matrix --scales 1 10 100
+"""
+import argparse
+import time
+from typing import Callable, List
+
+import pandas as pd
+
+from src.api.schemas import parties
+from src.data.matrix import similarity_matrix
+from src.data.votes import load_vote_store
+from tests.helpers import loop_similarity_matrix
+
+
+def best_of(fn: Callable[[], pd.DataFrame], repeat: int) -> float:
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(scales: List[int], repeat: int) -> None:
+    votes = load_vote_store(parties).to_frame()[parties]
+
+    print(f"{'scale':>6} {'motions':>9} {'loop (s)':>10} {'engine (s)':>11} {'speedup':>8}")
+    for scale in scales:
+        df = pd.concat([votes] * scale, ignore_index=True)
+
+        loop_time = best_of(lambda: loop_similarity_matrix(df), repeat)
+        engine_time = best_of(lambda: similarity_matrix(df, parties), repeat)
+        print(f"{scale:>6} {len(df):>9} {loop_time:>10.4f} {engine_time:>11.4f} {loop_time / engine_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    main(args.scales, args.repeat)
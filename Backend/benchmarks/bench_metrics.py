@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+Measures the overhead of the metrics middleware: the same trivial endpoint is load-tested in-process with and without
+it, and the cost of rendering /metrics is timed.
+
+Usage (from the Backend directory):
+    python -m benchmarks.bench_metrics --requests 20000 --concurrency 50
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI
+
+from benchmarks.bench_auth import load_test
+from src.api.metrics import REGISTRY
+from src.api.middlewares.metrics import MetricsMiddleware
+
+
+def create_app(with_metrics: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/")
+    async def root() -> dict:
+        return {"status": "healthy"}
+
+    if with_metrics:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+def main(n_requests: int, concurrency: int) -> None:
+    print(f"{n_requests} requests, {concurrency} concurrent clients")
+    rates = {}
+    for with_metrics in (False, True):
+        elapsed = asyncio.run(load_test(create_app(with_metrics), n_requests, concurrency))
+        rates[with_metrics] = n_requests / elapsed
+        print(f"{'with metrics' if with_metrics else 'without metrics':>16}: {rates[with_metrics]:8.0f} requests/s")
+    overhead = 1 / rates[True] - 1 / rates[False]
+    print(f"{'overhead':>16}: {overhead * 1e6:8.1f} us/request")
+
+    start = time.perf_counter()
+    body = REGISTRY.render()
+    print(f"{'render /metrics':>16}: {(time.perf_counter() - start) * 1000:8.2f} ms ({len(body)} bytes)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    main(args.requests, args.concurrency)
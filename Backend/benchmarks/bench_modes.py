@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Compares computing the plain agreement matrix with `src.data.matrix` against computing all matrix modes (agreement,
+seats, kappa, abstention) from one pass of count blocks in `src.data.modes`, on the scraped motions scaled up by
+repeating them. tests/test_matrix.py checks that the agreement mode equals the plain matrix.
+
+Usage (from the Backend directory):
+    python -m benchmarks.bench_modes --scales 1 10 100
+"""
+import argparse
+import time
+from typing import Callable, List
+
+import pandas as pd
+
+from src.api.schemas import parties
+from src.data.matrix import pairwise_counts, similarity_from_counts
+from src.data.modes import MatrixMode, all_mode_similarities, block_counts, block_layout
+from src.data.votes import VoteStore, read_dataset
+
+
+def best_of(fn: Callable[[], object], repeat: int) -> float:
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(scales: List[int], repeat: int) -> None:
+    votes, seats, splits = read_dataset()
+    for scale in scales:
+        store = VoteStore.from_frame(pd.concat([votes] * scale), parties, pd.concat([seats] * scale), splits)
+        layout = block_layout(store)
+
+        def agreement_only() -> pd.DataFrame:
+            return similarity_from_counts(pairwise_counts(store.encoded), parties)
+
+        def all_modes() -> dict:
+            return all_mode_similarities(block_counts(store, slice(None)), layout, parties)
+
+        one = best_of(agreement_only, repeat)
+        every = best_of(all_modes, repeat)
+        print(
+            f"{len(store.ids):>8} motions: agreement only {one * 1000:8.1f} ms, "
+            f"all {len(MatrixMode)} modes {every * 1000:8.1f} ms ({every / one:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.scales, args.repeat)
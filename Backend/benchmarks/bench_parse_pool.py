@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Measures scraper throughput (pages per second) for a growing number of parse processes. The detail pages are served by
+a local fixture server running in a separate process, so the numbers reflect the scraper's own event loop and cores.
+
+Usage (from the Backend directory):
+    python -m benchmarks.bench_parse_pool --pages 2000 --processes 0 1 2 4
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+from typing import List
+
+import aiohttp
+
+from run.scrape import try_fill_motion
+from src.scraper.fetch import FetchScheduler
+from src.scraper.models import ParliamentMotionLocator
+from src.scraper.pool import ParsePool
+from tests.helpers import load_filled_motions, motion_path, serve_fixtures
+
+
+async def wait_for_server(base_url: str) -> None:
+    async with aiohttp.ClientSession() as session:
+        for _ in range(100):
+            try:
+                async with session.get(base_url):
+                    return
+            except aiohttp.ClientConnectionError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"Fixture server at {base_url} did not start")
+
+
+async def scrape_pages(locators: List[ParliamentMotionLocator], processes: int, workers: int) -> float:
+    start = time.perf_counter()
+    with ParsePool(processes=processes, max_pending=workers + 2 * processes) as pool:
+        async with FetchScheduler(workers=workers, rate_limit=0) as scheduler:
+            results = await asyncio.gather(*[try_fill_motion(scheduler, pool, locator) for locator in locators])
+    elapsed = time.perf_counter() - start
+    assert all(result is not None for result in results), "Some fixture pages failed to parse"
+    return elapsed
+
+
+def main(n_pages: int, processes: List[int], workers: int, port: int) -> None:
+    base_url = f"http://127.0.0.1:{port}"
+    motions = load_filled_motions()[:n_pages]
+    locators = [ParliamentMotionLocator(id=m.id, did=m.did, url=f"{base_url}{motion_path(m)}") for m in motions]
+
+    server = multiprocessing.Process(target=serve_fixtures, args=(port, n_pages), daemon=True)
+    server.start()
+    try:
+        asyncio.run(wait_for_server(base_url))
+        print(f"{len(locators)} pages, {workers} fetch workers, {os.cpu_count()} cores available")
+        print(f"{'processes':>9} {'seconds':>8} {'pages/s':>8}")
+        for n in processes:
+            elapsed = asyncio.run(scrape_pages(locators, n, workers))
+            print(f"{n:>9} {elapsed:>8.2f} {len(locators) / elapsed:>8.0f}")
+    finally:
+        server.terminate()
+        server.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--processes", type=int, nargs="+", default=[0, 1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--port", type=int, default=8311)
+    args = parser.parse_args()
+    main(args.pages, sorted(set(args.processes)), args.workers, args.port)
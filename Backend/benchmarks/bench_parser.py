@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+Compares the parse time per page of the single-pass motion page parser in `src.scraper.parser` with the original
+BeautifulSoup + pandas.read_html pipeline on fixture pages. tests/test_parser.py checks that both give the same result.
+
+Usage (from the Backend directory):
+    python -m benchmarks.bench_parser --pages 1000
+"""
+import argparse
+import statistics
+import time
+from typing import Callable, List, Tuple
+
+from src.scraper.models import PartyVote
+from src.scraper.parser import parse_motion_page
+from tests.helpers import legacy_parse_motion_page, load_filled_motions, render_motion_page
+
+
+def time_per_page(parse: Callable[[str], Tuple[str, List[PartyVote]]], pages: List[str]) -> List[float]:
+    timings = []
+    for page in pages:
+        start = time.perf_counter()
+        parse(page)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main(n_pages: int) -> None:
+    pages = [render_motion_page(motion) for motion in load_filled_motions()[:n_pages]]
+    for name, parse in (("legacy", legacy_parse_motion_page), ("single-pass", parse_motion_page)):
+        timings = time_per_page(parse, pages)
+        print(
+            f"{name:>12}: mean {statistics.mean(timings) * 1000:.3f} ms/page, "
+            f"p95 {statistics.quantiles(timings, n=20)[-1] * 1000:.3f} ms/page, "
+            f"{len(pages) / sum(timings):.0f} pages/s"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=1000)
+    args = parser.parse_args()
+    main(args.pages)
@@ -0,0 +1,381 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the data pipeline, offline, on synthetic datasets of the given numbers of motions (the scraped motions
+repeated under new ids). The stages run in order, each in a fresh process like the jobs themselves:
+
+    scrape         the listing and detail pages of the first --scrape-limit motions are served by a local fixture
+                   server (see `tests/helpers.py`, in its own process) and scraped with the scraper's fetch
+                   scheduler and parse pool; the other motions go into the dataset as if already scraped
+    matrix         `run/generate_matrix.py`: the vote store, the pair counts and matrix.json
+    disagreements  `run/generate_disagreements.py` against `FakeChatModel`, with an empty LLM cache
+    bundle         `run/build_bundle.py`
+
+Per stage it reports the wall time, the CPU time (of the stage's process and its parse workers) and the peak memory
+(RSS of the stage's process, next to what it had after the imports; the parse workers' peak is reported separately).
+With --profile, every stage runs under cProfile and its profile is written to that directory, for `python -m pstats`
+or snakeviz. Linux only.
+
+Results are written as JSON. With --compare, they are checked against an earlier result file, and the run fails when
+the wall time (of stages taking at least half a second) or the peak memory of a stage rose by more than --tolerance.
+
+Usage (from the Backend directory):
+    python -m benchmarks.bench_pipeline --scales 10000 100000
+    python -m benchmarks.bench_pipeline --scales 1000000 --no-scrape --profile /tmp/pipeline-profiles
+"""
+import argparse
+import asyncio
+import cProfile
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from benchmarks.bench_api import free_port, git_commit
+from run import generate_disagreements, generate_matrix
+from run.scrape import motions_page, scrape_for_motions, try_fill_motion
+from src.data.bundle import build_bundle
+from src.disagreements.cache import LLMCache
+from src.disagreements.llm import FakeChatModel
+from src.scraper.fetch import FetchScheduler
+from src.scraper.models import ParliamentMotion
+from src.scraper.pool import ParsePool
+from tests.helpers import LISTING_PAGE_SIZE, serve_fixtures, synthetic_motions
+
+BACKEND_DIR = Path(__file__).parent.parent
+RESULTS_DIR = Path(__file__).parent / "results"
+SITE = "https://www.tweedekamer.nl"
+
+
+def scraped_count(scale: int, args: argparse.Namespace) -> int:
+    return min(scale, args.scrape_limit) if args.scrape_limit else scale
+
+
+def write_dataset(path: Path, motions: List[dict]) -> None:
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"motions": motions}, file)
+
+
+async def scrape(workdir: Path, scale: int, args: argparse.Namespace) -> Dict[str, object]:
+    """
+    Scrapes the listing pages and then every motion on them from the fixture server at `args.base_url`, as
+    `run/scrape.py` does, and writes the dataset with the remaining synthetic motions added.
+    """
+    motions = synthetic_motions(scale)
+    n_scraped = scraped_count(scale, args)
+    processes = args.parse_processes
+    with ParsePool(processes=processes, max_pending=args.workers + 2 * processes) as pool:
+        async with FetchScheduler(workers=args.workers, rate_limit=0) as scheduler:
+            pages = range(-(-n_scraped // LISTING_PAGE_SIZE))
+            listings = [motions_page(page).replace(SITE, args.base_url) for page in pages]
+            datasets = await asyncio.gather(*[scrape_for_motions(scheduler, pool, url) for url in listings])
+            locators = [locator for dataset in datasets for locator in dataset.motions]
+            local = [m.model_copy(update={"url": m.url.replace(SITE, args.base_url)}) for m in locators]
+            filled = await asyncio.gather(*[try_fill_motion(scheduler, pool, locator) for locator in local])
+            fetch_stats = scheduler.stats.summary()
+
+    # The filled motions keep the website's url, and the ones that failed stay unfilled, like in `run/scrape.py`
+    scraped = [
+        (locator if motion is None else motion.model_copy(update={"url": locator.url})).model_dump(exclude_none=True)
+        for locator, motion in zip(locators, filled)
+    ]
+    write_dataset(workdir / "dataset.json", scraped + motions[n_scraped:])
+    return {
+        "motions": scale,
+        "scraped": len(locators),
+        "failed": sum(motion is None for motion in filled),
+        "requests_per_s": fetch_stats["requests_per_s"],
+    }
+
+
+def matrix(workdir: Path, scale: int, args: argparse.Namespace) -> Dict[str, object]:
+    generate_matrix.main(
+        dataset_file=workdir / "dataset.json",
+        votes_file=workdir / "votes.bin",
+        counts_file=workdir / "matrix_counts.npz",
+        matrix_file=workdir / "matrix.json",
+        bundle_file=None,  # The bundle stage
+    )
+    return {"motions": scale, "votes_mib": round((workdir / "votes.bin").stat().st_size / 2**20, 1)}
+
+
+def disagreements(workdir: Path, scale: int, args: argparse.Namespace) -> Dict[str, object]:
+    llm = FakeChatModel(latency=args.llm_latency)
+    asyncio.run(
+        generate_disagreements.main(
+            llm,
+            model="fake",
+            output_dir=workdir / "party_disagreements",
+            output_file=workdir / "disagreements.json",
+            cache=LLMCache(workdir / "llm_cache"),
+            concurrency=args.llm_concurrency,
+            votes_file=workdir / "votes.bin",
+        )
+    )
+    return {"motions": scale, "llm_calls": llm.calls}
+
+
+def bundle(workdir: Path, scale: int, args: argparse.Namespace) -> Dict[str, object]:
+    data_bundle = build_bundle(workdir, workdir / "bundle.bin")
+    return {"motions": scale, "entries": len(data_bundle.entries), "bundle_kib": round(data_bundle.size / 1024)}
+
+
+def scrape_stage(workdir: Path, scale: int, args: argparse.Namespace) -> Dict[str, object]:
+    return asyncio.run(scrape(workdir, scale, args))
+
+
+# The stages in pipeline order, each taking the work directory the earlier ones wrote to
+STAGES: Dict[str, Callable[[Path, int, argparse.Namespace], Dict[str, object]]] = {
+    "scrape": scrape_stage,
+    "matrix": matrix,
+    "disagreements": disagreements,
+    "bundle": bundle,
+}
+
+
+def peak_rss_mib() -> float:
+    """
+    The peak RSS of this process. Unlike ru_maxrss, which a process keeps across exec and so starts out at the peak of
+    the process that spawned it, VmHWM starts afresh in every program.
+    """
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    raise RuntimeError("No VmHWM in /proc/self/status")
+
+
+def cpu_seconds(who: int) -> float:
+    usage = resource.getrusage(who)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_stage(stage: str, workdir: Path, scale: int, args: argparse.Namespace) -> Dict[str, object]:
+    """
+    Runs in the stage's own process: runs the stage, under cProfile with --profile, and measures it.
+    """
+    profiler = cProfile.Profile() if args.profile else None
+    start_rss = peak_rss_mib()
+    cpu_start = cpu_seconds(resource.RUSAGE_SELF) + cpu_seconds(resource.RUSAGE_CHILDREN)
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    details = STAGES[stage](workdir, scale, args)
+    if profiler is not None:
+        profiler.disable()
+    wall = time.perf_counter() - start
+    cpu = cpu_seconds(resource.RUSAGE_SELF) + cpu_seconds(resource.RUSAGE_CHILDREN) - cpu_start
+
+    result: Dict[str, object] = {
+        "wall_s": round(wall, 3),
+        "cpu_s": round(cpu, 3),
+        "start_rss_mib": round(start_rss, 1),
+        "peak_rss_mib": round(peak_rss_mib(), 1),
+        # ru_maxrss is in KiB on Linux
+        "workers_peak_rss_mib": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+        **details,
+    }
+    if profiler is not None:
+        args.profile.mkdir(parents=True, exist_ok=True)
+        profile_file = args.profile / f"{scale}-{stage}.prof"
+        profiler.dump_stats(profile_file)
+        result["profile"] = str(profile_file)
+    return result
+
+
+def wait_for_server(url: str, timeout: float = 300) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url).read()
+            return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.1)
+    raise TimeoutError(f"Fixture server at {url} did not start")
+
+
+def start_fixture_server(scale: int, args: argparse.Namespace) -> multiprocessing.Process:
+    motions = [ParliamentMotion.model_validate(m) for m in synthetic_motions(scraped_count(scale, args))]
+    server = multiprocessing.Process(
+        target=serve_fixtures, kwargs={"port": int(args.base_url.rsplit(":", 1)[1]), "motions": motions}, daemon=True
+    )
+    server.start()
+    wait_for_server(f"{args.base_url}/kamerstukken/moties?page=0")
+    return server
+
+
+def run_pipeline(scale: int, args: argparse.Namespace) -> List[Dict[str, object]]:
+    results = []
+    with tempfile.TemporaryDirectory(prefix="pipeline-") as directory:
+        workdir = Path(directory)
+        (workdir / "party_disagreements").mkdir()
+        stages = list(STAGES)
+        server = None
+        if args.no_scrape:
+            stages.remove("scrape")
+            write_dataset(workdir / "dataset.json", synthetic_motions(scale))
+        else:
+            server = start_fixture_server(scale, args)
+
+        try:
+            for stage in stages:
+                output = workdir / f"{stage}.result.json"
+                log = workdir / f"{stage}.log"
+                command = [sys.executable, "-m", "benchmarks.bench_pipeline", *sys.argv[1:]]
+                command += ["--base-url", args.base_url, "--child-stage", stage, "--child-scale", str(scale)]
+                command += ["--child-workdir", directory]
+                command += ["--child-output", str(output)]
+                with open(log, "w") as log_file:
+                    process = subprocess.run(command, cwd=BACKEND_DIR, stdout=log_file, stderr=subprocess.STDOUT)
+                if process.returncode != 0:
+                    raise RuntimeError(f"Stage {stage} failed at {scale} motions:\n{log.read_text()[-3000:]}")
+                result = {"scale": scale, "stage": stage, **json.loads(output.read_text())}
+                results.append(result)
+                print_result(result)
+                if stage == "scrape":
+                    server.terminate()
+                    server.join()
+                    server = None
+        finally:
+            if server is not None:
+                server.terminate()
+                server.join()
+    return results
+
+
+# The columns of the table, by result key; the other keys of a stage's result are printed after them
+COLUMNS = {
+    "wall_s": "wall (s)",
+    "cpu_s": "CPU (s)",
+    "start_rss_mib": "start MiB",
+    "peak_rss_mib": "peak MiB",
+    "workers_peak_rss_mib": "workers MiB",
+}
+
+
+def print_header() -> None:
+    print(f"{'motions':>9} {'stage':>14} " + " ".join(f"{title:>11}" for title in COLUMNS.values()))
+
+
+def print_result(result: Dict[str, object]) -> None:
+    columns = " ".join(f"{result[key]:11.2f}" if key.endswith("_s") else f"{result[key]:11.0f}" for key in COLUMNS)
+    details = ", ".join(
+        f"{key}={value}" for key, value in result.items() if key not in ("scale", "stage", "motions", *COLUMNS)
+    )
+    print(f"{result['scale']:>9} {result['stage']:>14} {columns}  {details}")
+
+
+# Stages this quick are timed too coarsely for a relative change in their wall time to mean anything
+MIN_WALL_S = 0.5
+
+# Settings that must match for two runs to be comparable
+CONFIGURATION = ("scrape_limit", "no_scrape", "parse_processes", "workers", "llm_latency", "llm_concurrency", "cpus")
+
+
+def compare(report: Dict[str, object], baseline_file: Path, tolerance: float) -> List[str]:
+    """
+    Compares every scale/stage result with the same one in `baseline_file`, printing the changes, and returns the
+    regressions beyond `tolerance` (a fraction).
+    """
+    baseline_report = json.loads(baseline_file.read_text())
+    baseline = {(r["scale"], r["stage"]): r for r in baseline_report["results"]}
+    regressions = []
+    print(f"\nCompared with {baseline_file} ({baseline_report['meta'].get('commit') or 'unknown commit'}):")
+    for key in CONFIGURATION:
+        if baseline_report["meta"].get(key) != report["meta"][key]:
+            print(f"  WARNING: {key} differs: {baseline_report['meta'].get(key)} then, {report['meta'][key]} now")
+    results: List[Dict[str, object]] = report["results"]
+    for result in results:
+        before = baseline.get((result["scale"], result["stage"]))
+        if before is None:
+            continue
+        name = f"{result['scale']} {result['stage']}"
+        wall = result["wall_s"] / before["wall_s"] - 1
+        memory = result["peak_rss_mib"] / before["peak_rss_mib"] - 1
+        print(f"  {name:>22}: wall time {wall:+7.1%}, peak memory {memory:+7.1%}")
+        if wall > tolerance and result["wall_s"] >= MIN_WALL_S:
+            regressions.append(f"{name}: wall time {wall:+.1%}")
+        if memory > tolerance:
+            regressions.append(f"{name}: peak memory {memory:+.1%}")
+    return regressions
+
+
+def main(args: argparse.Namespace) -> int:
+    scraping = f"up to {args.scrape_limit} motions" if args.scrape_limit else "all motions"
+    print(
+        f"Scraping {'nothing' if args.no_scrape else scraping} "
+        f"({args.workers} fetch workers, {args.parse_processes} parse processes), "
+        f"fake LLM with {args.llm_latency:g} s latency and {args.llm_concurrency} calls in flight"
+    )
+    print_header()
+    results: List[Dict[str, object]] = []
+    for scale in args.scales:
+        results += run_pipeline(scale, args)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "scales": args.scales,
+            "scrape_limit": args.scrape_limit,
+            "no_scrape": args.no_scrape,
+            "parse_processes": args.parse_processes,
+            "workers": args.workers,
+            "llm_latency": args.llm_latency,
+            "llm_concurrency": args.llm_concurrency,
+        },
+        "results": results,
+    }
+    output = args.output or RESULTS_DIR / f"pipeline-{datetime.datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Wrote {output}")
+
+    if args.compare is None:
+        return 0
+    regressions = compare(report, args.compare, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION: {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[10_000, 100_000], help="Numbers of motions")
+    parser.add_argument(
+        "--scrape-limit", type=int, default=5000, help="Motions to scrape from the fixture server per scale (0 for all)"
+    )
+    parser.add_argument("--no-scrape", action="store_true", help="Skip the scrape stage, starting from the dataset")
+    parser.add_argument("--workers", type=int, default=32, help="Scraper requests in flight")
+    parser.add_argument("--parse-processes", type=int, default=1, help="Scraper parse processes (0 parses inline)")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds per fake LLM call")
+    parser.add_argument("--llm-concurrency", type=int, default=8, help="LLM calls in flight")
+    parser.add_argument("--profile", type=Path, default=None, help="Directory to write a cProfile file per stage to")
+    parser.add_argument("--output", type=Path, default=None, help="Result file, by default in benchmarks/results")
+    parser.add_argument("--compare", type=Path, default=None, help="Earlier result file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed relative change before a regression")
+    parser.add_argument("--base-url", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--child-stage", choices=list(STAGES), default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--child-scale", type=int, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--child-workdir", type=Path, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--child-output", type=Path, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child_stage is not None:
+        result = run_stage(args.child_stage, args.child_workdir, args.child_scale, args)
+        args.child_output.write_text(json.dumps(result))
+    else:
+        args.base_url = f"http://127.0.0.1:{free_port()}"
+        sys.exit(main(args))
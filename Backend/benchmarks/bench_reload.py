@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Serves /votes/disagreements and /votes/matrix in-process with concurrent clients while the data is reloaded over and
+over, alternating between two bundles that differ in one party pair. Compares the request latency without reloads
+against the latency during reloads, reports the longest event loop stall, and checks that every response body belongs
+to the data version in its X-Data-Version header.
+
+Usage (from the Backend directory):
+    API_V1_STR=/api/v1 python -m benchmarks.bench_reload --seconds 5 --clients 8
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+from src.api.schemas import parties
+from src.api.snapshot import VERSION_HEADER
+from src.config import settings
+from src.data.bundle import BUNDLE_FILE, DataBundle, disagreements_key, encode_bundle
+from src.main import app
+from src.api.v1.votes.router import SNAPSHOTS
+
+HEADERS = {"Authorization": "Bearer x"}
+PARTY_A, PARTY_B = sorted(parties[:2])
+
+
+def write_variant(source: DataBundle, path: Path) -> None:
+    """
+    A copy of `source` in which the disagreements of the probed pair are those of another pair.
+    """
+    entries = {key: source.read(key) for key in source.keys()}
+    entries[disagreements_key(PARTY_A, PARTY_B)] = source.read(disagreements_key(parties[2], parties[3]))
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_bytes(encode_bundle(entries))
+    os.replace(tmp_path, path)
+
+
+async def watch_loop(stalls: List[float], stop: asyncio.Event, interval: float = 0.005) -> None:
+    while not stop.is_set():
+        start = time.monotonic()
+        await asyncio.sleep(interval)
+        stalls.append(time.monotonic() - start - interval)
+
+
+async def client(
+    http: httpx.AsyncClient, stop: asyncio.Event, latencies: List[float], bodies: Dict[str, set], errors: List[str]
+) -> None:
+    prefix = settings.API_V1_STR
+    while not stop.is_set():
+        for url in (f"{prefix}/votes/disagreements?party_a={PARTY_A}&party_b={PARTY_B}", f"{prefix}/votes/matrix"):
+            start = time.perf_counter()
+            response = await http.get(url, headers=HEADERS)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors.append(f"{url}: {response.status_code}")
+            elif "disagreements" in url:
+                bodies.setdefault(response.headers[VERSION_HEADER], set()).add(response.content)
+
+
+async def reloader(stop: asyncio.Event, paths: List[Path], swaps: List[float]) -> None:
+    n = 0
+    while not stop.is_set():
+        SNAPSHOTS.bundle_path = paths[n % 2]
+        start = time.perf_counter()
+        if await SNAPSHOTS.reload():
+            swaps.append(time.perf_counter() - start)
+        n += 1
+
+
+async def phase(seconds: float, clients: int, paths: List[Path]) -> Dict[str, object]:
+    stop = asyncio.Event()
+    latencies: List[float] = []
+    stalls: List[float] = []
+    swaps: List[float] = []
+    bodies: Dict[str, set] = {}
+    errors: List[str] = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        tasks = [asyncio.create_task(client(http, stop, latencies, bodies, errors)) for _ in range(clients)]
+        tasks.append(asyncio.create_task(watch_loop(stalls, stop)))
+        if paths:
+            tasks.append(asyncio.create_task(reloader(stop, paths, swaps)))
+        await asyncio.sleep(seconds)
+        stop.set()
+        await asyncio.gather(*tasks)
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+        "max_ms": latencies[-1] * 1000,
+        "max_stall_ms": max(stalls, default=0.0) * 1000,
+        "swaps": len(swaps),
+        "swap_s": statistics.mean(swaps) if swaps else 0.0,
+        "versions": len(bodies),
+        "inconsistent": sum(len(variants) > 1 for variants in bodies.values()),
+        "errors": len(errors),
+    }
+
+
+def main(seconds: float, clients: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        original = Path(directory) / "bundle.bin"
+        variant = Path(directory) / "variant.bin"
+        shutil.copyfile(BUNDLE_FILE, original)
+        write_variant(DataBundle.open(original), variant)
+
+        for name, paths in (("steady", []), ("reloading", [original, variant])):
+            result = asyncio.run(phase(seconds, clients, paths))
+            print(
+                f"{name:>9}: {result['requests']:6d} requests, p50 {result['p50_ms']:6.2f} ms, "
+                f"p99 {result['p99_ms']:6.2f} ms, max {result['max_ms']:7.2f} ms, "
+                f"longest loop stall {result['max_stall_ms']:6.2f} ms"
+            )
+            if paths:
+                print(
+                    f"           {result['swaps']} swaps, {result['swap_s'] * 1000:.0f} ms per reload, "
+                    f"{result['versions']} versions served, {result['inconsistent']} with mixed data, "
+                    f"{result['errors']} failed requests"
+                )
+        SNAPSHOTS.bundle_path = BUNDLE_FILE
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duration of each phase")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent clients")
+    args = parser.parse_args()
+    main(args.seconds, args.clients)
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+Measures building the motion title search index and the latency of queries against it. The corpus is the scraped motions
+repeated `--scale` times (4 gives about 12k motions); queries are one to three random indexed words, some cut short to
+exercise prefix matching.
+
+Usage (from the Backend directory):
+    python -m benchmarks.bench_search --scale 4 --queries 2000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from src.api.schemas import parties
+from src.data.search import SearchIndex
+from src.data.votes import VoteStore
+
+
+def main(scale: int, n_queries: int, limit: int) -> None:
+    titles = list(VoteStore.from_dataset(parties).titles) * scale
+
+    start = time.perf_counter()
+    index = SearchIndex(titles)
+    print(f"Indexed {len(titles)} titles ({len(index.terms)} terms) in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    rng = np.random.default_rng(0)
+    queries = []
+    for _ in range(n_queries):
+        words = [index.terms[k] for k in rng.integers(0, len(index.terms), rng.integers(1, 4))]
+        if rng.random() < 0.3:
+            words[-1] = words[-1][: max(3, len(words[-1]) // 2)]
+        queries.append(" ".join(words))
+
+    durations = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query, limit)
+        durations.append(time.perf_counter() - start)
+
+    d = np.asarray(durations) * 1000
+    print(f"{n_queries} queries: p50 {np.percentile(d, 50):.2f} ms, p99 {np.percentile(d, 99):.2f} ms, max {d.max():.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+    main(args.scale, args.queries, args.limit)
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+Compares the time the votes router spends loading its data at startup: the original loader that reads and validates
+matrix.json plus every file in party_disagreements/, against opening the prebuilt data bundle. tests/test_bundle.py
+checks that both load the same data.
+
+Usage (from the Backend directory):
+    python -m run.build_bundle
+    python -m benchmarks.bench_startup --repeat 50
+"""
+import argparse
+import statistics
+import time
+from typing import Callable, List
+
+from src.data.bundle import BUNDLE_FILE, DataBundle
+from tests.helpers import bundle_load, legacy_load
+
+def bundle_open() -> DataBundle:
+    return DataBundle.open(BUNDLE_FILE)
+
+
+def measure(fn: Callable, repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main(repeat: int) -> None:
+    for name, fn in (("legacy loader", legacy_load), ("bundle + models", bundle_load), ("bundle open", bundle_open)):
+        timings = measure(fn, repeat)
+        print(f"{name:>16}: median {statistics.median(timings) * 1000:7.2f} ms, min {min(timings) * 1000:7.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    main(args.repeat)
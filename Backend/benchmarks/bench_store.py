@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Compares loading the votes as the disagreements job used to, parsing the column-oriented votes.json with
+`pd.read_json` once per party pair, with opening the memory-mapped vote store once and selecting each pair's
+disagreeing motions from it. Also compares the single loads (votes.json, the dataset, the store).
+tests/test_votes.py checks that both select the same titles, except motions a party has no vote on.
+
+Usage (from the Backend directory):
+    python -m benchmarks.bench_store
+"""
+import argparse
+import itertools
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+import pandas as pd
+
+from src.api.schemas import parties
+from src.data.votes import VoteStore
+
+
+def best_of(fn: Callable[[], object], repeat: int) -> float:
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def legacy_titles(votes_file: Path, party_a: str, party_b: str) -> List[str]:
+    df = pd.read_json(votes_file)
+    df = df[["title", party_a, party_b]]
+    df = df[df[party_a] != df[party_b]]
+    return list(df["title"].str.strip())
+
+
+def store_titles(store: VoteStore, party_a: str, party_b: str) -> List[str]:
+    return store.titles[store.disagreeing(party_a, party_b)]
+
+
+def main(repeat: int) -> None:
+    pairs = list(itertools.combinations(sorted(parties), 2))
+    with tempfile.TemporaryDirectory() as directory:
+        votes_file = Path(directory) / "votes.json"
+        store_file = Path(directory) / "votes.bin"
+        store = VoteStore.from_dataset(parties)
+        store.save(store_file)
+        store.to_frame().to_json(votes_file)
+
+        loads = {
+            "pd.read_json(votes.json)": lambda: pd.read_json(votes_file),
+            "VoteStore.from_dataset": lambda: VoteStore.from_dataset(parties),
+            "VoteStore.open": lambda: VoteStore.open(store_file),
+        }
+        for name, load in loads.items():
+            print(f"{name:>28}: {best_of(load, repeat) * 1000:8.2f} ms")
+
+        legacy = best_of(lambda: [legacy_titles(votes_file, *pair) for pair in pairs], 1)
+
+        def columnar() -> None:
+            shared = VoteStore.open(store_file)
+            for pair in pairs:
+                store_titles(shared, *pair)
+
+        new = best_of(columnar, repeat)
+        print(
+            f"{len(pairs)} pairs: read_json per pair {legacy * 1000:8.1f} ms, one store open {new * 1000:6.1f} ms "
+            f"({legacy / new:.0f}x); votes.json {votes_file.stat().st_size / 1024:.0f} KiB, "
+            f"votes.bin {store_file.stat().st_size / 1024:.0f} KiB"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.repeat)
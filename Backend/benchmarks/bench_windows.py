@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Compares date range queries answered from the monthly prefix sums in `src.data.windows` with counting the selected
+motions directly. tests/test_matrix_filters.py checks that both give the same counts.
+
+The dataset has no motion dates yet, so the motions get random dates over the scrape window (2023-11-22 to
+2025-10-29), and the corpus is scaled up by repeating the motions.
+
+Usage (from the Backend directory):
+    python -m benchmarks.bench_windows --scales 1 10 100 --queries 200
+"""
+import argparse
+import time
+from typing import List
+
+import numpy as np
+
+from src.data.modes import block_counts
+from src.data.windows import WindowedCounts
+from tests.helpers import dated_store, random_ranges
+
+def main(scales: List[int], n_queries: int) -> None:
+    rng = np.random.default_rng(0)
+    for scale in scales:
+        store = dated_store(scale, rng)
+        start = time.perf_counter()
+        windows = WindowedCounts(store)
+        build = time.perf_counter() - start
+        ranges = random_ranges(n_queries, rng)
+
+        start = time.perf_counter()
+        for date_from, date_to in ranges:
+            mask = (store.dates >= np.datetime64(date_from)) & (store.dates <= np.datetime64(date_to))
+            block_counts(store, mask)
+        direct_time = (time.perf_counter() - start) / n_queries
+
+        start = time.perf_counter()
+        for date_from, date_to in ranges:
+            windows.counts(date_from, date_to)
+        windowed_time = (time.perf_counter() - start) / n_queries
+
+        print(
+            f"{len(store.ids):>8} motions: prefix sums built in {build * 1000:7.1f} ms, "
+            f"direct {direct_time * 1000:7.2f} ms/query, windowed {windowed_time * 1000:6.2f} ms/query "
+            f"({direct_time / windowed_time:5.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    main(args.scales, args.queries)
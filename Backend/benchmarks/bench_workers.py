@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Memory of the API with several workers: `uvicorn --workers N`, where every worker imports the app and loads the data
+itself, against `python -m src.server --workers N`, which loads it once and forks. Each server is warmed up with
+requests to every endpoint (so the windowed counts, the search index and the filtered matrix cache exist), after which
+the memory of the worker processes is read from /proc: RSS, the private memory (USS, what a worker adds on its own)
+and the proportional share (PSS, which sums to the memory actually used, shared pages split between the processes).
+
+Linux only. Usage (from the Backend directory):
+    python -m benchmarks.bench_workers --workers 1 4 16
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+from src.api.schemas import parties
+
+BACKEND_DIR = Path(__file__).parent.parent
+HEADERS = {"Authorization": "Bearer x"}
+PATHS = [
+    "/",
+    "/api/v1/votes/matrix",
+    f"/api/v1/votes/disagreements?party_a={parties[0]}&party_b={parties[1]}",
+    "/api/v1/votes/matrix?from=2024-01-01&mode=kappa",
+    "/api/v1/votes/motions/search?q=klimaat",
+]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def memory(pid: int) -> Dict[str, int]:
+    """
+    RSS, PSS and USS of a process in KiB.
+    """
+    values: Dict[str, int] = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:", "Private_Clean:", "Private_Dirty:"):
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return {"rss": values["Rss"], "pss": values["Pss"], "uss": values["Private_Clean"] + values["Private_Dirty"]}
+
+
+def workers_of(pid: int) -> List[int]:
+    children = []
+    for line in Path(f"/proc/{pid}/task/{pid}/children").read_text().split():
+        cmdline = Path(f"/proc/{line}/cmdline").read_bytes()
+        if b"resource_tracker" not in cmdline:
+            children.append(int(line))
+    return children
+
+
+def wait_ready(process: subprocess.Popen, port: int, workers: int, timeout: float = 300) -> None:
+    deadline = time.monotonic() + timeout
+    previous = None
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with {process.returncode}")
+        pids = workers_of(process.pid) if workers > 1 else [process.pid]
+        if len(pids) == workers:
+            try:
+                sizes = [memory(pid)["rss"] for pid in pids]
+                urllib.request.urlopen(urllib.request.Request(f"http://127.0.0.1:{port}/", headers=HEADERS)).read()
+            except OSError:
+                sizes = None
+            # Every worker is up once their memory stops growing
+            if sizes is not None and previous is not None and all(abs(a - b) < 256 for a, b in zip(sizes, previous)):
+                return
+            previous = sizes
+        time.sleep(1.0)
+    raise TimeoutError("Server did not start")
+
+
+def warm_up(port: int, workers: int, rounds: int) -> None:
+    def get(path: str) -> None:
+        request = urllib.request.Request(f"http://127.0.0.1:{port}{path}", headers=HEADERS)
+        urllib.request.urlopen(request).read()
+
+    # New connections from many clients at once, so the requests are spread over the workers
+    with ThreadPoolExecutor(max_workers=2 * workers) as executor:
+        list(executor.map(get, [path for _ in range(rounds * workers) for path in PATHS]))
+
+
+def measure(command: List[str], workers: int, rounds: int) -> Dict[str, float]:
+    port = free_port()
+    env = {**os.environ, "API_V1_STR": "/api/v1", "LOG_LEVEL": "WARNING", "DATA_RELOAD_INTERVAL": "0"}
+    process = subprocess.Popen(
+        [sys.executable, "-m", *command, "--port", str(port), "--workers", str(workers)],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_ready(process, port, workers)
+        warm_up(port, workers, rounds)
+        pids = workers_of(process.pid) if workers > 1 else [process.pid]
+        worker_memory = [memory(pid) for pid in pids]
+        parent = memory(process.pid) if workers > 1 else {"pss": 0}
+    finally:
+        process.terminate()
+        process.wait(timeout=60)
+    return {
+        "rss_mib": sum(m["rss"] for m in worker_memory) / len(pids) / 1024,
+        "uss_mib": sum(m["uss"] for m in worker_memory) / len(pids) / 1024,
+        "total_pss_mib": (parent["pss"] + sum(m["pss"] for m in worker_memory)) / 1024,
+    }
+
+
+def main(worker_counts: List[int], rounds: int) -> None:
+    servers = {
+        "uvicorn": ["uvicorn", "src.main:app"],
+        "prefork": ["src.server"],
+    }
+    print(f"{'server':>8} {'workers':>7} {'RSS/worker':>11} {'USS/worker':>11} {'total PSS':>10}")
+    for workers in worker_counts:
+        for name, command in servers.items():
+            result = measure(command, workers, rounds)
+            print(
+                f"{name:>8} {workers:7d} {result['rss_mib']:8.1f} MiB {result['uss_mib']:8.1f} MiB "
+                f"{result['total_pss_mib']:6.0f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16], help="Worker counts to measure")
+    parser.add_argument("--rounds", type=int, default=20, help="Requests per endpoint and worker to warm up with")
+    args = parser.parse_args()
+    main(args.workers, args.rounds)
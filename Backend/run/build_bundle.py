@@ -0,0 +1,15 @@
+from src.data.bundle import BUNDLE_FILE, build_bundle, DataBundle
+
+
+def main() -> DataBundle:
+    """
+    Compiles matrix.json and all party disagreements into the data bundle the API loads at startup. Run this after
+    generate_disagreements; generate_matrix and update_matrix compile it themselves.
+    """
+    bundle = build_bundle()
+    print(f"Wrote {BUNDLE_FILE} ({len(bundle.entries)} entries, {bundle.size / 1024:.0f} KiB, version {bundle.version[:12]})")
+    return bundle
+
+
+if __name__ == "__main__":
+    main()
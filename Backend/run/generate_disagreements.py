@@ -1,86 +1,176 @@
+import argparse
 import asyncio
-import itertools
+import tempfile
+import time
 from pathlib import Path
-from time import sleep
-from typing import Tuple
+from typing import List, Optional
 
-import pandas as pd
 from dotenv import load_dotenv
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai.chat_models import ChatOpenAI
+from langchain_core.language_models import BaseChatModel
 from tqdm.asyncio import tqdm
-from openai import RateLimitError
 
 from src.api.schemas import parties
 from src.api.v1.votes.schemas import PartyPairDisagreements, Disagreements, PartyPairDisagreementsData
+from src.config import settings
+from src.data.bundle import read_source_text
+from src.data.votes import VOTES_FILE, load_vote_store
+from src.disagreements.cache import LLMCache, LLMCacheEntry, input_key
+from src.disagreements.llm import FakeChatModel, LLMPool, categorize_chain, chat_model
+from src.disagreements.pairs import PartyPair, disagreeing_titles, party_pairs
 
 load_dotenv(".env.local")
 
 DATA_DIR: Path = Path(__file__).parent.parent / "data"
 
 
-async def get_disagreements(pair: Tuple[str, str]) -> PartyPairDisagreements:
-    party_a, party_b = tuple(sorted(pair))  # Guarantee alphabetic order
-
-    cache_file = DATA_DIR / f"party_disagreements/disagreements_{party_a}_{party_b}.json"
-    if cache_file.exists():
-        with open(cache_file, "r") as f:
-            return PartyPairDisagreements(
-                party_a=party_a,
-                party_b=party_b,
-                disagreements=Disagreements.model_validate_json(f.read()),
-            )
-
-    df = pd.read_json(DATA_DIR / "votes.json")
-    df = df[["title", party_a, party_b]]
-    df = df[df[party_a] != df[party_b]]
-
-    titles_list_str = "\n".join("- " + df["title"].str.strip())
-
-    prompt = ChatPromptTemplate.from_messages([
-        ("system",
-         "Jouw taak is om de lijst van Tweede Kamer moties te lezen en te categoriseren in vijf categorieën.\n"
-         "De lijst van moties is een lijst van moties waar twee partijen van mening verschillen. Dit is dus al een gefilterde lijst.\n"
-         "De categorieën die jij maakt geeft inzicht in de onderwerpen waar de twee partijen van mening verschillen. De gebruiker is alleen geïnteresseerd in de vijf belangrijkste categorieën.\n"
-         "De partijen zijn: {party_a} en {party_b}\n"
-         "\n"
-         "Schrijf de explanation een beetje in de vorm: 'X en Y verschillen op het gebied van ... vooral op ...'"),
-        ("user", "{motion_titles}")
-    ])
-    llm = ChatOpenAI(model="gpt-4o", temperature=0).with_structured_output(Disagreements)
-    chain = prompt | llm
-    retries = 3
-    while retries > 0:
-        try:
-            result: Disagreements = await chain.ainvoke(dict(motion_titles=titles_list_str, party_a=party_a, party_b=party_b))
-            with open(cache_file, "w") as f:
-                f.write(result.model_dump_json())
-            return PartyPairDisagreements(
-                party_a=party_a,
-                party_b=party_b,
-                disagreements=result,
-            )
-        except RateLimitError:
-            print(f"Rate limit exceeded, retrying in 10 seconds (retries left: {retries})")
-            retries -= 1
-            sleep(10)
-    raise Exception("Failed to get disagreements")
-
-
-async def main() -> PartyPairDisagreementsData:
-    party_pairs = list(itertools.combinations(parties, 2))
-
-    disagreements: PartyPairDisagreementsData = PartyPairDisagreementsData(data=[])
-    coroutines = [get_disagreements(pair) for pair in party_pairs]
-    results = await tqdm.gather(*coroutines, desc="Generating disagreements")
-    for party_pair_disagreements in results:
-        disagreements.data.append(party_pair_disagreements)
-
-    with open(DATA_DIR / "disagreements.json", "w") as f:
-        f.write(disagreements.model_dump_json())
-
+def result_file(output_dir: Path, pair: PartyPair) -> Path:
+    party_a, party_b = pair
+    return output_dir / f"disagreements_{party_a}_{party_b}.json"
+
+
+def publish(output_dir: Path, pair: PartyPair, result: Disagreements) -> None:
+    """
+    Writes the result of a pair to `output_dir`, which `run/build_bundle.py` compiles into the data bundle, unless it is
+    already there.
+    """
+    path = result_file(output_dir, pair)
+    body = result.model_dump_json()
+    if not path.exists() or read_source_text(path) != body:
+        path.write_text(body, encoding="utf-8")
+
+
+async def categorize(pool: LLMPool, model: str, pair: PartyPair, titles: List[str], key: str) -> LLMCacheEntry:
+    party_a, party_b = pair
+    motion_titles = "\n".join("- " + title for title in titles)
+    call = await pool.invoke(dict(motion_titles=motion_titles, party_a=party_a, party_b=party_b))
+    if call.value["parsed"] is None:
+        raise call.value["parsing_error"] or ValueError(f"No disagreements in the answer for {party_a} and {party_b}")
+    usage = call.value["raw"].usage_metadata or {}
+    return LLMCacheEntry(
+        key=key,
+        model=model,
+        party_a=party_a,
+        party_b=party_b,
+        motions=len(titles),
+        created_at=time.time(),
+        latency_s=round(call.latency, 3),
+        attempts=call.attempts,
+        input_tokens=usage.get("input_tokens"),
+        output_tokens=usage.get("output_tokens"),
+        result=call.value["parsed"],
+    )
+
+
+async def main(
+    llm: Optional[BaseChatModel] = None,
+    model: str = settings.LLM_MODEL,
+    output_dir: Path = DATA_DIR / "party_disagreements",
+    output_file: Path = DATA_DIR / "disagreements.json",
+    cache: Optional[LLMCache] = None,
+    concurrency: int = settings.LLM_CONCURRENCY,
+    dry_run: bool = False,
+    adopt_existing: bool = False,
+    votes_file: Path = VOTES_FILE,
+) -> Optional[PartyPairDisagreementsData]:
+    """
+    Categorizes the motions each party pair voted differently on, in stages: the votes are loaded once and the
+    disagreeing titles of all pairs selected in one pass; pairs whose inputs (model, prompt and titles) are in the LLM
+    cache are served from it; only the others are sent to the LLM, through a bounded pool sharing one client.
+
+    With `adopt_existing`, a pair that is not in the cache but has a result in `output_dir` (e.g. one generated before
+    the cache existed) is cached as the result for its current inputs instead of being regenerated. With `dry_run`,
+    only reports what a run would do.
+    """
+    cache = cache or LLMCache(settings.LLM_CACHE_DIR)
+    pairs = party_pairs(parties)
+    titles = disagreeing_titles(load_vote_store(parties, votes_file), pairs)
+    keys = {pair: input_key(model, *pair, titles[pair]) for pair in pairs}
+
+    cached = [pair for pair in pairs if keys[pair] in cache]
+    adoptable = [
+        pair for pair in pairs if adopt_existing and keys[pair] not in cache and result_file(output_dir, pair).exists()
+    ]
+    pending = [pair for pair in pairs if keys[pair] not in cache and pair not in adoptable]
+    print(
+        f"{len(cached)} of {len(pairs)} pairs cached, {len(adoptable)} to adopt, {len(pending)} LLM calls to make "
+        f"({sum(len(titles[pair]) for pair in pending)} motion titles)"
+    )
+    if dry_run:
+        for party_a, party_b in pending:
+            print(f"  {party_a} / {party_b}: {len(titles[party_a, party_b])} motions")
+        return None
+
+    entries = {pair: cache.get(keys[pair]) for pair in cached}
+    for pair in adoptable:
+        result = Disagreements.model_validate_json(read_source_text(result_file(output_dir, pair)))
+        entries[pair] = LLMCacheEntry(
+            key=keys[pair],
+            model=model,
+            party_a=pair[0],
+            party_b=pair[1],
+            motions=len(titles[pair]),
+            created_at=result_file(output_dir, pair).stat().st_mtime,
+            adopted=True,
+            result=result,
+        )
+        cache.put(entries[pair])
+
+    if pending:
+        pool = LLMPool(categorize_chain(llm or chat_model(model)), concurrency=concurrency)
+
+        async def generate(pair: PartyPair) -> LLMCacheEntry:
+            entry = await categorize(pool, model, pair, titles[pair], keys[pair])
+            cache.put(entry)
+            return entry
+
+        generated = await tqdm.gather(*[generate(pair) for pair in pending], desc="Generating disagreements")
+        entries.update(zip(pending, generated))
+        tokens = sum((entry.input_tokens or 0) + (entry.output_tokens or 0) for entry in generated)
+        print(f"LLM calls: {pool.stats}, tokens={tokens}")
+
+    for pair, entry in entries.items():
+        publish(output_dir, pair, entry.result)
+    disagreements = PartyPairDisagreementsData(
+        data=[
+            PartyPairDisagreements(party_a=party_a, party_b=party_b, disagreements=entries[party_a, party_b].result)
+            for party_a, party_b in pairs
+        ]
+    )
+    output_file.write_text(disagreements.model_dump_json(), encoding="utf-8")
     return disagreements
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Categorize the disagreements of every party pair with an LLM.")
+    parser.add_argument("--concurrency", type=int, default=settings.LLM_CONCURRENCY, help="LLM calls in flight")
+    parser.add_argument("--dry-run", action="store_true", help="Only report how many LLM calls a run would make")
+    parser.add_argument(
+        "--adopt-existing",
+        action="store_true",
+        help="Cache the existing result files of pairs that are not cached as up to date, instead of regenerating them",
+    )
+    parser.add_argument(
+        "--fake",
+        action="store_true",
+        help="Use an offline fake model, writing to a temporary directory instead of data/",
+    )
+    args = parser.parse_args()
+
+    if args.fake:
+        directory = Path(tempfile.mkdtemp(prefix="disagreements-"))
+        print(f"Writing fake disagreements to {directory}")
+        asyncio.run(
+            main(
+                FakeChatModel(latency=0.05),
+                model="fake",
+                output_dir=directory,
+                output_file=directory / "disagreements.json",
+                cache=LLMCache(directory / "llm_cache"),
+                concurrency=args.concurrency,
+                dry_run=args.dry_run,
+            )
+        )
+    else:
+        asyncio.run(
+            main(concurrency=args.concurrency, dry_run=args.dry_run, adopt_existing=args.adopt_existing)
+        )
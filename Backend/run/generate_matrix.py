@@ -1,14 +1,32 @@
+"""
+Rebuilds the vote store, the pair counts and matrix.json from the dataset, then compiles the data bundle the API serves
+(`run/build_bundle.py`), so a running API picks the new matrix up with its next reload.
+
+Usage (from the Backend directory):
+    python -m run.generate_matrix
+    python -m run.generate_matrix --no-bundle  # leaves bundle.bin as it is
+"""
+import argparse
 from pathlib import Path
+from typing import Optional
 
 import pandas as pd
 
 from src.api.schemas import parties
 from src.api.v1.votes.schemas import VoteMatrix
+from src.data.bundle import BUNDLE_FILE, build_bundle
+from src.data.counts import COUNTS_FILE, MatrixCounts
+from src.data.votes import DATASET_FILE, VOTES_FILE, VoteStore
 
 DATA_DIR: Path = Path(__file__).parent.parent / "data"
+MATRIX_FILE: Path = DATA_DIR / "matrix.json"
 
 
 def calculate_similarity(party1_votes, party2_votes):
+    """
+    Reference implementation for a single party pair, kept for the notebooks and for benchmarking against
+    `src.data.matrix`, which computes all pairs at once.
+    """
     valid_mask = ~(party1_votes.isna() | party2_votes.isna())
     if valid_mask.sum() == 0:
         return 0.0
@@ -17,8 +35,13 @@ def calculate_similarity(party1_votes, party2_votes):
     return (agreements / total_comparisons) * 100
 
 
-def main() -> VoteMatrix:
-    df = pd.read_json('data/dataset.json')
+def load_votes(dataset_file: Path = DATA_DIR / "dataset.json") -> pd.DataFrame:
+    """
+    Pivots the filled motions of the dataset into the votes table: one row per motion with its did, url and title, and
+    one column per party. Reference implementation of `VoteStore.from_dataset`, kept for the notebooks and for
+    benchmarking.
+    """
+    df = pd.read_json(dataset_file)
     df = pd.json_normalize(df['motions']).set_index('id')
     df['title'] = df['title'].str.replace('\nMotie\n:\n', '')
     df['title'] = df['title'].str.replace('\nMotie (gewijzigd/nader)\n:\n', '')
@@ -34,26 +57,36 @@ def main() -> VoteMatrix:
         aggfunc='first'
     ).reset_index()
     df.columns.name = None
-    df = df.set_index('id')
-
-    df.to_json("data/votes.json")
-    df = df[parties]
+    return df.set_index('id')
 
-    similarity_matrix = pd.DataFrame(index=parties, columns=parties, dtype=float)
 
-    for party1 in parties:
-        for party2 in parties:
-            if party1 == party2:
-                similarity_matrix.loc[party1, party2] = 100.0
-            else:
-                similarity = calculate_similarity(df[party1], df[party2])
-                similarity_matrix.loc[party1, party2] = similarity
+def main(
+    dataset_file: Path = DATASET_FILE,
+    votes_file: Path = VOTES_FILE,
+    counts_file: Path = COUNTS_FILE,
+    matrix_file: Path = MATRIX_FILE,
+    bundle_file: Optional[Path] = BUNDLE_FILE,
+) -> VoteMatrix:
+    """
+    Rebuilds the vote store, matrix.json and the pair counts that `run/update_matrix.py` updates incrementally. Unless
+    `bundle_file` is None, the data bundle is then compiled again, from matrix.json and the party disagreements next to
+    it.
+    """
+    store = VoteStore.from_dataset(parties, dataset_file)
+    store.save(votes_file)
 
-    similarity_matrix = similarity_matrix.round(1)
+    counts = MatrixCounts.from_store(store)
+    counts.save(counts_file)
 
-    similarity_matrix.to_json("data/matrix.json")
-    return VoteMatrix.model_validate(similarity_matrix.to_dict())
+    matrix = counts.similarity()
+    matrix.to_json(matrix_file)
+    if bundle_file is not None:
+        build_bundle(matrix_file.parent, bundle_file)
+    return VoteMatrix.model_validate(matrix.to_dict())
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--no-bundle", action="store_true", help=f"Do not compile {BUNDLE_FILE.name} again")
+    args = parser.parse_args()
+    main(bundle_file=None if args.no_bundle else BUNDLE_FILE)
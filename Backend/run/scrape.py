@@ -1,60 +1,43 @@
 # -*- coding: utf-8 -*-
+import argparse
+import contextlib
 import json
+import os
 import traceback
 from pathlib import Path
-from typing import List, Union, Optional
+from typing import Dict, Iterator, List, NamedTuple, Optional, Union
 from urllib.parse import urlparse, parse_qs
 
 import asyncio
 
 import aiohttp
-import pandas
 from bs4 import BeautifulSoup
 from bs4.element import Tag
-from pydantic import BaseModel
 from tqdm.asyncio import tqdm
-from io import StringIO
 
 from src.config import settings
+from src.scraper.cache import ResponseCache, parse_duration
+from src.scraper.fetch import FetchScheduler, TRANSIENT_ERRORS
+from src.scraper.models import (
+    NoTableFound,
+    ParliamentMotion,
+    ParliamentMotionDataset,
+    ParliamentMotionLocator,
+)
+from src.scraper.parser import parse_motion
+from src.scraper.pool import ParsePool
 
 BASE_URL = "https://www.tweedekamer.nl/kamerstukken/moties"
+DATA_DIR: Path = Path(__file__).parent.parent / "data"
+DATASET_FILE: Path = DATA_DIR / "dataset.json"
+CHECKPOINT_FILE: Path = DATA_DIR / "dataset.checkpoint.jsonl"
 
 def motions_page(page: int) -> str:
     return f"{BASE_URL}?fld_prl_kamerstuk=Moties&fld_tk_categorie=Kamerstukken&fromdate=22/11/2023&qry=*&srt=date%3Adesc%3Adate&sta=1&todate=29/10/2025&page={page}"
 
 
-class ParliamentMotionLocator(BaseModel):
-    id: str
-    did: str
-    url: str
-
-
-class PartyVote(BaseModel):
-    party: str
-    seats: int
-    vote: str
-
-
-class ParliamentMotion(BaseModel):
-    id: str
-    did: str
-    url: str
-    title: str
-    votes: List[PartyVote]
-
-
-class NoTableFound(Exception):
-    pass
-
-
-async def fetch(session, url):
-    async with session.get(url, headers={"User-Agent": settings.USER_AGENT}) as response:
-        response.raise_for_status()
-        return await response.text()
-
-
-class ParliamentMotionDataset(BaseModel):
-    motions: List[Union[ParliamentMotionLocator, ParliamentMotion]]
+async def fetch(scheduler: FetchScheduler, url: str, revalidate: bool = False) -> str:
+    return await scheduler.fetch(url, revalidate=revalidate)
 
 
 def parse_card_as_motion_locator(card: Tag) -> ParliamentMotionLocator:
@@ -72,11 +55,7 @@ def parse_card_as_motion_locator(card: Tag) -> ParliamentMotionLocator:
     )
 
 
-async def scrape_for_motions(session: aiohttp.ClientSession, url: str) -> ParliamentMotionDataset:
-    """
-    This function scrapes the parliament website and creates a dataset needed for the application.
-    """
-    html_content = await fetch(session, url)
+def parse_listing_page(html_content: str) -> ParliamentMotionDataset:
     soup = BeautifulSoup(html_content, "html.parser")
 
     card_elements = soup.find_all("div", class_="m-card")
@@ -85,104 +64,309 @@ async def scrape_for_motions(session: aiohttp.ClientSession, url: str) -> Parlia
     return ParliamentMotionDataset(motions=motions)
 
 
-async def fill_motion(session, motion: ParliamentMotionLocator) -> ParliamentMotion:
+async def scrape_for_motions(scheduler: FetchScheduler, pool: ParsePool, url: str) -> ParliamentMotionDataset:
     """
-    This function fills a motion with the votes and title of the motion.
+    This function scrapes the parliament website and creates a dataset needed for the application.
     """
-    html_content = await fetch(session, motion.url)
-    soup = BeautifulSoup(html_content, "html.parser")
-    table = soup.find("table")
-    if table is None:
-        raise NoTableFound()
-    df = pandas.read_html(StringIO(str(table)))[0]
-
-    columns = ["Fracties", "Zetels", "Voor/Tegen"]
-    df = df[columns]
-
-    def safe_mode(x):
-        # This function is how you know I made this without AI: AI could never write code as awful as this.
-        if len(x.mode()) > 0:
-            result = x.mode().iloc[0]
-        else:
-            result = x.iloc[0]
-        if isinstance(result, float):
-            return ""
-        elif result:
-            return result
-        else:
-            return ""
-
-    # Group by party and aggregate
-    grouped_df = df.groupby('Fracties').agg({
-        'Zetels': 'sum',
-        'Voor/Tegen': safe_mode,
-    }).reset_index()
-
-    votes: List[PartyVote] = []
-
-    for _, row in grouped_df.iterrows():
-        votes.append(PartyVote(
-            party=row['Fracties'],
-            seats=int(row['Zetels']),
-            vote=row['Voor/Tegen']
-        ))
-
-    return ParliamentMotion(
-        id=motion.id,
-        did=motion.did,
-        url=motion.url,
-        title=soup.find("h1").get_text(),
-        votes=votes,
-    )
+    async with pool.slot():
+        # Listing pages change whenever new motions are published, so never serve them from the cache unchecked
+        html_content = await fetch(scheduler, url, revalidate=True)
+        return await pool.run(parse_listing_page, html_content)
 
 
-async def try_fill_motion(session, motion: ParliamentMotionLocator) -> Optional[ParliamentMotion]:
+async def fill_motion(scheduler: FetchScheduler, pool: ParsePool, motion: ParliamentMotionLocator) -> ParliamentMotion:
+    """
+    This function fills a motion with the votes and title of the motion. If the page is unchanged since it was last
+    parsed, the cached parse result is used instead.
+    """
+    async with pool.slot():
+        response = await scheduler.fetch_response(motion.url)
+        if not response.changed and response.parsed is not None:
+            return ParliamentMotion.model_validate_json(response.parsed)
+        filled = await pool.run(parse_motion, motion, response.text)
+
+    if scheduler.cache is not None:
+        scheduler.cache.store_parsed(motion.url, filled.model_dump_json(exclude_none=True))
+    return filled
+
+
+async def try_fill_motion(
+    scheduler: FetchScheduler,
+    pool: ParsePool,
+    motion: ParliamentMotionLocator,
+) -> Optional[ParliamentMotion]:
     if not isinstance(motion, ParliamentMotionLocator):
         return None
     try:
-        return await fill_motion(session, motion)
+        return await fill_motion(scheduler, pool, motion)
     except NoTableFound:
         return None
+    except aiohttp.ClientResponseError as e:
+        print(f"Permanent error filling motion {motion.id} ({motion.url}): HTTP {e.status}")
+        return None
+    except TRANSIENT_ERRORS as e:
+        print(f"Giving up on motion {motion.id} ({motion.url}) after retries: {e!r}")
+        return None
     except Exception:
         print(f"Error filling motion {motion.id} ({motion.url})")
         traceback.print_exc()
         return None
 
 
-async def main() -> ParliamentMotionDataset:
+class MotionCheckpoint:
+    """
+    Append-only JSON Lines file holding every motion that has been filled so far. Each line is written and flushed as
+    soon as its motion completes, so a crashed run loses at most the motion that was being written.
+    """
+
+    def __init__(self, path: Path = CHECKPOINT_FILE):
+        self.path = path
+        self._file = None
+
+    def offsets(self) -> Dict[str, int]:
+        """
+        Returns the byte offset of the line of every motion in the checkpoint by motion id, rather than the lines
+        themselves, so this stays small however large the checkpoint grows. A truncated last line (from a crash
+        mid-write) is ignored, and that motion will simply be fetched again.
+        """
+        offsets: Dict[str, int] = {}
+        if not self.path.exists():
+            return offsets
+        with open(self.path, "rb") as file:
+            offset = 0
+            for line in file:
+                try:
+                    motion = ParliamentMotion.model_validate_json(line)
+                except ValueError:
+                    pass
+                else:
+                    offsets[motion.id] = offset
+                offset += len(line)
+        return offsets
+
+    def append(self, motion: ParliamentMotion) -> None:
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+            if self._file.tell() > 0 and not self._ends_with_newline():
+                # Terminate a line left truncated by a crash, so it doesn't swallow the next motion
+                self._file.write("\n")
+        self._file.write(json.dumps(motion.model_dump(exclude_none=True)) + "\n")
+        self._file.flush()
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, "rb") as file:
+            file.seek(-1, os.SEEK_END)
+            return file.read(1) == b"\n"
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def compact(self, dataset: ParliamentMotionDataset, dataset_file: Path = DATASET_FILE) -> int:
+        """
+        Writes the dataset with every checkpointed motion filled in to `dataset_file`, and removes the checkpoint. Each
+        filled motion is copied from its line in the checkpoint as the output is written, one motion at a time, and the
+        output is moved into place atomically. Returns the number of filled motions.
+        """
+        self.close()
+        offsets = self.offsets()
+        tmp_file = dataset_file.with_suffix(".json.tmp")
+        with contextlib.ExitStack() as files:
+            file = files.enter_context(open(tmp_file, "w", encoding="utf-8"))
+            checkpoint = files.enter_context(open(self.path, "rb")) if offsets else None
+            file.write('{"motions": [')
+            for k, motion in enumerate(dataset.motions):
+                if k > 0:
+                    file.write(", ")
+                if motion.id in offsets:
+                    checkpoint.seek(offsets[motion.id])
+                    file.write(checkpoint.readline().decode("utf-8").rstrip("\n"))
+                else:
+                    file.write(json.dumps(motion.model_dump(exclude_none=True)))
+            file.write("]}")
+        os.replace(tmp_file, dataset_file)
+        self.path.unlink(missing_ok=True)
+        return len(offsets)
+
+
+class StreamCounts(NamedTuple):
+    attempted: int  # Motions this run tried to fill
+    filled: int  # Of which were filled and checkpointed
+    compacted: int  # Filled motions written to the dataset file, including those of earlier runs
+
+
+async def load_or_scrape_locators(
+    scheduler: FetchScheduler,
+    pool: ParsePool,
+    dataset_file: Path,
+) -> ParliamentMotionDataset:
+    if dataset_file.exists():
+        return ParliamentMotionDataset.model_validate_json(dataset_file.read_text())
+
+    coroutines = [scrape_for_motions(scheduler, pool, motions_page(page)) for page in range(334)]
+    datasets = await tqdm.gather(*coroutines, desc="Scraping pages for motions")
+    motions = []
+    for d in datasets:
+        motions += d.motions
+    dataset = ParliamentMotionDataset(motions=motions)
+    with open(dataset_file, "w") as file:
+        json.dump(dataset.model_dump(exclude_none=True), file)
+    return dataset
+
+
+async def main(
+    stream: bool = False,
+    workers: int = settings.SCRAPE_WORKERS,
+    rate_limit: float = settings.SCRAPE_RATE_LIMIT,
+    cache: Optional[ResponseCache] = None,
+    parse_processes: int = settings.SCRAPE_PARSE_PROCESSES,
+) -> Union[ParliamentMotionDataset, StreamCounts]:
     """
     This command scrapes the parliament website and creates a dataset needed for the application.
+
+    With `stream`, every filled motion is appended to the checkpoint as soon as it completes. Motions that are already in
+    the checkpoint are skipped, so an interrupted run can be restarted, and the checkpoint is compacted into the dataset
+    file at the end. The filled dataset is then only written to the dataset file, and the counts of the run are
+    returned instead.
+
+    All requests go through one `FetchScheduler`, which keeps at most `workers` requests in flight and no more than
+    `rate_limit` requests per second. With a `cache`, pages are revalidated with conditional requests and unchanged
+    motion pages are not parsed again.
+
+    Pages are parsed by a pool of `parse_processes` worker processes (0 parses on the event loop itself), which keeps
+    the event loop free for I/O.
+    """
+    with ParsePool(processes=parse_processes, max_pending=workers + 2 * parse_processes) as pool:
+        async with FetchScheduler(workers=workers, rate_limit=rate_limit, cache=cache) as scheduler:
+            return await scrape(scheduler, pool, stream)
+
+
+async def scrape(
+    scheduler: FetchScheduler, pool: ParsePool, stream: bool = False
+) -> Union[ParliamentMotionDataset, StreamCounts]:
+    dataset = await load_or_scrape_locators(scheduler, pool, DATASET_FILE)
+    if stream:
+        counts = await fill_streaming(scheduler, pool, dataset)
+        print(f"Fetch stats: {scheduler.stats}")
+        return counts
+
+    coroutines = [try_fill_motion(scheduler, pool, motion) for motion in dataset.motions]
+    results: List[Optional[ParliamentMotion]] = await tqdm.gather(*coroutines)
+
+    successes = 0
+    for k, result in enumerate(results):
+        if result is not None:
+            successes += 1
+            dataset.motions[k] = result
+
+    print(f"Success: {successes}/{len(results)} ({successes / len(results) * 100:.1f}%)")
+    print(f"Fetch stats: {scheduler.stats}")
+
+    with open(DATASET_FILE, "w") as file:
+        json.dump(dataset.model_dump(exclude_none=True), file)
+
+    return dataset
+
+
+async def fill_streaming(
+    scheduler: FetchScheduler,
+    pool: ParsePool,
+    dataset: ParliamentMotionDataset,
+    checkpoint: Optional[MotionCheckpoint] = None,
+    dataset_file: Path = DATASET_FILE,
+) -> StreamCounts:
     """
-    async with aiohttp.ClientSession() as session:
-        dataset_file = Path(__file__).parent.parent / "data/dataset.json"
-        if dataset_file.exists():
-            dataset = ParliamentMotionDataset.model_validate_json(dataset_file.read_text())
-        else:
-            coroutines = [scrape_for_motions(session, motions_page(page)) for page in range(334)]
-            datasets = await tqdm.gather(*coroutines, desc="Scraping pages for motions")
-            motions = []
-            for d in datasets:
-                motions += d.motions
-            dataset = ParliamentMotionDataset(motions=motions)
-            with open(dataset_file, "w") as file:
-                json.dump(dataset.model_dump(), file)
-
-        coroutines = [try_fill_motion(session, motion) for motion in dataset.motions]
-        results: List[Optional[ParliamentMotion]] = await tqdm.gather(*coroutines)
-
-        successes = 0
-        for k, result in enumerate(results):
+    Fills the motions that are not in the checkpoint yet, appending each to it as it completes, and compacts the
+    checkpoint into the dataset file. A fixed number of tasks (as many as the parse pool admits at once) take the
+    motions one by one from a shared iterator, so only the motions in flight are held as tasks and results.
+    """
+    checkpoint = checkpoint if checkpoint is not None else MotionCheckpoint()
+    done = checkpoint.offsets().keys()
+
+    def pending_motions() -> Iterator[ParliamentMotionLocator]:
+        return (m for m in dataset.motions if isinstance(m, ParliamentMotionLocator) and m.id not in done)
+
+    pending = sum(1 for _ in pending_motions())
+    print(f"Resuming with {len(done)} motions from the checkpoint, {pending} left to fill")
+
+    motions = pending_motions()
+    progress = tqdm(total=pending)
+    successes = 0
+
+    async def fill_next() -> None:
+        nonlocal successes
+        # Safe to share: the iterator is only advanced between awaits, by one task at a time
+        for motion in motions:
+            result = await try_fill_motion(scheduler, pool, motion)
             if result is not None:
                 successes += 1
-                dataset.motions[k] = result
+                checkpoint.append(result)
+            progress.update()
 
-        print(f"Success: {successes}/{len(results)} ({successes / len(results) * 100:.1f}%)")
+    try:
+        await asyncio.gather(*(fill_next() for _ in range(min(pool.max_pending, pending))))
+    finally:
+        progress.close()
+        checkpoint.close()
 
-        with open(dataset_file, "w") as file:
-            json.dump(dataset.model_dump(), file)
+    if pending:
+        print(f"Success: {successes}/{pending} ({successes / pending * 100:.1f}%)")
 
-    return dataset
+    filled = checkpoint.compact(dataset, dataset_file)
+    print(f"Compacted {filled} motions from the checkpoint into {dataset_file.name}")
+    return StreamCounts(attempted=pending, filled=successes, compacted=filled)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Scrape the parliament website for motions and their votes.")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help=f"Checkpoint every filled motion to {CHECKPOINT_FILE.name} and resume from it after a crash.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.SCRAPE_WORKERS,
+        help="Maximum number of requests in flight.",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=settings.SCRAPE_RATE_LIMIT,
+        help="Maximum number of requests per second (0 for unlimited).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"Do not use the HTTP response cache in {settings.SCRAPE_CACHE_DIR}.",
+    )
+    parser.add_argument(
+        "--refresh-older-than",
+        type=parse_duration,
+        default=None,
+        help="Serve cached pages fetched more recently than this (e.g. 12h, 7d) without revalidating them.",
+    )
+    parser.add_argument(
+        "--parse-processes",
+        type=int,
+        default=settings.SCRAPE_PARSE_PROCESSES,
+        help="Number of worker processes parsing pages (0 to parse on the event loop).",
+    )
+    args = parser.parse_args()
+
+    response_cache = None
+    if not args.no_cache:
+        response_cache = ResponseCache(
+            directory=settings.SCRAPE_CACHE_DIR,
+            max_bytes=settings.SCRAPE_CACHE_MAX_MB * 1024 * 1024,
+            refresh_older_than=args.refresh_older_than,
+        )
+    asyncio.run(main(
+        stream=args.stream,
+        workers=args.workers,
+        rate_limit=args.rate_limit,
+        cache=response_cache,
+        parse_processes=args.parse_processes,
+    ))
@@ -0,0 +1,120 @@
+"""
+Adds newly filled motions to the pair counts and the vote store saved by `run/generate_matrix.py`, writes matrix.json
+from the updated counts and compiles the data bundle the API serves (`run/build_bundle.py`), so a running API picks the
+new matrix up with its next reload.
+
+Usage (from the Backend directory):
+    python -m run.update_matrix --motions data/dataset.checkpoint.jsonl --check
+    python -m run.update_matrix --no-bundle  # leaves bundle.bin as it is
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from src.api.schemas import parties
+from src.data.bundle import BUNDLE_FILE, build_bundle
+from src.data.counts import COUNTS_FILE, MatrixCounts
+from src.data.votes import DATASET_FILE, VOTES_FILE, VoteStore, motion_frames
+
+DATA_DIR: Path = Path(__file__).parent.parent / "data"
+MATRIX_FILE: Path = DATA_DIR / "matrix.json"
+
+
+def read_motions(path: Path) -> List[dict]:
+    """
+    Reads motions from a dataset file, or from a JSON lines file with one motion per line such as the scrape
+    checkpoint.
+    """
+    text = path.read_text(encoding="utf-8")
+    if path.suffix == ".jsonl":
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    return json.loads(text)["motions"]
+
+
+def check(counts: MatrixCounts, store: VoteStore, motions_file: Path, dataset_file: Path = DATASET_FILE) -> bool:
+    """
+    Compares the counts, the matrix and the vote store with a full rebuild, as by `run/generate_matrix.py`, over the
+    same motions: those of `dataset_file` the counts were first built from, followed by those of `motions_file`, each
+    motion taken from the file it appears in first.
+    """
+    motions = read_motions(dataset_file)
+    if motions_file.resolve() != dataset_file.resolve():
+        motions += read_motions(motions_file)
+    votes, seats, splits = motion_frames(motions)
+    first = ~votes.index.duplicated(keep="first")
+    rebuilt_store = VoteStore.from_frame(votes[first], parties, seats[first], splits)
+    rebuilt = MatrixCounts.from_store(rebuilt_store)
+    differences = counts.differences(rebuilt)
+    if not counts.similarity().equals(rebuilt.similarity()):
+        differences.append("matrix differs")
+    if not store.to_frame().equals(rebuilt_store.to_frame()):
+        differences.append("vote store differs")
+    for difference in differences:
+        print(f"Mismatch with full rebuild: {difference}", file=sys.stderr)
+    if not differences:
+        print(f"Consistent with full rebuild over {len(rebuilt.ids)} motions")
+    return not differences
+
+
+def main(
+    motions_file: Path,
+    run_check: bool,
+    dataset_file: Path = DATASET_FILE,
+    bundle_file: Optional[Path] = BUNDLE_FILE,
+) -> int:
+    """
+    Adds the filled motions in `motions_file` that are not counted yet to the pair counts and the vote store saved by
+    `run/generate_matrix.py`, and writes matrix.json from the updated counts. Unless `bundle_file` is None, the data
+    bundle is then compiled again, from matrix.json and the party disagreements next to it.
+    """
+    for path in (COUNTS_FILE, VOTES_FILE):
+        if not path.exists():
+            print(f"{path} does not exist, run `python -m run.generate_matrix` first", file=sys.stderr)
+            return 1
+    counts = MatrixCounts.load()
+    store = VoteStore.open()
+    if counts.parties != parties or store.encoded.parties != parties:
+        print("The parties changed since the counts were built, run `python -m run.generate_matrix`", file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    votes, seats, splits = motion_frames(read_motions(motions_file))
+    new = ~votes.index.isin(counts.ids) & ~votes.index.duplicated(keep="first")
+    counts, added = counts.update(votes[new])
+    if added:
+        store = store.append(VoteStore.from_frame(votes[new], parties, seats[new], splits))
+        store.save()
+        counts.save()
+        counts.similarity().to_json(MATRIX_FILE)
+    print(f"Added {added} motions ({len(counts.ids)} in total) in {time.perf_counter() - start:.2f}s")
+    if added and bundle_file is not None:
+        bundle = build_bundle(MATRIX_FILE.parent, bundle_file)
+        print(f"Wrote {bundle_file} (version {bundle.version[:12]})")
+
+    if run_check and not check(counts, store, motions_file, dataset_file):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--motions",
+        type=Path,
+        default=DATASET_FILE,
+        help="Dataset (.json) or JSON lines (.jsonl, e.g. the scrape checkpoint) file with the new motions; motions "
+        "that are already counted are skipped",
+    )
+    parser.add_argument("--check", action="store_true", help="Verify the result against a full rebuild")
+    parser.add_argument(
+        "--dataset",
+        type=Path,
+        default=DATASET_FILE,
+        help="Dataset the counts were generated from, which --check rebuilds over together with --motions",
+    )
+    parser.add_argument("--no-bundle", action="store_true", help=f"Do not compile {BUNDLE_FILE.name} again")
+    args = parser.parse_args()
+    sys.exit(main(args.motions, args.check, args.dataset, None if args.no_bundle else BUNDLE_FILE))
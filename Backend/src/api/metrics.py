@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+A small in-process metrics registry rendered in the Prometheus text exposition format.
+
+Metrics are updated without locking, so an observation is a dict lookup plus a few additions. The request metrics are
+only updated on the event loop thread, by the middleware. The data load metrics are also set from the thread that loads
+the first snapshot (see `SnapshotManager`), but never concurrently: a reload only starts once the first load is done.
+"""
+import bisect
+import math
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+from src.logging import LOGGING
+
+M = TypeVar("M", bound="Metric")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets in seconds. Most responses are prepared bytes, so the resolution is concentrated below 10ms
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """
+    A value that only goes up. Without labels it may instead be read on every scrape through `function`, for counts
+    that are already kept elsewhere.
+    """
+
+    kind = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        function: Optional[Callable[[], float]] = None,
+    ):
+        super().__init__(name, documentation, labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+        self.function = function
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def samples(self) -> List[str]:
+        if self.function is not None:
+            self.values[()] = self.function()
+        return [
+            f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+            for key, value in sorted(self.values.items())
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, *label_values: str) -> None:
+        self.values[label_values] = value
+
+    def dec(self, *label_values: str, amount: float = 1) -> None:
+        self.inc(*label_values, amount=-amount)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: the count per bucket (not cumulative, the last one is +Inf), the sum and the count
+        self.values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        counts = self.values.get(label_values)
+        if counts is None:
+            counts = self.values[label_values] = [0] * (len(self.buckets) + 3)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-2] += value
+        counts[-1] += 1
+
+    def samples(self) -> List[str]:
+        lines = []
+        bucket_labels = (*self.labels, "le")
+        for key, counts in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                labels = _format_labels(bucket_labels, (*key, _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(counts[-2])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(counts[-1])}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: M) -> M:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> bytes:
+        return ("\n".join(metric.render() for metric in self.metrics.values()) + "\n").encode("utf-8")
+
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.register(
+    Counter("http_requests_total", "HTTP requests by method, route and status code.", ["method", "route", "status"])
+)
+REQUEST_DURATION = REGISTRY.register(
+    Histogram("http_request_duration_seconds", "HTTP request latency by method and route.", ["method", "route"])
+)
+IN_FLIGHT = REGISTRY.register(Gauge("http_requests_in_flight", "HTTP requests currently being served."))
+
+DATA_LOAD_SECONDS = REGISTRY.register(
+    Gauge("data_load_seconds", "Time spent loading the current data snapshot and preparing its responses.")
+)
+DATA_DISAGREEMENT_PAIRS = REGISTRY.register(
+    Gauge("data_disagreement_pairs", "Number of party pairs with disagreements loaded.")
+)
+DATA_BUNDLE_BYTES = REGISTRY.register(Gauge("data_bundle_bytes", "Size of the loaded data bundle in bytes."))
+DATA_SNAPSHOT = REGISTRY.register(Gauge("data_snapshot_info", "The version of the data being served.", ["version"]))
+DATA_RELOADS = REGISTRY.register(Counter("data_reloads_total", "Data snapshots loaded after startup."))
+
+LOG_RECORDS_WRITTEN = REGISTRY.register(
+    Counter("log_records_written_total", "Log records written.", function=lambda: LOGGING.stats()["written"])
+)
+LOG_RECORDS_DROPPED = REGISTRY.register(
+    Counter(
+        "log_records_dropped_total",
+        "Log records dropped because the log queue was full.",
+        function=lambda: LOGGING.stats()["dropped_queue_full"],
+    )
+)
+LOG_RECORDS_SAMPLED_OUT = REGISTRY.register(
+    Counter(
+        "log_records_sampled_out_total",
+        "Log records dropped by event sampling.",
+        function=lambda: LOGGING.stats()["dropped_sampled"],
+    )
+)
+
+
+def record_data_load(seconds: float, disagreement_pairs: int, bundle_bytes: int, version: str) -> None:
+    if DATA_SNAPSHOT.values:
+        DATA_RELOADS.inc()
+    DATA_LOAD_SECONDS.set(seconds)
+    DATA_DISAGREEMENT_PAIRS.set(disagreement_pairs)
+    DATA_BUNDLE_BYTES.set(bundle_bytes)
+    DATA_SNAPSHOT.values.clear()
+    DATA_SNAPSHOT.set(1, version)
@@ -1,13 +1,17 @@
 # -*- coding: utf-8 -*-
-from typing import Callable
+import hashlib
+import hmac
+import os
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
 
 from fastapi import FastAPI
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import JSONResponse, Response
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 
+from src.config import parse_list, settings
 from src.logging import logger
-from src.config import settings
 
 
 def setup_auth_middleware(app: FastAPI) -> None:
@@ -20,12 +24,106 @@ def setup_auth_middleware(app: FastAPI) -> None:
         )
 
 
-class AuthMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        auth_header = request.headers.get("Authorization")
+def _digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+class TokenSet:
+    """
+    The accepted bearer tokens, held as sha256 digests and compared in constant time. When the tokens come from a file
+    (`AUTH_TOKENS_FILE`), the file is checked for changes at most every `reload_interval` seconds and reloaded without
+    a restart.
+    """
+
+    def __init__(self, tokens: Iterable[str], path: Optional[Path] = None, reload_interval: float = 5.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.allow_any = False
+        self._digests: Tuple[bytes, ...] = ()
+        self._file_state: Optional[Tuple[int, int]] = None
+        self._next_check = time.monotonic() + reload_interval
+        self._set_tokens(tokens)
+        if path is not None:
+            self._file_state = self._stat()
+
+    @classmethod
+    def from_settings(cls) -> "TokenSet":
+        return cls(settings.AUTH_TOKENS, path=settings.AUTH_TOKENS_FILE)
+
+    def _set_tokens(self, tokens: Iterable[str]) -> None:
+        tokens = list(tokens)
+        self.allow_any = "*" in tokens
+        self._digests = tuple(_digest(token) for token in tokens if token != "*")
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def maybe_reload(self) -> None:
+        if self.path is None or time.monotonic() < self._next_check:
+            return
+        self._next_check = time.monotonic() + self.reload_interval
+        state = self._stat()
+        if state is None or state == self._file_state:
+            return
+        try:
+            text = self.path.read_text()
+        except OSError as e:
+            # Replaced between the stat and the read: keep the current tokens and try again at the next check
+            logger.error("auth_tokens_reload_failed", path=str(self.path), reason=repr(e))
+            return
+        self._file_state = state
+        tokens: List[str] = [token for token in parse_list(text.strip()) if token]
+        if not tokens:
+            # Most likely caught while being rewritten (truncated first). An empty file never means "accept anything",
+            # only an explicit "*" does, so keep the current tokens until the file has some again.
+            logger.error("auth_tokens_reload_failed", path=str(self.path), reason="no tokens in the file")
+            return
+        self._set_tokens(tokens)
+        logger.info("auth_tokens_reloaded", path=str(self.path), tokens=len(self._digests))
+
+    def accepts(self, token: str) -> bool:
+        self.maybe_reload()
+        if self.allow_any:
+            return True
+        digest = _digest(token)
+        # Compare against every token without short-circuiting, so timing reveals nothing about which one matched
+        match = False
+        for candidate in self._digests:
+            match |= hmac.compare_digest(candidate, digest)
+        return match
+
+
+class AuthMiddleware:
+    """
+    Pure ASGI bearer token check. It reads the Authorization header straight from the connection scope and either
+    rejects the request or hands it to the app untouched, so responses (including streaming ones) pass through without
+    being wrapped.
+    """
+
+    def __init__(self, app: ASGIApp, tokens: Optional[TokenSet] = None):
+        self.app = app
+        self.tokens = tokens if tokens is not None else TokenSet.from_settings()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        auth_header = None
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                auth_header = value.decode("latin-1")
+                break
+
         if not auth_header or not auth_header.startswith("Bearer "):
-            return JSONResponse(status_code=401, content="Unauthorized")
+            await JSONResponse(status_code=401, content="Unauthorized")(scope, receive, send)
+            return
         token = auth_header[len("Bearer ") :].strip()
-        if "*" not in settings.AUTH_TOKENS and token not in settings.AUTH_TOKENS:
-            return JSONResponse(status_code=401, content="Unauthorized")
-        return await call_next(request)
+        if not self.tokens.accepts(token):
+            await JSONResponse(status_code=401, content="Unauthorized")(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+import time
+
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.api.metrics import IN_FLIGHT, REQUEST_DURATION, REQUESTS
+from src.config import settings
+
+# Route label for requests that did not reach a route (404s, and requests rejected by the auth middleware)
+UNMATCHED_ROUTE = "unmatched"
+
+
+def setup_metrics_middleware(app: FastAPI) -> None:
+    if settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware that records the latency, status code and in-flight count of every HTTP request. Requests are
+    labelled by the path of the route they matched (e.g. `/api/v1/votes/disagreements`), or by `UNMATCHED_ROUTE`,
+    rather than by the raw path, so requests for arbitrary paths cannot add series.
+
+    Add it last, so it is the outermost middleware and also sees the requests the auth middleware rejects.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            IN_FLIGHT.dec()
+            # The router stores the matched route in the scope, which is shared with the app
+            route = scope.get("route")
+            route_path = route.path if route is not None else UNMATCHED_ROUTE
+            method = scope["method"]
+            REQUEST_DURATION.observe(duration, method, route_path)
+            REQUESTS.inc(method, route_path, str(status))
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+from typing import Dict, List, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from src.config import settings
+from src.data.compression import Body, compress
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """
+    Parses an Accept-Encoding header into a mapping of coding to q-value.
+    """
+    codings: Dict[str, float] = {}
+    if not header:
+        return codings
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings[coding.strip().lower()] = q
+    return codings
+
+
+def etag_matches(if_none_match: str, etags: List[str]) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return any(etag in candidates for etag in etags)
+
+
+class PreparedResponse:
+    """
+    A response body rendered to bytes once, together with its precompressed variants and a strong ETag per variant.
+    `to_response` picks the variant for the request's Accept-Encoding, and answers a matching If-None-Match with 304.
+    `headers` are added to every response. Given `compressed` variants are served instead of compressing `body`.
+    """
+
+    def __init__(
+        self,
+        body: Body,
+        digest: str,
+        media_type: str = "application/json",
+        headers: Optional[Dict[str, str]] = None,
+        compressed: Optional[Dict[str, Body]] = None,
+    ):
+        self.media_type = media_type
+        self.headers: Dict[str, str] = dict(headers or {})
+        self.variants: Dict[str, Body] = {"identity": body}
+        self.variants.update(compress(body) if compressed is None else compressed)
+        self.etags: Dict[str, str] = {
+            coding: f'"{digest[:32]}"' if coding == "identity" else f'"{digest[:32]}-{coding}"'
+            for coding in self.variants
+        }
+
+    def choose_encoding(self, accept_encoding: Optional[str]) -> str:
+        accepted = parse_accept_encoding(accept_encoding)
+        wildcard = accepted.get("*", 0.0)
+        for coding in ("br", "gzip"):
+            if coding in self.variants and accepted.get(coding, wildcard) > 0:
+                return coding
+        return "identity"
+
+    def to_response(self, request: Request) -> Response:
+        coding = self.choose_encoding(request.headers.get("accept-encoding"))
+        headers = {
+            "ETag": self.etags[coding],
+            "Cache-Control": settings.CACHE_CONTROL,
+            "Vary": "Accept-Encoding",
+            **self.headers,
+        }
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None and etag_matches(if_none_match, list(self.etags.values())):
+            return Response(status_code=304, headers=headers)
+
+        if coding != "identity":
+            headers["Content-Encoding"] = coding
+        return Response(content=self.variants[coding], media_type=self.media_type, headers=headers)
@@ -1,4 +1,59 @@
-from typing import Literal, List
+import re
+from typing import Dict, Literal, List, Optional
 
 PartyType = Literal["DENK", "SP", "PvdD", "GroenLinks-PvdA", "Volt", "D66", "ChristenUnie", "NSC", "CDA", "SGP", "VVD", "BBB", "JA21", "PVV", "FVD"]
 parties: List[PartyType] = ["DENK", "SP", "PvdD", "GroenLinks-PvdA", "Volt", "D66", "ChristenUnie", "NSC", "CDA", "SGP", "VVD", "BBB", "JA21", "PVV", "FVD"]
+
+# Other names clients use for the parties: abbreviations, full names and common spellings. Case, whitespace and
+# punctuation do not matter, see `normalize_party_name`.
+party_aliases: Dict[str, PartyType] = {
+    "GL-PvdA": "GroenLinks-PvdA",
+    "GL/PvdA": "GroenLinks-PvdA",
+    "PvdA-GL": "GroenLinks-PvdA",
+    "GroenLinks PvdA": "GroenLinks-PvdA",
+    "GroenLinks/Partij van de Arbeid": "GroenLinks-PvdA",
+    "CU": "ChristenUnie",
+    "Christen Unie": "ChristenUnie",
+    "Partij voor de Dieren": "PvdD",
+    "Socialistische Partij": "SP",
+    "Democraten 66": "D66",
+    "Nieuw Sociaal Contract": "NSC",
+    "Christen-Democratisch Appèl": "CDA",
+    "Christen-Democratisch Appel": "CDA",
+    "Staatkundig Gereformeerde Partij": "SGP",
+    "Volkspartij voor Vrijheid en Democratie": "VVD",
+    "BoerBurgerBeweging": "BBB",
+    "Partij voor de Vrijheid": "PVV",
+    "Forum voor Democratie": "FVD",
+    "JA 21": "JA21",
+}
+
+_PUNCTUATION = re.compile(r"[\s\-_/.,&]+")
+
+
+def normalize_party_name(name: str) -> str:
+    return _PUNCTUATION.sub("", name.casefold())
+
+
+def _build_party_lookup() -> Dict[str, int]:
+    lookup: Dict[str, int] = {}
+    for name, canonical in [*((party, party) for party in parties), *party_aliases.items()]:
+        index = parties.index(canonical)
+        # Store the raw spelling too, so the common case is a single dict lookup without normalizing
+        for key in (name, name.lower(), normalize_party_name(name)):
+            lookup[key] = index
+    return lookup
+
+
+party_lookup: Dict[str, int] = _build_party_lookup()
+
+
+def party_index(name: str) -> Optional[int]:
+    """
+    Resolves a party name or alias to its position in `parties`, or None if it is not a known party.
+    """
+    index = party_lookup.get(name)
+    if index is None:
+        index = party_lookup.get(normalize_party_name(name))
+    return index
+
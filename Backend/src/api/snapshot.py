@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import datetime
+import functools
+import hashlib
+import itertools
+import json
+import mmap
+import os
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from src.api.metrics import record_data_load
+from src.api.responses import PreparedResponse
+from src.api.schemas import parties
+from src.api.v1.votes.schemas import MatrixMode, VoteMatrix
+from src.config import settings
+from src.data.bundle import BUNDLE_FILE, DATA_DIR, MATRIX_KEY, DataBundle, disagreements_key, load_bundle
+from src.logging import logger
+
+# The vote store and what is built from it need numpy and pandas, which are only imported once they are first used
+if TYPE_CHECKING:
+    from src.data.search import SearchIndex
+    from src.data.votes import VoteStore
+    from src.data.windows import WindowedCounts
+
+# Response header naming the snapshot a response was served from
+VERSION_HEADER = "X-Data-Version"
+
+# The same file as `src.data.votes.VOTES_FILE`, named here so importing this module does not import numpy and pandas
+VOTES_FILE: Path = DATA_DIR / "votes.bin"
+
+
+def prepare_entry(bundle: DataBundle, key: str, headers: Dict[str, str]) -> PreparedResponse:
+    """
+    Serves the entry straight from the bundle: the body and the compressed variants stored with it are views into the
+    memory-mapped file, so they are neither copied nor compressed, and every worker that maps the same file shares
+    their pages. Entries of a bundle without stored variants are compressed here.
+    """
+    variants = bundle.variants(key)
+    body = variants.pop("identity")
+    return PreparedResponse(body, bundle.digest(key), headers=headers, compressed=variants or None)
+
+
+def build_disagreements_table(bundle: DataBundle, headers: Dict[str, str]) -> List[List[Optional[PreparedResponse]]]:
+    """
+    table[i][j] holds the disagreements between parties[i] and parties[j] (None if there are none), so a request is
+    answered with two dict lookups for the party names and one table lookup.
+    """
+    table: List[List[Optional[PreparedResponse]]] = [[None] * len(parties) for _ in parties]
+    for i, j in itertools.combinations(range(len(parties)), 2):
+        key = disagreements_key(parties[i], parties[j])
+        if key in bundle:
+            table[i][j] = table[j][i] = prepare_entry(bundle, key, headers)
+    return table
+
+
+def build_pair_fragments(bundle: DataBundle) -> List[List[Optional[bytes]]]:
+    """
+    fragments[i][j] is the serialized `PartyPairDisagreements` for parties[i] and parties[j], from which the batch
+    endpoint assembles its response without serializing anything per request.
+    """
+    fragments: List[List[Optional[bytes]]] = [[None] * len(parties) for _ in parties]
+    for i, j in itertools.combinations(range(len(parties)), 2):
+        key = disagreements_key(parties[i], parties[j])
+        if key in bundle:
+            party_a, party_b = sorted([parties[i], parties[j]])
+            prefix = f'{{"party_a":{json.dumps(party_a)},"party_b":{json.dumps(party_b)},"disagreements":'
+            fragments[i][j] = fragments[j][i] = prefix.encode("utf-8") + bundle.read(key) + b"}"
+    return fragments
+
+
+class Snapshot:
+    """
+    Everything the API serves from one version of the data: the bundle with every response body prepared from it, and
+    the vote store file. Nothing in a snapshot changes after it is built; new data means a new snapshot, so a request
+    that holds one sees consistent data however long it takes.
+
+    The vote store, and the windowed counts and search index built from it, are loaded on first use, from the file as
+    it was mapped when the snapshot was built. The filtered matrices are cached per snapshot, so they never outlive the
+    data they were computed from.
+    """
+
+    def __init__(
+        self, bundle: DataBundle, votes_buffer: Optional[mmap.mmap], version: str, votes_path: Path = VOTES_FILE
+    ):
+        self.bundle = bundle
+        self.votes_buffer = votes_buffer
+        self.votes_path = votes_path
+        self.version = version
+        self.loaded_at = datetime.datetime.now(datetime.timezone.utc)
+        self.headers = {VERSION_HEADER: version}
+        # The bundle holds validated JSON, so every response body is served as-is from it
+        self.matrix = prepare_entry(bundle, MATRIX_KEY, self.headers)
+        self.disagreements = build_disagreements_table(bundle, self.headers)
+        self.fragments = build_pair_fragments(bundle)
+        # The cache reaches the snapshot through a weak reference: caching the bound method would make a reference
+        # cycle, which only the cyclic collector frees, and not at all once the server has frozen the heap
+        windowed_matrix = functools.partial(Snapshot._windowed_matrix, weakref.proxy(self))
+        self.windowed_matrix = functools.lru_cache(maxsize=settings.MATRIX_CACHE_SIZE)(windowed_matrix)
+
+    @classmethod
+    def load(cls, bundle_path: Path = BUNDLE_FILE, votes_path: Path = VOTES_FILE) -> "Snapshot":
+        """
+        Opens the bundle and maps the vote store file. The bundle version already is a digest of its content; the vote
+        store file is small enough to hash whole. Without a vote store file, the store is built from the dataset when
+        it is first used and the version only covers the bundle.
+        """
+        bundle = load_bundle(bundle_path)
+        votes_buffer = None
+        votes_digest = ""
+        if votes_path.exists():
+            with open(votes_path, "rb") as f:
+                votes_buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            votes_digest = hashlib.sha256(votes_buffer).hexdigest()
+        version = hashlib.sha256(f"{bundle.version}:{votes_digest}".encode("ascii")).hexdigest()[:16]
+        return cls(bundle, votes_buffer, version, votes_path)
+
+    @property
+    def disagreement_pairs(self) -> int:
+        return sum(response is not None for row in self.disagreements for response in row) // 2
+
+    @functools.cached_property
+    def store(self) -> "VoteStore":
+        from src.data.votes import load_vote_store
+
+        return load_vote_store(parties, self.votes_path, buffer=self.votes_buffer)
+
+    @functools.cached_property
+    def windows(self) -> "WindowedCounts":
+        from src.data.windows import WindowedCounts
+
+        return WindowedCounts(self.store)
+
+    @functools.cached_property
+    def search_index(self) -> "SearchIndex":
+        from src.data.search import SearchIndex
+
+        return SearchIndex(self.store.titles)
+
+    def _windowed_matrix(
+        self, date_from: Optional[datetime.date], date_to: Optional[datetime.date], q: Optional[str], mode: MatrixMode
+    ) -> Optional[PreparedResponse]:
+        """
+        The vote matrix of `mode` over the motions in a date range whose title matches `q`, which must already be
+        normalized so equivalent queries share a cache entry. None when no motion is selected, as there is nothing to
+        compare then.
+        """
+        from src.data.modes import mode_similarity
+
+        counts = self.windows.counts(date_from, date_to, q)
+        if not counts[self.windows.layout.index("present")].any():
+            return None
+        matrix = VoteMatrix.model_validate(mode_similarity(counts, self.windows.layout, mode, parties).to_dict())
+        body = matrix.model_dump_json(by_alias=True).encode("utf-8")
+        return PreparedResponse(body, hashlib.sha256(body).hexdigest(), headers=self.headers)
+
+    def warm_like(self, other: "Snapshot") -> None:
+        """
+        Builds the lazily built parts that `other` has already built, so swapping this snapshot in for `other` does not
+        move their cost onto the next requests.
+        """
+        for name in ("store", "windows", "search_index"):
+            if name in other.__dict__:
+                getattr(self, name)
+        if "windows" in other.__dict__ and "title_words" in other.windows.__dict__:
+            self.windows.title_words
+
+
+# The (inode, mtime, size) of each data file, None for a missing one
+FileStates = Tuple[Optional[Tuple[int, int, int]], ...]
+
+
+def _file_state(path: Path) -> Optional[Tuple[int, int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+class SnapshotManager:
+    """
+    Holds the current `Snapshot`. Requests read `current` once and use that snapshot throughout. A reload builds the
+    next snapshot in a worker thread and swaps it in with a single assignment, so requests are never blocked by it and
+    never see a half-built one.
+
+    Nothing is loaded when the manager is created: the app's lifespan loads the first snapshot in a worker thread, or
+    else the first request that reads `current` does.
+
+    `watch` polls the data files every `interval` seconds and reloads once a change has stayed the same for a full
+    interval, so a file that is still being replaced is not picked up halfway. The generation scripts write their
+    files atomically, so this mostly spaces out the reloads of a refresh that replaces several files.
+
+    Under the pre-forking server (`src.server`) the parent process does the watching and reloading, with `poll` and
+    `reload_now`, and replaces its workers so they all serve the new snapshot from shared pages. `reloads_in_parent`
+    tells the workers to leave it to the parent.
+    """
+
+    def __init__(self, bundle_path: Path = BUNDLE_FILE, votes_path: Path = VOTES_FILE):
+        self.bundle_path = bundle_path
+        self.votes_path = votes_path
+        # Filtered matrix cache counts of the snapshots that were swapped out, so the totals only go up
+        self.retired_cache_hits = 0
+        self.retired_cache_misses = 0
+        self._lock: Optional[asyncio.Lock] = None
+        self._first_load = threading.Lock()
+        self._file_states: FileStates = (None, None)
+        self._current: Optional[Snapshot] = None
+        self.reloads_in_parent = False
+
+    @property
+    def loaded(self) -> bool:
+        return self._current is not None
+
+    @property
+    def current(self) -> Snapshot:
+        snapshot = self._current
+        if snapshot is None:
+            snapshot = self._load_first()
+        return snapshot
+
+    def _load_first(self) -> Snapshot:
+        with self._first_load:
+            if self._current is None:
+                self._file_states = self._stat()
+                start = time.perf_counter()
+                snapshot = Snapshot.load(self.bundle_path, self.votes_path)
+                self._record(snapshot, time.perf_counter() - start)
+                self._current = snapshot
+        return self._current
+
+    async def load(self) -> Snapshot:
+        """
+        Loads the first snapshot without blocking the event loop, if no request has loaded it yet.
+        """
+        if self._current is not None:
+            return self._current
+        return await asyncio.to_thread(self._load_first)
+
+    def _stat(self) -> FileStates:
+        return _file_state(self.bundle_path), _file_state(self.votes_path)
+
+    def _record(self, snapshot: Snapshot, seconds: float) -> None:
+        record_data_load(
+            seconds=seconds,
+            disagreement_pairs=snapshot.disagreement_pairs,
+            bundle_bytes=snapshot.bundle.size,
+            version=snapshot.version,
+        )
+
+    def matrix_cache_hits(self) -> int:
+        current = self._current.windowed_matrix.cache_info().hits if self._current is not None else 0
+        return self.retired_cache_hits + current
+
+    def matrix_cache_misses(self) -> int:
+        current = self._current.windowed_matrix.cache_info().misses if self._current is not None else 0
+        return self.retired_cache_misses + current
+
+    def _build(self, previous: Snapshot) -> Snapshot:
+        snapshot = Snapshot.load(self.bundle_path, self.votes_path)
+        if snapshot.version != previous.version:
+            snapshot.warm_like(previous)
+        return snapshot
+
+    async def reload(self) -> bool:
+        """
+        Loads the data files into a new snapshot and swaps it in if its version differs from the current one. Returns
+        whether it did. Concurrent calls are serialized, so a second one waits for the first and then checks again.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            previous = await self.load()
+            self._file_states = self._stat()
+            start = time.perf_counter()
+            snapshot = await asyncio.to_thread(self._build, previous)
+            return self._swap(previous, snapshot, time.perf_counter() - start)
+
+    def reload_now(self) -> bool:
+        """
+        `reload` for a process without an event loop that serves no requests itself: the pre-forking server's parent.
+        """
+        previous = self.current
+        self._file_states = self._stat()
+        start = time.perf_counter()
+        snapshot = self._build(previous)
+        return self._swap(previous, snapshot, time.perf_counter() - start)
+
+    def _swap(self, previous: Snapshot, snapshot: Snapshot, seconds: float) -> bool:
+        if snapshot.version == previous.version:
+            return False
+        info = previous.windowed_matrix.cache_info()
+        self.retired_cache_hits += info.hits
+        self.retired_cache_misses += info.misses
+        self._current = snapshot
+        self._record(snapshot, seconds)
+        logger.info(
+            "data_snapshot_reloaded",
+            previous_version=previous.version,
+            version=snapshot.version,
+            seconds=round(seconds, 3),
+        )
+        return True
+
+    def poll(self, pending: Optional[FileStates]) -> Tuple[bool, Optional[FileStates]]:
+        """
+        One poll of the data files: whether they changed and have stayed the same since the previous poll (so it is
+        time to reload), and the change to check again at the next poll, if any.
+        """
+        states = self._stat()
+        if states == self._file_states:
+            return False, None
+        if states != pending:
+            # Changed since the last poll; wait for it to settle
+            return False, states
+        return True, None
+
+    async def watch(self, interval: float) -> None:
+        pending: Optional[FileStates] = None
+        while True:
+            await asyncio.sleep(interval)
+            due, pending = self.poll(pending)
+            if not due:
+                continue
+            try:
+                await self.reload()
+            except Exception as e:
+                # Keep serving the current snapshot; the files were marked as seen before the build, so only the next
+                # change to them is tried again
+                logger.error("data_snapshot_reload_failed", error=repr(e))
@@ -1,60 +1,217 @@
 # -*- coding: utf-8 -*-
-from pathlib import Path
-from typing import Dict
+import datetime
+import hashlib
+from enum import Enum
+from typing import Iterator, List, Optional, Tuple
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 
-from src.api.schemas import parties
-from src.api.v1.votes.schemas import VoteMatrix, Disagreements
+from src.api.metrics import REGISTRY, Counter
+from src.api.responses import etag_matches
+from src.api.schemas import parties, party_index
+from src.api.snapshot import Snapshot, SnapshotManager
+from src.api.v1.votes.schemas import (
+    MatrixMode,
+    VoteMatrix,
+    Disagreements,
+    MotionSearchHit,
+    MotionSearchResults,
+    PartyPairDisagreementsData,
+)
+from src.config import settings
+from src.data.query import normalize_query
 from src.logging import logger
 
-DATA_DIR: Path = Path(__file__).parent.parent.parent.parent.parent / "data"
-with open(DATA_DIR / "matrix.json", "r") as f:
-    MATRIX_DATA = VoteMatrix.model_validate_json(f.read())
-
-DISAGREEMENTS_CACHE: Dict[str, Disagreements] = {}
-for cache_file in (DATA_DIR / "party_disagreements").iterdir():
-    if cache_file.suffix != ".json":
-        continue
-    with open(cache_file, "rb") as f:
-        data = f.read()
-        for enc in ("utf-8", "latin-1", "cp1252"):
-            try:
-                text = data.decode(enc)
-                break
-            except UnicodeDecodeError:
-                continue
-        DISAGREEMENTS_CACHE[cache_file.stem] = Disagreements.model_validate_json(text)
+# The data being served, loaded in the app's lifespan. Handlers read `SNAPSHOTS.current` once per request, so a reload
+# never changes it under them
+SNAPSHOTS = SnapshotManager()
+
+REGISTRY.register(
+    Counter(
+        "matrix_cache_hits_total",
+        "Filtered vote matrices served from the cache.",
+        function=SNAPSHOTS.matrix_cache_hits,
+    )
+)
+REGISTRY.register(
+    Counter(
+        "matrix_cache_misses_total",
+        "Filtered vote matrices computed.",
+        function=SNAPSHOTS.matrix_cache_misses,
+    )
+)
 
 
 router = APIRouter()
 
 
 @router.get("/matrix", response_model=VoteMatrix)
-def get_vote_matrix() -> VoteMatrix:
-    logger.info("chats - get_vote_matrix")
-    return MATRIX_DATA
+def get_vote_matrix(
+    request: Request,
+    date_from: Optional[datetime.date] = Query(None, alias="from", description="Only motions on or after this date."),
+    date_to: Optional[datetime.date] = Query(None, alias="to", description="Only motions on or before this date."),
+    q: Optional[str] = Query(
+        None,
+        description="Only motions whose title contains all of these words. Case, accents and plural endings do not "
+        "matter, but only whole words match.",
+    ),
+    mode: MatrixMode = Query(
+        MatrixMode.AGREEMENT,
+        description="agreement (share of motions voted the same way), seats (share of seat pairs voting the same "
+        "way; close to agreement unless factions split their votes or change size), kappa (agreement corrected for "
+        "chance), or abstention (leaves out motions a party did not vote on and counts split votes per member).",
+    ),
+) -> Response:
+    """
+    Returns how similarly each pair of parties voted, in percent, over all motions or over the motions selected by
+    `from`, `to` and `q`. A bound within a year that has motions dated only by their year is rejected (422), and a
+    filter that selects no motions is a 404.
+    """
+    logger.info(
+        "get_vote_matrix",
+        date_from=date_from.isoformat() if date_from else None,
+        date_to=date_to.isoformat() if date_to else None,
+        q=q,
+        mode=mode.value,
+    )
+    snapshot = SNAPSHOTS.current
+    q = normalize_query(q)
+    if date_from is None and date_to is None and q is None and mode == MatrixMode.AGREEMENT:
+        return snapshot.matrix.to_response(request)
+    if date_from is not None and date_to is not None and date_from > date_to:
+        raise HTTPException(status_code=400, detail="from must not be after to")
+    unresolved = snapshot.windows.unresolved_bound(date_from, date_to)
+    if unresolved is not None:
+        raise HTTPException(
+            status_code=422,
+            detail=f"{unresolved.isoformat()} cannot be applied: some motions of {unresolved.year} are only dated by "
+            f"their year, so only whole years (from a 1 January, to a 31 December) can be selected in it",
+        )
+    response = snapshot.windowed_matrix(date_from, date_to, q, mode)
+    if response is None:
+        raise HTTPException(status_code=404, detail="No motions match the filter")
+    return response.to_response(request)
 
 
 @router.get("/disagreements", response_model=Disagreements)
-def get_disagreements(party_a: str, party_b: str) -> Disagreements:
-    logger.info(f"chats - get_disagreements ({party_a}, {party_b})")
-    try:
-        party_a = parties[list(map(lambda s: s.lower(), parties)).index(party_a.lower())]
-    except ValueError:
+def get_disagreements(request: Request, party_a: str, party_b: str) -> Response:
+    logger.info("get_disagreements", party_a=party_a, party_b=party_b)
+    index_a = party_index(party_a)
+    if index_a is None:
         raise HTTPException(status_code=400, detail=f"Invalid party name: {party_a}")
-    try:
-        party_b = parties[list(map(lambda s: s.lower(), parties)).index(party_b.lower())]
-    except ValueError:
+    index_b = party_index(party_b)
+    if index_b is None:
         raise HTTPException(status_code=400, detail=f"Invalid party name: {party_b}")
 
-    party_a, party_b = tuple(sorted([party_a, party_b]))
-
-    cache_key = f"disagreements_{party_a}_{party_b}"
-    if cache_key not in DISAGREEMENTS_CACHE:
+    response = SNAPSHOTS.current.disagreements[index_a][index_b]
+    if response is None:
+        party_a, party_b = sorted([parties[index_a], parties[index_b]])
         raise HTTPException(
             status_code=404,
             detail=f"No disagreements found for party pair {party_a} and {party_b}",
         )
 
-    return DISAGREEMENTS_CACHE[cache_key]
+    return response.to_response(request)
+
+
+class BatchFormat(str, Enum):
+    JSON = "json"
+    NDJSON = "ndjson"
+
+
+def resolve_party(name: str) -> int:
+    index = party_index(name)
+    if index is None:
+        raise HTTPException(status_code=400, detail=f"Invalid party name: {name}")
+    return index
+
+
+def resolve_batch_pairs(
+    snapshot: Snapshot, party: Optional[str], pairs: Optional[List[str]]
+) -> List[Tuple[int, int]]:
+    resolved: List[Tuple[int, int]] = []
+    if party is not None:
+        index = resolve_party(party)
+        resolved += [(index, other) for other in range(len(parties)) if other != index]
+    for pair in pairs or []:
+        names = pair.split(",")
+        if len(names) != 2:
+            raise HTTPException(status_code=400, detail=f"Invalid party pair: {pair}, expected party_a,party_b")
+        resolved.append((resolve_party(names[0]), resolve_party(names[1])))
+
+    seen = set()
+    unique: List[Tuple[int, int]] = []
+    for i, j in resolved:
+        key = (min(i, j), max(i, j))
+        if key not in seen and snapshot.fragments[i][j] is not None:
+            seen.add(key)
+            unique.append((i, j))
+    return unique
+
+
+@router.get("/disagreements/batch", response_model=PartyPairDisagreementsData)
+def get_disagreements_batch(
+    request: Request,
+    party: Optional[str] = Query(None, description="Return this party's disagreements with every other party."),
+    pairs: Optional[List[str]] = Query(None, description="Party pairs as party_a,party_b. Can be repeated."),
+    format: BatchFormat = Query(BatchFormat.JSON, description="json, or ndjson to stream one pair per line."),
+) -> Response:
+    """
+    Returns the disagreements for many party pairs in one response. Pairs without disagreements are left out.
+    """
+    logger.info("get_disagreements_batch", party=party, pairs=pairs)
+    if party is None and not pairs:
+        raise HTTPException(status_code=400, detail="Provide a party or at least one pair")
+
+    snapshot = SNAPSHOTS.current
+    selected = resolve_batch_pairs(snapshot, party, pairs)
+    digest = hashlib.sha256(b"".join(snapshot.disagreements[i][j].etags["identity"].encode() for i, j in selected))
+    headers = {
+        "ETag": f'"{digest.hexdigest()[:32]}-{format.value}"',
+        "Cache-Control": settings.CACHE_CONTROL,
+        **snapshot.headers,
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None and etag_matches(if_none_match, [headers["ETag"]]):
+        return Response(status_code=304, headers=headers)
+
+    if format == BatchFormat.NDJSON:
+        def lines() -> Iterator[bytes]:
+            for i, j in selected:
+                yield snapshot.fragments[i][j] + b"\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson", headers=headers)
+
+    body = b'{"data":[' + b",".join(snapshot.fragments[i][j] for i, j in selected) + b"]}"
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/motions/search", response_model=MotionSearchResults)
+def search_motions(
+    q: str = Query(..., min_length=1, description="Words to search for in the motion titles. Words also match as prefix."),
+    limit: int = Query(20, ge=1, le=100),
+) -> Response:
+    """
+    Returns the motions whose titles best match `q`, ranked with BM25, with how each party voted on them.
+    """
+    logger.info("search_motions", q=q, limit=limit)
+    snapshot = SNAPSHOTS.current
+    store = snapshot.store
+    total, hits = snapshot.search_index.search(q, limit)
+    results = MotionSearchResults(
+        query=q,
+        total=total,
+        results=[
+            MotionSearchHit(
+                id=store.ids[hit.doc],
+                url=store.urls[hit.doc],
+                title=store.titles[hit.doc],
+                score=round(hit.score, 4),
+                votes=store.motion_votes(hit.doc),
+            )
+            for hit in hits
+        ],
+    )
+    return Response(content=results.model_dump_json(), media_type="application/json", headers=snapshot.headers)
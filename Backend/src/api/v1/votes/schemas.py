@@ -1,9 +1,21 @@
 # -*- coding: utf-8 -*-
-from typing import List
+from enum import Enum
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
 
+class MatrixMode(str, Enum):
+    AGREEMENT = "agreement"  # Share of motions on which both parties cast the same (majority) vote
+    # Share of seat pairs of the two parties that voted the same way; only differs from agreement through split votes
+    # and changing seat counts (see `src.data.modes`)
+    SEATS = "seats"
+    KAPPA = "kappa"  # Cohen's kappa: agreement corrected for the agreement expected by chance, times 100
+    # Share of motions on which both voted the same way, leaving out motions where either did not take part and counting
+    # a split faction by the share of its members per vote
+    ABSTENTION = "abstention"
+
+
 class PartyVoteMapping(BaseModel):
     DENK: float
     PvdD: float
@@ -57,3 +69,17 @@ class PartyPairDisagreements(BaseModel):
 
 class PartyPairDisagreementsData(BaseModel):
     data: List[PartyPairDisagreements]
+
+
+class MotionSearchHit(BaseModel):
+    id: str
+    url: str
+    title: str
+    score: float
+    votes: Dict[str, Optional[str]] = Field(description="De stem van iedere partij, leeg als er geen stem is.")
+
+
+class MotionSearchResults(BaseModel):
+    query: str
+    total: int = Field(description="Het aantal gevonden moties.")
+    results: List[MotionSearchHit]
@@ -136,6 +136,9 @@ class Settings:
             env_value=get_secret_or_env("AUTH_TOKENS_FILE", "AUTH_TOKENS", default=""),
             default=["*"],
         )
+        # When set and the file exists, the auth middleware reloads the tokens whenever this file changes
+        tokens_file = Path(os.getenv("AUTH_TOKENS_FILE", ""))
+        self.AUTH_TOKENS_FILE = tokens_file if tokens_file.is_file() else None
         # By doing the auth-enabled flag this way, we enable auth by default (even with typos in configs), unless
         # specifically specified to be disabled.
         self.AUTH_ENABLED = os.getenv("AUTH_ENABLED", "true").lower() not in [
@@ -150,13 +153,56 @@ class Settings:
                 "WARNING: AUTH_ENABLED is set to false. Make sure this is intended, or set the env variable."
             )
 
+        # Cache-Control header for the prepared data responses. They are revalidated cheaply through their ETag. Behind
+        # authentication only the client may keep them, so shared caches (CDNs, proxies) serving them to anyone without
+        # a token take an explicit "public" here.
+        self.CACHE_CONTROL = os.getenv(
+            "CACHE_CONTROL",
+            "private, max-age=3600" if self.AUTH_ENABLED else "public, max-age=3600, stale-while-revalidate=86400",
+        )
+
         # Logging config
         self.LOG_DIR = Path(os.getenv("LOG_DIR", "logs"))
         self.LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
         self.LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # "json" or "console"
+        # Records waiting for the background writer; when full, new records are dropped rather than blocking
+        self.LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+        # Per-event sampling, e.g. "get_disagreements=0.01,get_vote_matrix=0.1". Unlisted events are always logged
+        self.LOG_SAMPLE_RATES = parse_list(os.getenv("LOG_SAMPLE_RATES"))
+
+        # Worker processes forked by `python -m src.server` after loading the data, so they share it
+        self.WEB_WORKERS = int(os.getenv("WEB_WORKERS", "1"))
+
+        # Seconds between checks of the data files for changes, which are then loaded without a restart. 0 disables
+        # the checks, leaving only the admin reload endpoint
+        self.DATA_RELOAD_INTERVAL = float(os.getenv("DATA_RELOAD_INTERVAL", "10"))
+        # Token for the admin endpoints, passed in the X-Admin-Token header. Without one they are not available
+        self.ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+        # Number of filtered vote matrices (/votes/matrix with from, to or q) kept in memory
+        self.MATRIX_CACHE_SIZE = int(os.getenv("MATRIX_CACHE_SIZE", "256"))
+
+        # Metrics, served in the Prometheus text format on /metrics
+        self.METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() not in ["false", "0", "f", "n", "no"]
 
         # Scraping
         self.USER_AGENT = os.getenv("USER_AGENT", "GestemdWijzer")
+        self.SCRAPE_WORKERS = int(os.getenv("SCRAPE_WORKERS", "8"))
+        self.SCRAPE_RATE_LIMIT = float(os.getenv("SCRAPE_RATE_LIMIT", "10"))  # Requests per second, 0 for unlimited
+        self.SCRAPE_RETRIES = int(os.getenv("SCRAPE_RETRIES", "4"))
+        self.SCRAPE_TIMEOUT = float(os.getenv("SCRAPE_TIMEOUT", "30"))  # Seconds per request
+        # Leave one core for the event loop; on a single core parsing inline is cheaper than a worker process
+        self.SCRAPE_PARSE_PROCESSES = int(os.getenv("SCRAPE_PARSE_PROCESSES", str(max(0, (os.cpu_count() or 1) - 1))))
+        self.SCRAPE_CACHE_DIR = Path(os.getenv("SCRAPE_CACHE_DIR", "data/http_cache"))
+        self.SCRAPE_CACHE_MAX_MB = int(os.getenv("SCRAPE_CACHE_MAX_MB", "1024"))
+
+        # Disagreements generation (run/generate_disagreements.py)
+        self.LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o")
+        self.LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))  # Calls in flight
+        self.LLM_RETRIES = int(os.getenv("LLM_RETRIES", "5"))
+        self.LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))  # Seconds per call
+        # Results by a hash of their inputs, so only the pairs whose disagreeing motions changed are regenerated
+        self.LLM_CACHE_DIR = Path(os.getenv("LLM_CACHE_DIR", "data/llm_cache"))
 
         self.apply_environment_settings()
 
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple, Union
+
+from src.api.v1.votes.schemas import Disagreements, VoteMatrix
+from src.data.compression import compress
+
+DATA_DIR: Path = Path(__file__).parent.parent.parent / "data"
+BUNDLE_FILE: Path = DATA_DIR / "bundle.bin"
+
+MATRIX_KEY = "matrix"
+DISAGREEMENTS_PREFIX = "disagreements_"
+
+# File layout: header, then the JSON index, then the entry bodies back to back. The index maps each key to the offset
+# (relative to the start of the bodies), length and sha256 of its body, and the offset and length of its compressed
+# variants by content coding. Version 1 bundles have no compressed variants.
+MAGIC = b"GWBUNDLE"
+FORMAT_VERSION = 2
+SUPPORTED_FORMAT_VERSIONS = (1, 2)
+HEADER = struct.Struct("<8sIQ")  # magic, format version, index length
+
+
+class BundleEntry(NamedTuple):
+    offset: int
+    length: int
+    digest: str
+    variants: Dict[str, Tuple[int, int]]  # (offset, length) by content coding, empty in version 1 bundles
+
+
+def disagreements_key(party_a: str, party_b: str) -> str:
+    party_a, party_b = sorted([party_a, party_b])
+    return f"{DISAGREEMENTS_PREFIX}{party_a}_{party_b}"
+
+
+class DataBundle:
+    """
+    Read-only, content-addressed container for all data the API serves: the vote matrix and every party pair's
+    disagreements, each stored as validated, canonical JSON. Opened from disk the file is memory-mapped, so entries are
+    only paged in when read.
+    """
+
+    def __init__(self, buffer: Union[bytes, mmap.mmap], path: Optional[Path] = None):
+        magic, format_version, index_length = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a data bundle: {path or '<memory>'}")
+        if format_version not in SUPPORTED_FORMAT_VERSIONS:
+            raise ValueError(f"Unsupported data bundle format version {format_version}, expected {FORMAT_VERSION}")
+
+        index = json.loads(bytes(buffer[HEADER.size:HEADER.size + index_length]))
+        self.path = path
+        self.version: str = index["version"]
+        self.entries: Dict[str, BundleEntry] = {}
+        for key, (offset, length, digest, *variants) in index["entries"].items():
+            spans = {coding: (span[0], span[1]) for coding, span in variants[0].items()} if variants else {}
+            self.entries[key] = BundleEntry(offset, length, digest, spans)
+        self._buffer = buffer
+        self._view = memoryview(buffer)
+        self._base = HEADER.size + index_length
+
+    @classmethod
+    def open(cls, path: Path = BUNDLE_FILE) -> "DataBundle":
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer, path)
+
+    @property
+    def size(self) -> int:
+        return len(self._buffer)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def keys(self, prefix: str = "") -> Iterator[str]:
+        return (key for key in self.entries if key.startswith(prefix))
+
+    def view(self, key: str) -> memoryview:
+        """
+        Zero-copy view of the body of `key`.
+        """
+        entry = self.entries[key]
+        start = self._base + entry.offset
+        return self._view[start:start + entry.length]
+
+    def variants(self, key: str) -> Dict[str, memoryview]:
+        """
+        Zero-copy views of the body of `key` ("identity") and of each of its stored compressed variants.
+        """
+        views = {"identity": self.view(key)}
+        for coding, (offset, length) in self.entries[key].variants.items():
+            start = self._base + offset
+            views[coding] = self._view[start:start + length]
+        return views
+
+    def read(self, key: str) -> bytes:
+        return bytes(self.view(key))
+
+    def digest(self, key: str) -> str:
+        return self.entries[key].digest
+
+
+def read_source_text(path: Path) -> str:
+    """
+    Reads a generated JSON file. Some of the disagreement files were written with a legacy encoding, so fall back to
+    latin-1 / cp1252 when they are not valid UTF-8.
+    """
+    data = path.read_bytes()
+    for enc in ("utf-8", "latin-1", "cp1252"):
+        try:
+            return data.decode(enc)
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"Could not decode {path}")
+
+
+def compile_sources(data_dir: Path = DATA_DIR) -> Dict[str, bytes]:
+    """
+    Validates `matrix.json` and every file in `party_disagreements/`, and returns their canonical JSON by bundle key.
+    """
+    entries: Dict[str, bytes] = {}
+    matrix = VoteMatrix.model_validate_json(read_source_text(data_dir / "matrix.json"))
+    entries[MATRIX_KEY] = matrix.model_dump_json(by_alias=True).encode("utf-8")
+
+    for cache_file in sorted((data_dir / "party_disagreements").iterdir()):
+        if cache_file.suffix != ".json":
+            continue
+        disagreements = Disagreements.model_validate_json(read_source_text(cache_file))
+        entries[cache_file.stem] = disagreements.model_dump_json(by_alias=True).encode("utf-8")
+
+    return entries
+
+
+def encode_bundle(entries: Dict[str, bytes]) -> bytes:
+    """
+    Lays out the entries with their compressed variants. The version only depends on the keys and the bodies, so it
+    does not change with the compression or the format version.
+    """
+    index_entries = {}
+    bodies = []
+    offset = 0
+    version = hashlib.sha256()
+    for key in sorted(entries):
+        body = entries[key]
+        digest = hashlib.sha256(body).hexdigest()
+        variants = {}
+        bodies.append(body)
+        start, offset = offset, offset + len(body)
+        for coding, data in compress(body).items():
+            variants[coding] = [offset, len(data)]
+            bodies.append(data)
+            offset += len(data)
+        index_entries[key] = [start, len(body), digest, variants]
+        version.update(key.encode("utf-8") + b"\0" + digest.encode("ascii"))
+
+    index = json.dumps({"version": version.hexdigest(), "entries": index_entries}).encode("utf-8")
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(index))
+    return b"".join([header, index, *bodies])
+
+
+def build_bundle(data_dir: Path = DATA_DIR, path: Path = BUNDLE_FILE) -> DataBundle:
+    """
+    Compiles all source files into a bundle and writes it to `path` atomically.
+    """
+    data = encode_bundle(compile_sources(data_dir))
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+    return DataBundle.open(path)
+
+
+def load_bundle(path: Path = BUNDLE_FILE, data_dir: Path = DATA_DIR) -> DataBundle:
+    """
+    Opens the prebuilt bundle, or compiles one in memory from the source files if it has not been built.
+    """
+    if path.exists():
+        return DataBundle.open(path)
+    return DataBundle(encode_bundle(compile_sources(data_dir)))
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+import gzip
+from typing import Dict, Union
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional, without it only gzip variants are prepared
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 512
+
+# Response bodies are bytes, or views into a memory-mapped file
+Body = Union[bytes, memoryview]
+
+
+def compress(body: Body) -> Dict[str, bytes]:
+    """
+    The compressed variants worth serving for `body`, by content coding.
+    """
+    variants: Dict[str, bytes] = {}
+    if len(body) >= MIN_COMPRESS_SIZE:
+        variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+        if brotli is not None:
+            variants["br"] = brotli.compress(bytes(body), quality=11)
+    return variants
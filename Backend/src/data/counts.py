@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+import os
+from pathlib import Path
+from typing import List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.data.matrix import PairwiseCounts, encode_votes, pairwise_counts, similarity_from_counts
+from src.data.votes import VoteStore
+
+DATA_DIR: Path = Path(__file__).parent.parent.parent / "data"
+COUNTS_FILE: Path = DATA_DIR / "matrix_counts.npz"
+
+
+class MatrixCounts(NamedTuple):
+    """
+    The per-pair agreement and comparison counts behind `matrix.json`, with the motions they were counted over.
+
+    Both counts are sums over motions, so new motions are added by counting just those and adding the result, without
+    going over the earlier motions again. A motion that is already counted is skipped, so a motion whose votes changed
+    after it was counted needs a full rebuild (`run/generate_matrix.py`).
+    """
+
+    parties: List[str]
+    ids: List[str]  # The motions counted, in the order they were added
+    counts: PairwiseCounts
+
+    @classmethod
+    def build(cls, votes: pd.DataFrame, parties: Sequence[str]) -> "MatrixCounts":
+        """
+        Counts a votes table (one row per motion, indexed by motion id, one column per party) from scratch.
+        """
+        votes = votes.reindex(columns=list(parties))
+        return cls(
+            parties=list(parties),
+            ids=[str(motion_id) for motion_id in votes.index],
+            counts=pairwise_counts(encode_votes(votes, parties)),
+        )
+
+    @classmethod
+    def from_store(cls, store: VoteStore) -> "MatrixCounts":
+        return cls(parties=list(store.encoded.parties), ids=list(store.ids), counts=pairwise_counts(store.encoded))
+
+    @classmethod
+    def load(cls, path: Path = COUNTS_FILE) -> "MatrixCounts":
+        with np.load(path, allow_pickle=False) as file:
+            return cls(
+                parties=file["parties"].tolist(),
+                ids=file["ids"].tolist(),
+                counts=PairwiseCounts(agreements=file["agreements"], comparisons=file["comparisons"]),
+            )
+
+    def save(self, path: Path = COUNTS_FILE) -> None:
+        """
+        Writes the counts to `path`, replacing it atomically.
+        """
+        tmp_file = path.with_name(path.name + ".tmp")
+        with open(tmp_file, "wb") as file:
+            np.savez(
+                file,
+                parties=np.array(self.parties, dtype=str),
+                ids=np.array(self.ids, dtype=str),
+                agreements=self.counts.agreements,
+                comparisons=self.counts.comparisons,
+            )
+        os.replace(tmp_file, path)
+
+    def update(self, votes: pd.DataFrame) -> Tuple["MatrixCounts", int]:
+        """
+        Adds the motions in `votes` that are not counted yet. Returns the updated counts and the number of motions added.
+        """
+        counted = set(self.ids)
+        new = ~votes.index.astype(str).isin(counted) & ~votes.index.duplicated(keep="first")
+        votes = votes[new]
+        if votes.empty:
+            return self, 0
+
+        delta = MatrixCounts.build(votes, self.parties)
+        counts = PairwiseCounts(
+            agreements=self.counts.agreements + delta.counts.agreements,
+            comparisons=self.counts.comparisons + delta.counts.comparisons,
+        )
+        return self._replace(ids=self.ids + delta.ids, counts=counts), len(delta.ids)
+
+    def similarity(self) -> pd.DataFrame:
+        return similarity_from_counts(self.counts, self.parties)
+
+    def differences(self, other: "MatrixCounts") -> List[str]:
+        """
+        Describes how these counts differ from `other`, an empty list when they are the same.
+        """
+        differences = []
+        if self.parties != other.parties:
+            differences.append(f"parties differ: {self.parties} != {other.parties}")
+            return differences
+        missing, extra = set(other.ids) - set(self.ids), set(self.ids) - set(other.ids)
+        if missing or extra:
+            differences.append(f"{len(missing)} motions missing and {len(extra)} extra motions")
+        for name in PairwiseCounts._fields:
+            mismatches = np.argwhere(getattr(self.counts, name) != getattr(other.counts, name))
+            if len(mismatches):
+                a, b = mismatches[0]
+                differences.append(
+                    f"{name} differ for {len(mismatches)} pairs, e.g. {self.parties[a]} / {self.parties[b]}: "
+                    f"{getattr(self.counts, name)[a, b]} != {getattr(other.counts, name)[a, b]}"
+                )
+        return differences
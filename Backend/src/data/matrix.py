@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+from typing import List, NamedTuple, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Code 0 is reserved for "no vote recorded" (NaN in the pivoted votes table). Every distinct vote value that does occur
+# (e.g. "Voor", "Tegen" or an empty string for a faction that did not vote) gets its own code starting at 1.
+ABSENT: int = 0
+
+
+class EncodedVotes(NamedTuple):
+    codes: np.ndarray  # (motions, parties) int8 array of vote codes
+    labels: List[str]  # labels[code - 1] is the vote value for that code
+    parties: List[str]
+
+
+class PairwiseCounts(NamedTuple):
+    agreements: np.ndarray  # (parties, parties) number of motions where both parties voted the same way
+    comparisons: np.ndarray  # (parties, parties) number of motions where both parties have a recorded vote
+
+
+def encode_votes(votes: pd.DataFrame, parties: Sequence[str]) -> EncodedVotes:
+    """
+    Encodes the pivoted votes table (one row per motion, one column per party) as a compact integer array.
+    """
+    codes, uniques = pd.factorize(votes[list(parties)].to_numpy().ravel(), use_na_sentinel=True)
+    codes = (codes + 1).astype(np.int8).reshape(len(votes), len(parties))
+    return EncodedVotes(codes=codes, labels=[str(u) for u in uniques], parties=list(parties))
+
+
+def one_hot(codes: np.ndarray, n_labels: int) -> np.ndarray:
+    """
+    Expands a (motions, parties) code array into a (motions, labels * parties) indicator array, with one block of
+    party columns per vote label.
+    """
+    return np.concatenate([codes == code for code in range(1, n_labels + 1)], axis=1).astype(np.float64)
+
+
+def pairwise_counts(encoded: EncodedVotes) -> PairwiseCounts:
+    """
+    Computes the agreement and comparison counts for all party pairs at once.
+
+    Two parties agree on a motion when they have the same vote code, so the agreement counts are the sum of the Gram
+    matrices of the per-label indicator columns. The comparison counts are the Gram matrix of the "has voted" mask.
+    """
+    n_parties = len(encoded.parties)
+    n_labels = len(encoded.labels)
+    indicators = one_hot(encoded.codes, n_labels)
+    gram = indicators.T @ indicators
+
+    agreements = np.zeros((n_parties, n_parties), dtype=np.float64)
+    for k in range(n_labels):
+        block = slice(k * n_parties, (k + 1) * n_parties)
+        agreements += gram[block, block]
+
+    present = (encoded.codes != ABSENT).astype(np.float64)
+    comparisons = present.T @ present
+
+    return PairwiseCounts(
+        agreements=np.rint(agreements).astype(np.int64),
+        comparisons=np.rint(comparisons).astype(np.int64),
+    )
+
+
+def similarity_from_counts(counts: PairwiseCounts, parties: Sequence[str]) -> pd.DataFrame:
+    """
+    Turns pairwise counts into the agreement percentage matrix, matching the rounding of the original per-pair loop.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        similarity = (counts.agreements / counts.comparisons) * 100
+    similarity = np.where(counts.comparisons == 0, 0.0, similarity)
+    np.fill_diagonal(similarity, 100.0)
+
+    return pd.DataFrame(similarity, index=list(parties), columns=list(parties), dtype=float).round(1)
+
+
+def similarity_matrix(votes: pd.DataFrame, parties: Sequence[str]) -> pd.DataFrame:
+    """
+    Computes the percentage of motions on which each pair of parties voted the same way.
+    """
+    encoded = encode_votes(votes, parties)
+    return similarity_from_counts(pairwise_counts(encoded), parties)
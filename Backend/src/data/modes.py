@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+All vote matrix variants from one batched pass over the votes.
+
+For a set of motions, `block_counts` computes a stack of (parties, parties) count matrices, each the product of two
+per-motion indicator or weight columns summed over the motions:
+
+    agree[l]   both parties cast vote l
+    share[l]   both parties' share of members that cast vote l (split votes spread over several votes, and "no vote"
+               is not a vote, so it stays 0)
+    seat[l]    seats of both parties that cast vote l, "no vote" included
+    margin[l]  the row party cast vote l and the column party has a recorded vote
+    present    both parties have a recorded vote
+    voted      both parties actually voted (not "no vote")
+    seats      the seats of both parties where they have a recorded vote
+
+Every mode is computed from these blocks, and being sums over motions, the blocks of disjoint sets of motions add up.
+
+The seats mode only differs from the agreement mode through split votes and seat counts that change between motions: a
+pair whose seats stay the same weighs every motion the same, so its seat weighted share is its share of motions. The
+scraped dataset records no split votes and the seats of a faction hardly change (they follow the composition of the
+faction at the time of the vote), so there the two modes are within a few tenths of a percent of each other.
+"""
+from typing import Dict, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.api.v1.votes.schemas import MatrixMode
+from src.data.matrix import ABSENT, PairwiseCounts
+from src.data.votes import VoteStore
+
+# The vote label of a faction that did not take part in the vote
+NO_VOTE_LABEL = ""
+
+
+class BlockLayout(NamedTuple):
+    n_parties: int
+    n_labels: int
+    no_vote: Optional[int]  # Label index of "no vote", if it occurs
+
+    def index(self, name: str, label: int = 0) -> int:
+        offsets = {
+            "agree": 0,
+            "share": self.n_labels,
+            "seat": 2 * self.n_labels,
+            "margin": 3 * self.n_labels,
+            "present": 4 * self.n_labels,
+            "voted": 4 * self.n_labels + 1,
+            "seats": 4 * self.n_labels + 2,
+        }
+        return offsets[name] + label
+
+    @property
+    def n_blocks(self) -> int:
+        return 4 * self.n_labels + 3
+
+    def empty(self) -> np.ndarray:
+        return np.zeros((self.n_blocks, self.n_parties, self.n_parties), dtype=np.float64)
+
+
+def block_layout(store: VoteStore) -> BlockLayout:
+    labels = store.encoded.labels
+    no_vote = labels.index(NO_VOTE_LABEL) if NO_VOTE_LABEL in labels else None
+    return BlockLayout(n_parties=len(store.encoded.parties), n_labels=len(labels), no_vote=no_vote)
+
+
+def _blocks(columns: np.ndarray, n_parties: int) -> np.ndarray:
+    """
+    The Gram matrix of (motions, k * parties) columns, as (k, k, parties, parties) blocks.
+    """
+    k = columns.shape[1] // n_parties
+    return (columns.T @ columns).reshape(k, n_parties, k, n_parties).transpose(0, 2, 1, 3)
+
+
+def _split_shares(store: VoteStore, rows, indicators: np.ndarray) -> Optional[np.ndarray]:
+    """
+    The (motions, labels, parties) member share per vote of the selected motions, or None when none of them has a
+    split vote (the shares are then the vote indicators themselves).
+    """
+    if not store.splits:
+        return None
+    positions = {row: k for k, row in enumerate(np.arange(len(store.ids))[rows].tolist())}
+    selected = [(positions[row], party, split) for (row, party), split in store.splits.items() if row in positions]
+    if not selected:
+        return None
+
+    shares = indicators.astype(np.float64)
+    label_indices = {label: k for k, label in enumerate(store.encoded.labels)}
+    for k, party, split in selected:
+        members = sum(split.values())
+        shares[k, :, party] = 0.0
+        for vote, count in split.items():
+            if vote in label_indices:
+                shares[k, label_indices[vote], party] = count / members
+    return shares
+
+
+def block_counts(store: VoteStore, rows) -> np.ndarray:
+    """
+    The stacked count blocks of the motions selected by `rows` (a slice, index array or boolean mask).
+
+    This takes two matrix products: one over the vote indicators plus a "has a vote" indicator, which gives the agree,
+    margin and present blocks and, by inclusion-exclusion on "no vote", the voted block; and one over the seat weighted
+    shares, whose diagonal blocks are the seat blocks and whose total is the seats block. The indicator product is
+    done in float32, which is exact for counts up to 2**24 motions. Without split votes the share blocks equal the
+    agree blocks.
+    """
+    layout = block_layout(store)
+    n_labels, n_parties = layout.n_labels, layout.n_parties
+    codes = store.encoded.codes[rows]
+    n_motions = len(codes)
+    counts = layout.empty()
+    if n_motions == 0:
+        return counts
+
+    indicators = np.empty((n_motions, n_labels + 1, n_parties), dtype=np.float32)
+    for label in range(n_labels):
+        indicators[:, label] = codes == label + 1
+    indicators[:, n_labels] = codes != ABSENT
+    products = _blocks(indicators.reshape(n_motions, -1), n_parties).astype(np.float64)
+
+    for label in range(n_labels):
+        counts[layout.index("agree", label)] = products[label, label]
+        counts[layout.index("margin", label)] = products[label, n_labels]
+    present = counts[layout.index("present")] = products[n_labels, n_labels]
+    if layout.no_vote is None:
+        counts[layout.index("voted")] = present
+    else:
+        no_vote = counts[layout.index("margin", layout.no_vote)]
+        counts[layout.index("voted")] = present - no_vote - no_vote.T + products[layout.no_vote, layout.no_vote]
+
+    shares = _split_shares(store, rows, indicators[:, :n_labels])
+    if shares is None:
+        share_products = products
+        shares = indicators[:, :n_labels]
+    else:
+        share_products = _blocks(shares.reshape(n_motions, -1), n_parties)
+    for label in range(n_labels):
+        if label != layout.no_vote:
+            counts[layout.index("share", label)] = share_products[label, label]
+
+    # The shares of a party sum to 1 over the votes where it has a recorded vote, so the seat weighted shares sum to
+    # its seats there
+    weights = shares * store.seats[rows][:, np.newaxis, :]
+    seat_products = _blocks(weights.reshape(n_motions, -1), n_parties)
+    for label in range(n_labels):
+        counts[layout.index("seat", label)] = seat_products[label, label]
+    counts[layout.index("seats")] = seat_products.sum(axis=(0, 1))
+    return counts
+
+
+def _sum_labels(counts: np.ndarray, layout: BlockLayout, name: str) -> np.ndarray:
+    return counts[layout.index(name) : layout.index(name) + layout.n_labels].sum(axis=0)
+
+
+def mode_counts(counts: np.ndarray, layout: BlockLayout, mode: MatrixMode) -> PairwiseCounts:
+    """
+    The (possibly fractional) agreements and comparisons of a ratio mode.
+    """
+    if mode == MatrixMode.AGREEMENT or mode == MatrixMode.KAPPA:
+        return PairwiseCounts(agreements=_sum_labels(counts, layout, "agree"), comparisons=counts[layout.index("present")])
+    if mode == MatrixMode.SEATS:
+        return PairwiseCounts(agreements=_sum_labels(counts, layout, "seat"), comparisons=counts[layout.index("seats")])
+    if mode == MatrixMode.ABSTENTION:
+        return PairwiseCounts(agreements=_sum_labels(counts, layout, "share"), comparisons=counts[layout.index("voted")])
+    raise ValueError(f"Unknown matrix mode: {mode}")
+
+
+def cohens_kappa(counts: np.ndarray, layout: BlockLayout) -> np.ndarray:
+    """
+    Cohen's kappa per party pair over the motions on which both have a recorded vote. The chance agreement comes from
+    each party's vote distribution over those same motions. Where kappa is undefined (both parties always cast the
+    same single vote, or there are no such motions) it is 0.
+    """
+    agreement = mode_counts(counts, layout, MatrixMode.AGREEMENT)
+    comparisons = agreement.comparisons
+    expected = np.zeros_like(comparisons)
+    for label in range(layout.n_labels):
+        margins = counts[layout.index("margin", label)]
+        expected += margins * margins.T
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        observed = agreement.agreements / comparisons
+        expected = expected / comparisons**2
+        kappa = (observed - expected) / (1 - expected)
+    return np.where((comparisons == 0) | np.isclose(expected, 1.0), 0.0, kappa)
+
+
+def mode_similarity(counts: np.ndarray, layout: BlockLayout, mode: MatrixMode, parties: Sequence[str]) -> pd.DataFrame:
+    """
+    The vote matrix of `mode` in percent, rounded like the original matrix.
+    """
+    if mode == MatrixMode.KAPPA:
+        values = cohens_kappa(counts, layout) * 100
+    else:
+        ratio = mode_counts(counts, layout, mode)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = np.where(ratio.comparisons == 0, 0.0, ratio.agreements / ratio.comparisons * 100)
+    np.fill_diagonal(values, 100.0)
+    return pd.DataFrame(values, index=list(parties), columns=list(parties), dtype=float).round(1)
+
+
+def all_mode_similarities(
+    counts: np.ndarray, layout: BlockLayout, parties: Sequence[str]
+) -> Dict[MatrixMode, pd.DataFrame]:
+    return {mode: mode_similarity(counts, layout, mode, parties) for mode in MatrixMode}
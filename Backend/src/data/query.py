@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+from typing import Optional
+
+
+def normalize_query(q: Optional[str]) -> Optional[str]:
+    """
+    Canonical form of a title keyword filter: case-folded words separated by single spaces, or None for no filter.
+    """
+    if q is None:
+        return None
+    return " ".join(q.casefold().split()) or None
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+import bisect
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+# Function words, plus the words every motion title starts with ("Gewijzigde motie van het lid ... over ..."), which
+# would otherwise match nearly every motion
+STOPWORDS = frozenset(
+    """
+    aan al als bij c cs dan dat de der des die dit door dus een en er het hoe hun in is je kan kunnen met na naar niet
+    nog of om ook op over s t te ten ter tot uit v van voor vv wat wel welke wordt worden zich zij zijn zo zoals
+    motie moties gewijzigde nader lid leden
+    """.split()
+)
+
+_TOKEN = re.compile(r"\w+")
+
+# Plural endings that are stripped when at least this many characters remain, see `stem`
+MIN_STEM_LENGTH = 3
+MAX_PREFIX_EXPANSIONS = 64
+# Weight of a prefix match relative to an exact match of the same term, so "plannen" ranks plans above "planologische"
+PREFIX_WEIGHT = 0.7
+
+
+def fold(text: str) -> str:
+    """
+    Case-folds and strips diacritics, so "financiële" and "financiele" are the same word.
+    """
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def stem(word: str) -> str:
+    """
+    Light Dutch stemmer for the regular plural forms: -heden to -heid, -en (undoubling the final consonant, as in
+    plannen -> plan) and -s after -er, -el, -ie and -je. Anything else is left as is; prefix matching covers most of
+    the remaining variation, including compounds.
+    """
+    if word.endswith("heden"):
+        return word[:-5] + "heid"
+    if word.endswith("en") and len(word) - 2 >= MIN_STEM_LENGTH and word[-3] not in "aeiou":
+        word = word[:-2]
+        if len(word) > MIN_STEM_LENGTH and word[-1] == word[-2]:
+            word = word[:-1]
+        return word
+    if word.endswith(("ers", "els", "ies", "jes")) and len(word) - 1 >= MIN_STEM_LENGTH:
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    return [stem(token) for token in _TOKEN.findall(fold(text)) if token not in STOPWORDS and not token.isdigit()]
+
+
+class SearchHit(NamedTuple):
+    doc: int
+    score: float
+
+
+class SearchIndex:
+    """
+    In-memory inverted index over motion titles, ranked with BM25.
+
+    Every query term also matches the indexed terms it is a prefix of (up to `MAX_PREFIX_EXPANSIONS`), so "stikstof"
+    finds "stikstofuitstoot" and a partially typed word finds its completions. A document scores the best of the
+    matching expansions per query term, not their sum, and a prefix match counts for `PREFIX_WEIGHT` of an exact one.
+    """
+
+    def __init__(self, documents: Sequence[str], k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.n_docs = len(documents)
+
+        postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        lengths = np.zeros(self.n_docs, dtype=np.float32)
+        for doc, text in enumerate(documents):
+            tokens = tokenize(text)
+            lengths[doc] = len(tokens)
+            for term, frequency in Counter(tokens).items():
+                postings[term].append((doc, frequency))
+
+        self.terms: List[str] = sorted(postings)
+        average_length = float(lengths.mean()) if self.n_docs else 0.0
+        # Length normalization of BM25 per document, computed once
+        norms = k1 * (1 - b + b * lengths / max(average_length, 1e-9))
+
+        # Per term the matching documents and their precomputed BM25 weights
+        self.docs: Dict[str, np.ndarray] = {}
+        self.weights: Dict[str, np.ndarray] = {}
+        for term in self.terms:
+            docs = np.array([doc for doc, _ in postings[term]], dtype=np.int32)
+            frequencies = np.array([frequency for _, frequency in postings[term]], dtype=np.float32)
+            idf = math.log(1 + (self.n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            self.docs[term] = docs
+            self.weights[term] = (idf * frequencies * (k1 + 1) / (frequencies + norms[docs])).astype(np.float32)
+
+    def expand(self, term: str) -> List[str]:
+        """
+        The indexed terms that start with `term`, the exact term first.
+        """
+        start = bisect.bisect_left(self.terms, term)
+        expansions = []
+        for term_index in range(start, min(start + MAX_PREFIX_EXPANSIONS, len(self.terms))):
+            if not self.terms[term_index].startswith(term):
+                break
+            expansions.append(self.terms[term_index])
+        return expansions
+
+    def search(self, query: str, limit: int = 20) -> Tuple[int, List[SearchHit]]:
+        """
+        Returns the number of matching documents and the `limit` best ones. A document matches when it contains at
+        least one query term.
+        """
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        for term in dict.fromkeys(tokenize(query)):
+            term_scores = np.zeros(self.n_docs, dtype=np.float32)
+            for expansion in self.expand(term):
+                docs = self.docs[expansion]
+                weights = self.weights[expansion] if expansion == term else self.weights[expansion] * PREFIX_WEIGHT
+                term_scores[docs] = np.maximum(term_scores[docs], weights)
+            scores += term_scores
+
+        matches = np.flatnonzero(scores)
+        total = len(matches)
+        if total > limit:
+            matches = matches[np.argpartition(-scores[matches], limit - 1)[:limit]]
+        # Highest score first, ties in document order
+        matches = matches[np.lexsort((matches, -scores[matches]))]
+        return total, [SearchHit(int(doc), float(scores[doc])) for doc in matches]
@@ -0,0 +1,365 @@
+# -*- coding: utf-8 -*-
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.data.matrix import ABSENT, EncodedVotes, encode_votes
+
+DATA_DIR: Path = Path(__file__).parent.parent.parent / "data"
+DATASET_FILE: Path = DATA_DIR / "dataset.json"
+VOTES_FILE: Path = DATA_DIR / "votes.bin"
+
+# File layout of the vote store, like the data bundle: header, then the JSON index, then the array bodies, each aligned
+# to ARRAY_ALIGNMENT bytes. The index holds the parties, the vote labels, the split votes and per array its offset
+# (relative to the start of the bodies), dtype and shape.
+MAGIC = b"GWVOTES\0"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sIQ")  # magic, format version, index length
+ARRAY_ALIGNMENT = 64
+
+# Text the scraped titles start with, as removed by `run/generate_matrix.py`
+TITLE_PREFIXES = ("\nMotie\n:\n", "\nMotie (gewijzigd/nader)\n:\n")
+
+# Split votes by (motion id, party): the number of members per vote
+Splits = Dict[Tuple[str, str], Dict[str, int]]
+
+
+def clean_title(title: str) -> str:
+    for prefix in TITLE_PREFIXES:
+        title = title.replace(prefix, "")
+    return title.strip()
+
+
+def motion_frames(motions: Iterable[dict]) -> Tuple[pd.DataFrame, pd.DataFrame, Splits]:
+    """
+    Turns filled motions of the scraped dataset into a votes table (one row per motion with its url, title and each
+    party's vote), a seats table of the same shape, and the split votes. Motions without votes are skipped.
+    """
+    motions = [motion for motion in motions if "votes" in motion]
+    rows, seat_rows = [], []
+    splits: Splits = {}
+    for motion in motions:
+        row = {"url": motion["url"], "title": clean_title(motion["title"])}
+        if motion.get("date"):
+            row["date"] = motion["date"]
+        seats = {vote["party"]: vote["seats"] for vote in motion["votes"]}
+        for vote in motion["votes"]:
+            row[vote["party"]] = vote["vote"]
+            if vote.get("split"):
+                splits[motion["id"], vote["party"]] = vote["split"]
+        rows.append(row)
+        seat_rows.append(seats)
+
+    index = pd.Index([motion["id"] for motion in motions], name="id")
+    return pd.DataFrame(rows, index=index), pd.DataFrame(seat_rows, index=index), splits
+
+
+def read_dataset(path: Path = DATASET_FILE) -> Tuple[pd.DataFrame, pd.DataFrame, Splits]:
+    """
+    Reads the filled motions of the scraped dataset, see `motion_frames`.
+    """
+    return motion_frames(json.loads(path.read_text(encoding="utf-8"))["motions"])
+
+
+def motion_date(motion_id: str, date: object = None) -> np.datetime64:
+    """
+    The date of a motion. The dataset only has one when the scrape recorded it; otherwise the motion is dated at the
+    start of the year in its case number (e.g. 2025Z18577), so date ranges over such motions are year-granular.
+    """
+    if isinstance(date, str) and date:
+        return np.datetime64(date[:10], "D")
+    return np.datetime64(f"{motion_id[:4]}-01-01", "D")
+
+
+class StringColumn(Sequence[str]):
+    """
+    Strings stored back to back as UTF-8, decoded when accessed, so a column read from the store file is not copied.
+    Besides an int or a slice it can be indexed with a boolean mask or an index array, which gives a list.
+    """
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self.data = data  # uint8
+        self.offsets = offsets  # int64, string k is data[offsets[k]:offsets[k + 1]]
+
+    @classmethod
+    def from_strings(cls, strings: Iterable[str]) -> "StringColumn":
+        encoded = [string.encode("utf-8") for string in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(string) for string in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def _decode(self, k: int) -> str:
+        return self.data[self.offsets[k]:self.offsets[k + 1]].tobytes().decode("utf-8")
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            if not -len(self) <= key < len(self):
+                raise IndexError(key)
+            return self._decode(int(key) % len(self))
+        return [self._decode(k) for k in np.arange(len(self))[key].tolist()]
+
+    def __iter__(self) -> Iterator[str]:
+        return (self._decode(k) for k in range(len(self)))
+
+
+class VoteStore(NamedTuple):
+    """
+    All motions with their votes as columns, sorted by date so any date range is a contiguous block of rows, and by id
+    within a date.
+
+    `save` writes it to a single file that `open` memory-maps, so the columns are read without copying or parsing and
+    processes that open the same file share its pages. Built with `run/generate_matrix.py`.
+    """
+
+    ids: StringColumn
+    urls: StringColumn
+    titles: StringColumn
+    dates: np.ndarray  # (motions,) datetime64[D], ascending
+    exact_dates: np.ndarray  # (motions,) bool, False where only the year is known (see `motion_date`)
+    encoded: EncodedVotes
+    seats: np.ndarray  # (motions, parties) float64 seats of each faction, 0 where unknown
+    splits: Dict[Tuple[int, int], Dict[str, int]]  # Split votes by (row, party index): the number of members per vote
+
+    @classmethod
+    def from_dataset(cls, parties: Sequence[str], path: Path = DATASET_FILE) -> "VoteStore":
+        votes, seats, splits = read_dataset(path)
+        return cls.from_frame(votes, parties, seats, splits)
+
+    @classmethod
+    def from_frame(
+        cls,
+        votes: pd.DataFrame,
+        parties: Sequence[str],
+        seats: Optional[pd.DataFrame] = None,
+        splits: Optional[Splits] = None,
+    ) -> "VoteStore":
+        recorded = votes["date"] if "date" in votes else [None] * len(votes)
+        dates = np.array(
+            [motion_date(str(motion_id), date) for motion_id, date in zip(votes.index, recorded)], dtype="datetime64[D]"
+        )
+        by_id = np.argsort(votes.index.astype(str).to_numpy(), kind="stable")
+        exact_dates = np.array([isinstance(date, str) and bool(date) for date in recorded], dtype=bool)
+        order = by_id[np.argsort(dates[by_id], kind="stable")]
+        votes = votes.iloc[order]
+        ids = [str(motion_id) for motion_id in votes.index]
+
+        if seats is None:
+            seat_array = np.zeros((len(votes), len(parties)), dtype=np.float64)
+        else:
+            seat_array = seats.reindex(columns=list(parties)).iloc[order].fillna(0).to_numpy(dtype=np.float64)
+        rows = {motion_id: row for row, motion_id in enumerate(ids)}
+        party_indices = {party: k for k, party in enumerate(parties)}
+        row_splits = {
+            (rows[motion_id], party_indices[party]): split
+            for (motion_id, party), split in (splits or {}).items()
+            if motion_id in rows and party in party_indices
+        }
+
+        return cls(
+            ids=StringColumn.from_strings(ids),
+            urls=StringColumn.from_strings(str(url) for url in votes["url"]),
+            titles=StringColumn.from_strings(str(title).strip() for title in votes["title"]),
+            dates=dates[order],
+            exact_dates=exact_dates[order],
+            encoded=encode_votes(votes, parties),
+            seats=seat_array,
+            splits=row_splits,
+        )
+
+    @classmethod
+    def open(cls, path: Path = VOTES_FILE) -> "VoteStore":
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls.from_buffer(buffer, path)
+
+    @classmethod
+    def from_buffer(cls, buffer: Union[bytes, mmap.mmap], path: Optional[Path] = None) -> "VoteStore":
+        magic, format_version, index_length = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a vote store: {path or '<memory>'}")
+        if format_version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported vote store format version {format_version}, expected {FORMAT_VERSION}")
+
+        index = json.loads(bytes(buffer[HEADER.size:HEADER.size + index_length]))
+        base = _align(HEADER.size + index_length)
+
+        def array(name: str) -> np.ndarray:
+            offset, dtype, shape = index["arrays"][name]
+            count = int(np.prod(shape))
+            return np.frombuffer(buffer, dtype=np.dtype(dtype), count=count, offset=base + offset).reshape(shape)
+
+        def strings(name: str) -> StringColumn:
+            return StringColumn(array(f"{name}.data"), array(f"{name}.offsets"))
+
+        dates = array("dates")
+        # Stores written before the exact dates were tracked have none
+        exact_dates = array("exact_dates") if "exact_dates" in index["arrays"] else np.zeros(len(dates), dtype=bool)
+        return cls(
+            ids=strings("ids"),
+            urls=strings("urls"),
+            titles=strings("titles"),
+            dates=dates,
+            exact_dates=exact_dates,
+            encoded=EncodedVotes(codes=array("codes"), labels=index["labels"], parties=index["parties"]),
+            seats=array("seats"),
+            splits={(row, party): split for row, party, split in index["splits"]},
+        )
+
+    def to_bytes(self) -> bytes:
+        arrays: Dict[str, np.ndarray] = {
+            "dates": self.dates.astype("datetime64[D]"),
+            "exact_dates": self.exact_dates.astype(bool),
+            "codes": self.encoded.codes.astype(np.int8),
+            "seats": self.seats.astype(np.float64),
+        }
+        for name in ("ids", "urls", "titles"):
+            column = StringColumn.from_strings(getattr(self, name))
+            arrays[f"{name}.data"] = column.data
+            arrays[f"{name}.offsets"] = column.offsets
+
+        entries = {}
+        bodies = []
+        offset = 0
+        for name, values in arrays.items():
+            values = np.ascontiguousarray(values)
+            entries[name] = [offset, values.dtype.str, list(values.shape)]
+            body = values.tobytes()
+            bodies.append(body + b"\0" * (_align(len(body)) - len(body)))
+            offset += len(bodies[-1])
+
+        index = json.dumps(
+            {
+                "parties": list(self.encoded.parties),
+                "labels": list(self.encoded.labels),
+                "splits": [[row, party, split] for (row, party), split in sorted(self.splits.items())],
+                "arrays": entries,
+            }
+        ).encode("utf-8")
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, len(index))
+        padding = b"\0" * (_align(len(header) + len(index)) - len(header) - len(index))
+        return b"".join([header, index, padding, *bodies])
+
+    def save(self, path: Path = VOTES_FILE) -> None:
+        """
+        Writes the store to `path` atomically.
+        """
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(self.to_bytes())
+        os.replace(tmp_path, path)
+
+    def append(self, other: "VoteStore") -> "VoteStore":
+        """
+        The motions of both stores, in date and id order. `other` must have the same parties; its vote labels are
+        recoded to this store's, adding the ones this store does not have.
+        """
+        if list(other.encoded.parties) != list(self.encoded.parties):
+            raise ValueError("Cannot append a vote store with other parties")
+        labels = list(self.encoded.labels) + [label for label in other.encoded.labels if label not in self.encoded.labels]
+        recode = np.array([ABSENT] + [labels.index(label) + 1 for label in other.encoded.labels], dtype=np.int8)
+
+        ids = np.array(list(self.ids) + list(other.ids), dtype=str)
+        dates = np.concatenate([self.dates, other.dates])
+        order = np.lexsort((ids, dates))
+        position = np.empty_like(order)
+        position[order] = np.arange(len(order))
+
+        urls = list(self.urls) + list(other.urls)
+        titles = list(self.titles) + list(other.titles)
+        splits = {(int(position[row]), party): split for (row, party), split in self.splits.items()}
+        splits.update(
+            {(int(position[len(self.ids) + row]), party): split for (row, party), split in other.splits.items()}
+        )
+        return VoteStore(
+            ids=StringColumn.from_strings(ids[order].tolist()),
+            urls=StringColumn.from_strings(urls[k] for k in order.tolist()),
+            titles=StringColumn.from_strings(titles[k] for k in order.tolist()),
+            dates=dates[order],
+            exact_dates=np.concatenate([self.exact_dates, other.exact_dates])[order],
+            encoded=EncodedVotes(
+                codes=np.concatenate([self.encoded.codes, recode[other.encoded.codes]])[order],
+                labels=labels,
+                parties=list(self.encoded.parties),
+            ),
+            seats=np.concatenate([self.seats, other.seats])[order],
+            splits=splits,
+        )
+
+    def party(self, party: str) -> int:
+        try:
+            return self.encoded.parties.index(party)
+        except ValueError:
+            raise KeyError(f"Unknown party: {party}") from None
+
+    def votes(self, party: str) -> pd.Categorical:
+        """
+        How `party` voted on each motion, NaN where no vote was recorded.
+        """
+        codes = self.encoded.codes[:, self.party(party)].astype(np.int64) - 1
+        return pd.Categorical.from_codes(codes, categories=self.encoded.labels)
+
+    def disagreeing(self, party_a: str, party_b: str) -> np.ndarray:
+        """
+        Boolean mask of the motions on which both parties have a recorded vote and voted differently. Unlike the
+        `df[party_a] != df[party_b]` over votes.json this replaces, a motion one of them has no vote on is not a
+        disagreement (NaN compared unequal to everything there, itself included).
+        """
+        codes_a = self.encoded.codes[:, self.party(party_a)]
+        codes_b = self.encoded.codes[:, self.party(party_b)]
+        return (codes_a != ABSENT) & (codes_b != ABSENT) & (codes_a != codes_b)
+
+    def motion_votes(self, row: int) -> Dict[str, Optional[str]]:
+        """
+        How each party voted on the motion in `row`, None where no vote was recorded.
+        """
+        labels = self.encoded.labels
+        return {
+            party: labels[code - 1] if code != ABSENT else None
+            for party, code in zip(self.encoded.parties, self.encoded.codes[row].tolist())
+        }
+
+    def rows(self, rows: np.ndarray) -> EncodedVotes:
+        """
+        The encoded votes of a subset of motions, selected by a slice, index array or boolean mask.
+        """
+        return self.encoded._replace(codes=self.encoded.codes[rows])
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        The votes table: one row per motion, indexed by id, with its url, title and each party's vote.
+        """
+        frame = pd.DataFrame(
+            {"url": list(self.urls), "title": list(self.titles)}, index=pd.Index(list(self.ids), name="id")
+        )
+        for party in self.encoded.parties:
+            frame[party] = np.asarray(self.votes(party), dtype=object)
+        return frame
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+
+
+def load_vote_store(
+    parties: Sequence[str],
+    path: Path = VOTES_FILE,
+    dataset_file: Path = DATASET_FILE,
+    buffer: Optional[Union[bytes, mmap.mmap]] = None,
+) -> VoteStore:
+    """
+    Opens the prebuilt vote store, or builds one in memory from the dataset if it has not been built or was built for
+    other parties. A `buffer` already holding the store file is read instead of `path`.
+    """
+    if buffer is not None or path.exists():
+        store = VoteStore.from_buffer(buffer, path) if buffer is not None else VoteStore.open(path)
+        if store.encoded.parties == list(parties):
+            return store
+    return VoteStore.from_dataset(parties, dataset_file)
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+import datetime
+import functools
+from typing import FrozenSet, List, Optional
+
+import numpy as np
+
+from src.data.modes import BlockLayout, block_counts, block_layout
+from src.data.query import normalize_query
+from src.data.search import tokenize
+from src.data.votes import VoteStore
+
+
+def _month(day: np.datetime64) -> int:
+    return int(np.datetime64(day, "M").astype(np.int64))
+
+
+def _month_start(month: int) -> np.datetime64:
+    return np.datetime64(month, "M").astype("datetime64[D]")
+
+
+class WindowedCounts:
+    """
+    The count blocks (see `src.data.modes`), from which every matrix mode is computed, for any date range or title
+    keyword filter over a `VoteStore`.
+
+    The count blocks per calendar month are accumulated into prefix sums once, so the counts of all whole months in a
+    range are one subtraction. Only the motions in a partial first or last month are counted directly, which are
+    contiguous rows because the store is sorted by date. A keyword filter selects an arbitrary subset of motions, so it
+    is counted directly over the motions in the range.
+    """
+
+    def __init__(self, store: VoteStore):
+        self.store = store
+        self.layout: BlockLayout = block_layout(store)
+
+        if len(store.ids) == 0:
+            self.first_month = self.last_month = 0
+            self.blocks = self.layout.empty()[np.newaxis]
+            return
+
+        self.first_month = _month(store.dates[0])
+        self.last_month = _month(store.dates[-1])
+        n_months = self.last_month - self.first_month + 1
+        # month_rows[m] is the first row on or after the start of month first_month + m
+        boundaries = np.array([_month_start(self.first_month + m) for m in range(n_months + 1)])
+        self.month_rows = np.searchsorted(store.dates, boundaries, side="left")
+
+        # blocks[m] holds the count blocks over all months before first_month + m
+        self.blocks = np.zeros((n_months + 1, *self.layout.empty().shape), dtype=np.float64)
+        for m in range(n_months):
+            self.blocks[m + 1] = self.blocks[m] + self._count_rows(self.month_rows[m], self.month_rows[m + 1])
+
+    @functools.cached_property
+    def title_words(self) -> List[FrozenSet[str]]:
+        """
+        The words of each title as `/motions/search` indexes them, built on the first keyword filter.
+        """
+        return [frozenset(tokenize(title)) for title in self.store.titles]
+
+    def _row(self, day: datetime.date, side: str = "left") -> int:
+        return int(np.searchsorted(self.store.dates, np.datetime64(day, "D"), side=side))
+
+    def _year_only(self, year: int) -> bool:
+        """
+        Whether some motion of `year` is only known to be of that year, and so is dated at its first day.
+        """
+        first_day = datetime.date(year, 1, 1)
+        return not self.store.exact_dates[self._row(first_day) : self._row(first_day, side="right")].all()
+
+    def unresolved_bound(
+        self, date_from: Optional[datetime.date] = None, date_to: Optional[datetime.date] = None
+    ) -> Optional[datetime.date]:
+        """
+        A bound that falls within a year some of whose motions are only dated by the year, which would put all of
+        those motions on the wrong side of it, or None when both bounds can be applied.
+        """
+        if date_from is not None and (date_from.month, date_from.day) != (1, 1) and self._year_only(date_from.year):
+            return date_from
+        if date_to is not None and (date_to.month, date_to.day) != (12, 31) and self._year_only(date_to.year):
+            return date_to
+        return None
+
+    def _count_rows(self, start: int, stop: int) -> np.ndarray:
+        if stop <= start:
+            return self.layout.empty()
+        return block_counts(self.store, slice(start, stop))
+
+    def _month_index(self, row: int) -> int:
+        """
+        Position of the month of the motion in `row` in the prefix sums.
+        """
+        return _month(self.store.dates[row]) - self.first_month
+
+    def counts(
+        self,
+        date_from: Optional[datetime.date] = None,
+        date_to: Optional[datetime.date] = None,
+        q: Optional[str] = None,
+    ) -> np.ndarray:
+        """
+        The count blocks over the motions dated from `date_from` up to and including `date_to`, whose title contains
+        every word of `q`. Words are compared as `/motions/search` compares them (case, diacritics and regular plural
+        endings do not matter, stopwords are left out), but only whole words match.
+        """
+        start = self._row(date_from) if date_from is not None else 0
+        stop = self._row(date_to, side="right") if date_to is not None else len(self.store.ids)
+
+        q = normalize_query(q)
+        if q is not None:
+            words = frozenset(tokenize(q))
+            # A query of stopwords only matches nothing, as in /motions/search
+            rows = [row for row in range(start, stop) if words and words <= self.title_words[row]]
+            return block_counts(self.store, np.array(rows, dtype=np.int64))
+
+        if stop <= start:
+            return self._count_rows(start, stop)
+
+        # Whole months from the first month starting at or after `start` up to the last one ending at or before `stop`
+        first = self._month_index(start)
+        if self.month_rows[first] != start:
+            first += 1
+        last = self._month_index(stop - 1) + 1
+        if self.month_rows[last] != stop:
+            last -= 1
+        if last <= first:
+            return self._count_rows(start, stop)
+
+        head = self._count_rows(start, self.month_rows[first])
+        tail = self._count_rows(self.month_rows[last], stop)
+        return self.blocks[last] - self.blocks[first] + head + tail
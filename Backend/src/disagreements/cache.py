@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Optional, Sequence
+
+from pydantic import BaseModel
+
+from src.api.v1.votes.schemas import Disagreements
+from src.disagreements.llm import PROMPT_MESSAGES
+
+
+class LLMCacheEntry(BaseModel):
+    key: str
+    model: str
+    party_a: str
+    party_b: str
+    motions: int  # Number of disagreeing motions in the prompt
+    created_at: float
+    latency_s: Optional[float] = None
+    attempts: Optional[int] = None
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    adopted: bool = False  # Taken over from a result generated before this cache existed, so without usage
+    result: Disagreements
+
+
+def input_key(model: str, party_a: str, party_b: str, titles: Sequence[str]) -> str:
+    """
+    Hash of everything that determines a categorization: the model, the prompt template, the parties and the
+    disagreeing motion titles. The titles are sorted, so only a change in which motions the parties disagree on, not in
+    their order, produces a new key.
+    """
+    inputs = {
+        "model": model,
+        "prompt": PROMPT_MESSAGES,
+        "party_a": party_a,
+        "party_b": party_b,
+        "titles": sorted(titles),
+    }
+    return hashlib.sha256(json.dumps(inputs, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    On-disk cache of LLM categorizations, one file per input key. Nothing is ever overwritten: changed inputs get a new
+    key, and the entries of earlier inputs stay, so going back to an earlier dataset does not call the LLM either.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def __contains__(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    def get(self, key: str) -> Optional[LLMCacheEntry]:
+        path = self._path(key)
+        if not path.exists():
+            return None
+        return LLMCacheEntry.model_validate_json(path.read_text(encoding="utf-8"))
+
+    def put(self, entry: LLMCacheEntry) -> None:
+        path = self._path(entry.key)
+        tmp_file = path.with_suffix(".json.tmp")
+        tmp_file.write_text(entry.model_dump_json(), encoding="utf-8")
+        os.replace(tmp_file, path)
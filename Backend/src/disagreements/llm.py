@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import random
+import re
+import time
+from collections import Counter
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import httpx
+import openai
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable, RunnableLambda
+from pydantic import PrivateAttr
+
+from src.api.v1.votes.schemas import Disagreements
+from src.config import settings
+
+PROMPT_MESSAGES = (
+    ("system",
+     "Jouw taak is om de lijst van Tweede Kamer moties te lezen en te categoriseren in vijf categorieën.\n"
+     "De lijst van moties is een lijst van moties waar twee partijen van mening verschillen. Dit is dus al een gefilterde lijst.\n"
+     "De categorieën die jij maakt geeft inzicht in de onderwerpen waar de twee partijen van mening verschillen. De gebruiker is alleen geïnteresseerd in de vijf belangrijkste categorieën.\n"
+     "De partijen zijn: {party_a} en {party_b}\n"
+     "\n"
+     "Schrijf de explanation een beetje in de vorm: 'X en Y verschillen op het gebied van ... vooral op ...'"),
+    ("user", "{motion_titles}"),
+)
+PROMPT = ChatPromptTemplate.from_messages(PROMPT_MESSAGES)
+
+# Failures of a call that are worth another attempt. Anything else (e.g. an invalid request) is raised right away.
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+    asyncio.TimeoutError,
+)
+
+
+def chat_model(model: str = settings.LLM_MODEL) -> BaseChatModel:
+    from langchain_openai.chat_models import ChatOpenAI
+
+    # Retries are done by `LLMPool`, which does not hold up the other calls while waiting
+    return ChatOpenAI(model=model, temperature=0, max_retries=0)
+
+
+def categorize_chain(llm: BaseChatModel) -> Runnable:
+    """
+    The prompt and the model with structured output, built once and shared by all calls. The chain returns a dict with
+    the "parsed" `Disagreements`, the "raw" message (which carries the token usage) and any "parsing_error".
+    """
+    return PROMPT | llm.with_structured_output(Disagreements, include_raw=True)
+
+
+class CallStats:
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self.latencies: List[float] = []
+        self.retries = 0
+        self.rate_limited = 0
+        self.timeouts = 0
+        self.failures = 0
+
+    def percentile(self, q: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+    def summary(self) -> Dict[str, float]:
+        elapsed = time.monotonic() - self.started
+        return {
+            "calls": len(self.latencies),
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            "elapsed_s": round(elapsed, 2),
+            "latency_mean_s": round(sum(self.latencies) / len(self.latencies), 2) if self.latencies else 0.0,
+            "latency_p50_s": round(self.percentile(50), 2),
+            "latency_p95_s": round(self.percentile(95), 2),
+            "latency_max_s": round(max(self.latencies), 2) if self.latencies else 0.0,
+        }
+
+    def __str__(self) -> str:
+        return ", ".join(f"{key}={value}" for key, value in self.summary().items())
+
+
+class CallResult(NamedTuple):
+    value: Any
+    latency: float  # Seconds taken by the successful attempt
+    attempts: int
+
+
+class LLMPool:
+    """
+    Runs calls to a shared chain with at most `concurrency` in flight. Rate limits, timeouts and server errors are
+    retried with exponential backoff and jitter (or the server's Retry-After), waiting with `asyncio.sleep` so the
+    other calls carry on. Successful calls are timed in `stats`.
+    """
+
+    def __init__(
+        self,
+        chain: Runnable,
+        concurrency: int = settings.LLM_CONCURRENCY,
+        retries: int = settings.LLM_RETRIES,
+        timeout: float = settings.LLM_TIMEOUT,
+        backoff: float = 2.0,
+        max_backoff: float = 60.0,
+    ):
+        self.chain = chain
+        self.retries = retries
+        self.timeout = timeout
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.stats = CallStats()
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        if retry_after is not None:
+            return min(self.max_backoff, retry_after)
+        delay = min(self.max_backoff, self.backoff * 2**attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    async def invoke(self, inputs: Dict[str, Any]) -> CallResult:
+        async with self._semaphore:
+            attempt = 0
+            while True:
+                start = time.monotonic()
+                try:
+                    value = await asyncio.wait_for(self.chain.ainvoke(inputs), self.timeout)
+                    latency = time.monotonic() - start
+                    self.stats.latencies.append(latency)
+                    return CallResult(value, latency, attempt + 1)
+                except RETRYABLE_ERRORS as e:
+                    if isinstance(e, openai.RateLimitError):
+                        self.stats.rate_limited += 1
+                    elif isinstance(e, asyncio.TimeoutError):
+                        self.stats.timeouts += 1
+                    if attempt >= self.retries:
+                        self.stats.failures += 1
+                        raise
+                    self.stats.retries += 1
+                    await asyncio.sleep(self.backoff_delay(attempt, retry_after(e)))
+                    attempt += 1
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+_WORD = re.compile(r"[a-zà-ÿ]{8,}")
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Offline stand-in for the chat model. It answers with the most frequent long words of the motion titles as
+    subjects, after `latency` seconds. With `max_concurrent` it behaves like a rate limited API: a call made while that
+    many are in flight fails with a RateLimitError.
+    """
+
+    latency: float = 0.0
+    max_concurrent: Optional[int] = None
+    retry_after: Optional[float] = None
+
+    _in_flight: int = PrivateAttr(default=0)
+    _calls: int = PrivateAttr(default=0)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-disagreements"
+
+    @property
+    def calls(self) -> int:
+        return self._calls
+
+    def _answer(self, messages: List[BaseMessage]) -> AIMessage:
+        words = Counter(_WORD.findall(str(messages[-1].content).lower()))
+        party_a, party_b = re.findall(r"De partijen zijn: (.+) en (.+)", str(messages[0].content))[0]
+        disagreements = Disagreements(
+            subjects=[
+                {
+                    "subject": word.capitalize(),
+                    "explanation": f"{party_a} en {party_b} verschillen op het gebied van {word}, in {count} moties.",
+                }
+                for word, count in words.most_common(5)
+            ]
+        )
+        content = disagreements.model_dump_json()
+        # Roughly one token per word
+        input_tokens = sum(len(str(message.content).split()) for message in messages)
+        output_tokens = len(content.split())
+        return AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+        )
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self._calls += 1
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._answer(messages))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self._calls += 1
+        if self.max_concurrent is not None and self._in_flight >= self.max_concurrent:
+            headers = {"retry-after": str(self.retry_after)} if self.retry_after is not None else {}
+            response = httpx.Response(429, headers=headers, request=httpx.Request("POST", "https://fake.invalid"))
+            raise openai.RateLimitError("Rate limit reached", response=response, body=None)
+        self._in_flight += 1
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self._in_flight -= 1
+        return ChatResult(generations=[ChatGeneration(message=self._answer(messages))])
+
+    def with_structured_output(self, schema, *, include_raw: bool = False, **kwargs) -> Runnable:
+        if include_raw:
+            return self | RunnableLambda(
+                lambda message: {
+                    "raw": message,
+                    "parsed": schema.model_validate_json(message.content),
+                    "parsing_error": None,
+                }
+            )
+        return self | RunnableLambda(lambda message: schema.model_validate_json(message.content))
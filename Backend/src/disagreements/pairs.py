@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+import itertools
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from src.data.matrix import ABSENT
+from src.data.votes import VoteStore
+
+PartyPair = Tuple[str, str]
+
+
+def party_pairs(parties: Sequence[str]) -> List[PartyPair]:
+    """
+    Every pair of parties once, each in alphabetic order as the cache files and the API expect.
+    """
+    return [tuple(sorted(pair)) for pair in itertools.combinations(parties, 2)]
+
+
+def disagreeing_titles(store: VoteStore, pairs: Sequence[PartyPair]) -> Dict[PartyPair, List[str]]:
+    """
+    The titles of the motions each pair voted differently on, as selected by `VoteStore.disagreeing`, for all pairs in
+    one pass over the votes: the masks of all pairs are computed as one (motions, pairs) array, and the titles are
+    decoded once and shared between pairs.
+    """
+    if not pairs:
+        return {}
+    columns = {party: k for k, party in enumerate(store.encoded.parties)}
+    first = np.array([columns[party_a] for party_a, _ in pairs])
+    second = np.array([columns[party_b] for _, party_b in pairs])
+
+    codes = store.encoded.codes
+    present = codes != ABSENT
+    masks = present[:, first] & present[:, second] & (codes[:, first] != codes[:, second])
+
+    titles = list(store.titles)
+    return {pair: [titles[row] for row in np.flatnonzero(masks[:, k]).tolist()] for k, pair in enumerate(pairs)}
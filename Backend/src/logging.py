@@ -1,12 +1,212 @@
 # -*- coding: utf-8 -*-
+import atexit
 import logging as log
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, TextIO
 
 import structlog
-from structlog.stdlib import BoundLogger
+from structlog.typing import EventDict, FilteringBoundLogger, Processor, WrappedLogger
 
 from src.config import settings
 
-logger: BoundLogger = structlog.get_logger()
+
+def parse_sample_rates(values: List[str]) -> Dict[str, float]:
+    """
+    Parses `event=rate` items into a mapping of event name to the fraction of its records that is kept.
+    """
+    rates: Dict[str, float] = {}
+    for item in values:
+        event, _, rate = item.partition("=")
+        rates[event.strip()] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+class Sampler:
+    """
+    Processor that keeps only a fraction of the records of the configured events. Kept records carry their
+    `sample_rate`, so counts can be scaled back up; dropped records are counted per event.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        self.rates = rates
+        self.dropped: Counter = Counter()
+
+    def __call__(self, _: WrappedLogger, __: str, event_dict: EventDict) -> EventDict:
+        rate = self.rates.get(event_dict.get("event"))
+        if rate is None:
+            return event_dict
+        if random.random() >= rate:
+            self.dropped[event_dict["event"]] += 1
+            raise structlog.DropEvent
+        event_dict["sample_rate"] = rate
+        return event_dict
+
+
+def add_timestamp(_: WrappedLogger, __: str, event_dict: EventDict) -> EventDict:
+    # Only take the time here, it is formatted by the writer thread
+    event_dict["timestamp"] = time.time()
+    return event_dict
+
+
+def capture_exc_info(_: WrappedLogger, __: str, event_dict: EventDict) -> EventDict:
+    # `exc_info=True` refers to the exception being handled, which only the calling thread knows
+    if event_dict.get("exc_info") is True:
+        event_dict["exc_info"] = sys.exc_info()
+    return event_dict
+
+
+class LogWriter:
+    """
+    Renders and writes log records on a background thread. The calling thread only puts the event dict on a bounded
+    queue; when the queue is full the record is dropped and counted instead of blocking the request.
+    """
+
+    def __init__(self, renderer: List[Processor], stream: TextIO = sys.stdout, max_queue: int = 10000):
+        self.renderer = renderer
+        self.stream = stream
+        self.max_queue = max_queue
+        self.stats: Counter = Counter()
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "LogWriter":
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def restart(self) -> None:
+        # After a fork the queue's lock may be held by a thread that no longer exists, so start over from scratch
+        self._queue = queue.Queue(maxsize=self.max_queue)
+        self.start()
+
+    def submit(self, event_dict: EventDict) -> None:
+        try:
+            self._queue.put_nowait(event_dict)
+        except queue.Full:
+            self.stats["dropped_queue_full"] += 1
+
+    def render(self, event_dict: EventDict) -> str:
+        event_dict["timestamp"] = datetime.fromtimestamp(event_dict["timestamp"], timezone.utc).isoformat()
+        for processor in self.renderer:
+            event_dict = processor(None, event_dict.get("level", "info"), event_dict)
+        return event_dict
+
+    def _run(self) -> None:
+        while True:
+            records = [self._queue.get()]
+            # Write everything that is already waiting in one go, and only flush once the queue is drained
+            while len(records) < 1000:
+                try:
+                    records.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            lines = []
+            for record in records:
+                if record is None:
+                    continue
+                try:
+                    lines.append(self.render(record))
+                except Exception:
+                    self.stats["render_errors"] += 1
+            if lines:
+                self.stream.write("\n".join(lines) + "\n")
+                self.stream.flush()
+                self.stats["written"] += len(lines)
+            if None in records:
+                return
+
+    def close(self, timeout: float = 2.0) -> None:
+        """
+        Writes the records that are still queued and stops the thread.
+        """
+        if self._thread is None or not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+
+class QueueLogger:
+    """
+    The structlog logger at the end of the processor chain: it hands the event dict to the writer.
+    """
+
+    def __init__(self, writer: LogWriter):
+        self._writer = writer
+
+    def msg(self, **event_dict: Any) -> None:
+        self._writer.submit(event_dict)
+
+    log = debug = info = warn = warning = msg
+    fatal = failure = err = error = critical = exception = msg
+
+
+class LoggingPipeline(NamedTuple):
+    writer: LogWriter
+    sampler: Sampler
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Counters of the pipeline: records written, still queued, dropped because the queue was full, and dropped by
+        sampling.
+        """
+        return {
+            "written": self.writer.stats["written"],
+            "queued": self.writer._queue.qsize(),
+            "dropped_queue_full": self.writer.stats["dropped_queue_full"],
+            "dropped_sampled": sum(self.sampler.dropped.values()),
+            "render_errors": self.writer.stats["render_errors"],
+        }
+
+
+def configure_logging(
+    level: str = settings.LOG_LEVEL,
+    log_format: str = settings.LOG_FORMAT,
+    stream: TextIO = sys.stdout,
+    max_queue: int = settings.LOG_QUEUE_SIZE,
+    sample_rates: Optional[Dict[str, float]] = None,
+) -> LoggingPipeline:
+    """
+    Configures structlog and starts the writer thread. Calls below `level` are no-ops on the filtering bound logger,
+    so they do not even build their event dict.
+    """
+    if log_format == "console":
+        renderer: List[Processor] = [structlog.dev.ConsoleRenderer()]
+    else:
+        renderer = [structlog.processors.format_exc_info, structlog.processors.JSONRenderer()]
+    writer = LogWriter(renderer, stream=stream, max_queue=max_queue).start()
+    sampler = Sampler(sample_rates or {})
+
+    structlog.configure(
+        processors=[
+            structlog.contextvars.merge_contextvars,
+            structlog.processors.add_log_level,
+            sampler,
+            add_timestamp,
+            capture_exc_info,
+        ],
+        wrapper_class=structlog.make_filtering_bound_logger(getattr(log, level.upper(), log.INFO)),
+        logger_factory=lambda *_: QueueLogger(writer),
+        cache_logger_on_first_use=True,
+    )
+    return LoggingPipeline(writer, sampler)
+
+
+LOGGING: LoggingPipeline = configure_logging(sample_rates=parse_sample_rates(settings.LOG_SAMPLE_RATES))
+atexit.register(LOGGING.writer.close)
+os.register_at_fork(after_in_child=LOGGING.writer.restart)
+
+logger: FilteringBoundLogger = structlog.get_logger()
 logger.info(
     "logging_initialized",
     environment=settings.ENVIRONMENT.value,
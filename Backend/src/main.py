@@ -1,28 +1,47 @@
 # -*- coding: utf-8 -*-
+import asyncio
+import contextlib
+import hmac
+import os
+import signal
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 
-from fastapi import FastAPI, Request, status
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Header, HTTPException, Request, status
+from fastapi.responses import JSONResponse, Response
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 
 from src.api.v1.router import api_router
+from src.api.v1.votes.router import SNAPSHOTS
 from src.config import settings
 from src.logging import logger
+from src.api.metrics import CONTENT_TYPE, REGISTRY
 from src.api.middlewares.auth import setup_auth_middleware
+from src.api.middlewares.metrics import setup_metrics_middleware
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI) -> AsyncGenerator[None, None]:
     """Handle application startup and shutdown events."""
+    # Only the bundle is opened here; the vote store and what is built from it are loaded on first use
+    snapshot = await SNAPSHOTS.load()
     logger.info(
         "application_startup",
         project_name=settings.PROJECT_NAME,
         version=settings.VERSION,
         api_prefix=settings.API_V1_STR,
+        data_version=snapshot.version,
     )
+    watcher = None
+    # A worker of the pre-forking server (`src.server`) leaves this to its parent
+    if settings.DATA_RELOAD_INTERVAL > 0 and not SNAPSHOTS.reloads_in_parent:
+        watcher = asyncio.create_task(SNAPSHOTS.watch(settings.DATA_RELOAD_INTERVAL))
     yield
+    if watcher is not None:
+        watcher.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await watcher
     logger.info("application_shutdown")
 
 
@@ -82,6 +101,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+setup_metrics_middleware(app=app)  # Request metrics, added last so it wraps the other middlewares
+
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -90,10 +111,45 @@ app.include_router(api_router, prefix=settings.API_V1_STR)
 async def root(_: Request) -> dict:
     """Root endpoint returning basic API information."""
     logger.info("root_endpoint_called")
+    snapshot = SNAPSHOTS.current
     return {
         "name": settings.PROJECT_NAME,
         "version": settings.VERSION,
         "status": "healthy",
         "environment": settings.ENVIRONMENT.value,
+        "data_version": snapshot.version,
+        "data_loaded_at": snapshot.loaded_at.isoformat(),
         "swagger_url": "/docs",
     }
+
+
+@app.post("/admin/reload", include_in_schema=False)
+async def reload_data(x_admin_token: Optional[str] = Header(None)) -> Response:
+    """
+    Loads the data files into a new snapshot and swaps it in. Requests keep being served from the current snapshot
+    while the new one is built. In a worker of the pre-forking server, the parent is asked to reload instead, which it
+    does in the background before replacing all workers; the response (202) then carries the version still served.
+    """
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token.encode(), settings.ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    previous = SNAPSHOTS.current.version
+    if SNAPSHOTS.reloads_in_parent:
+        os.kill(os.getppid(), signal.SIGHUP)
+        logger.info("admin_reload_requested", version=previous)
+        return JSONResponse(status_code=202, content={"reload_requested": True, "data_version": previous})
+    reloaded = await SNAPSHOTS.reload()
+    logger.info("admin_reload", reloaded=reloaded, previous_version=previous, version=SNAPSHOTS.current.version)
+    return JSONResponse(
+        content={"reloaded": reloaded, "previous_version": previous, "data_version": SNAPSHOTS.current.version}
+    )
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """
+    Request, data loading and logging metrics in the Prometheus text format. Under the pre-forking server these are
+    the metrics of the worker that answers, not of the server as a whole.
+    """
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
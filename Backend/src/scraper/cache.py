@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from pydantic import BaseModel
+
+from src.scraper.parser import PARSER_VERSION
+
+
+class CacheEntry(BaseModel):
+    url: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    encoding: str = "utf-8"
+    content_hash: str
+    size: int
+    fetched_at: float
+    last_used: float
+    parsed_hash: Optional[str] = None  # content_hash of the body the stored parse result belongs to
+    parser_version: Optional[int] = None  # PARSER_VERSION of the parser that produced the stored parse result
+
+
+def url_key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def content_hash(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+def parse_duration(value: str) -> float:
+    """
+    Parses a duration like "90s", "30m", "12h" or "7d" (a bare number means days) into seconds.
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*", value)
+    if match is None:
+        raise ValueError(f"Invalid duration: {value!r}")
+    amount, unit = match.groups()
+    return float(amount) * {"s": 1, "m": 60, "h": 3600, "d": 86400, "": 86400}[unit]
+
+
+class ResponseCache:
+    """
+    On-disk HTTP response cache for the scraper, keyed by URL. Stores each body with its ETag / Last-Modified headers,
+    so it can be revalidated with a conditional request, and optionally the parse result of that body, so an unchanged
+    page does not need to be parsed again until the parser changes.
+
+    Bodies are evicted least-recently-used first once the cache grows beyond `max_bytes`. Entries fetched less than
+    `refresh_older_than` seconds ago are served without contacting the server at all.
+    """
+
+    INDEX_FILE = "index.json"
+    SAVE_EVERY = 200
+
+    def __init__(self, directory: Path, max_bytes: int, refresh_older_than: Optional[float] = None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.refresh_older_than = refresh_older_than
+        self.entries: Dict[str, CacheEntry] = {}
+        self.total_bytes = 0
+        self._unsaved = 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._load_index()
+
+    def _body_path(self, url: str) -> Path:
+        return self.directory / f"{url_key(url)}.body"
+
+    def _parsed_path(self, url: str) -> Path:
+        return self.directory / f"{url_key(url)}.parsed.json"
+
+    def _load_index(self) -> None:
+        index_file = self.directory / self.INDEX_FILE
+        if not index_file.exists():
+            return
+        try:
+            raw = json.loads(index_file.read_text(encoding="utf-8"))
+        except ValueError:
+            return
+        for data in raw.values():
+            entry = CacheEntry.model_validate(data)
+            if self._body_path(entry.url).exists():
+                self.entries[entry.url] = entry
+                self.total_bytes += entry.size
+
+    def save(self) -> None:
+        index_file = self.directory / self.INDEX_FILE
+        tmp_file = index_file.with_suffix(".json.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as file:
+            json.dump({url: entry.model_dump() for url, entry in self.entries.items()}, file)
+        os.replace(tmp_file, index_file)
+        self._unsaved = 0
+
+    def _changed(self) -> None:
+        self._unsaved += 1
+        if self._unsaved >= self.SAVE_EVERY:
+            self.save()
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        entry = self.entries.get(url)
+        if entry is not None:
+            entry.last_used = time.time()
+        return entry
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        if self.refresh_older_than is None:
+            return False
+        return time.time() - entry.fetched_at < self.refresh_older_than
+
+    @staticmethod
+    def conditional_headers(entry: CacheEntry) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def read_body(self, entry: CacheEntry) -> str:
+        return self._body_path(entry.url).read_bytes().decode(entry.encoding)
+
+    def revalidated(self, entry: CacheEntry) -> None:
+        """
+        Records that the server answered 304 Not Modified for this entry.
+        """
+        entry.fetched_at = entry.last_used = time.time()
+        self._changed()
+
+    def store(
+        self,
+        url: str,
+        body: bytes,
+        encoding: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> bool:
+        """
+        Stores a freshly downloaded body. Returns whether the content differs from what was cached before.
+        """
+        digest = content_hash(body)
+        previous = self.entries.get(url)
+        now = time.time()
+        if previous is not None and previous.content_hash == digest:
+            previous.etag, previous.last_modified = etag, last_modified
+            previous.fetched_at = previous.last_used = now
+            self._changed()
+            return False
+
+        if previous is not None:
+            self.total_bytes -= previous.size
+        self._body_path(url).write_bytes(body)
+        self.entries[url] = CacheEntry(
+            url=url,
+            etag=etag,
+            last_modified=last_modified,
+            encoding=encoding,
+            content_hash=digest,
+            size=len(body),
+            fetched_at=now,
+            last_used=now,
+        )
+        self.total_bytes += len(body)
+        self.evict()
+        self._changed()
+        return True
+
+    def read_parsed(self, entry: CacheEntry) -> Optional[str]:
+        """
+        The stored parse result of the cached body, or None if there is none, or if the parser has changed since.
+        """
+        if entry.parsed_hash != entry.content_hash or entry.parser_version != PARSER_VERSION:
+            return None
+        path = self._parsed_path(entry.url)
+        return path.read_text(encoding="utf-8") if path.exists() else None
+
+    def store_parsed(self, url: str, parsed: str) -> None:
+        entry = self.entries.get(url)
+        if entry is None:
+            return
+        self._parsed_path(url).write_text(parsed, encoding="utf-8")
+        entry.parsed_hash = entry.content_hash
+        entry.parser_version = PARSER_VERSION
+        self._changed()
+
+    def evict(self) -> None:
+        if self.total_bytes <= self.max_bytes:
+            return
+        for entry in sorted(self.entries.values(), key=lambda e: e.last_used):
+            if self.total_bytes <= self.max_bytes:
+                break
+            self._body_path(entry.url).unlink(missing_ok=True)
+            self._parsed_path(entry.url).unlink(missing_ok=True)
+            del self.entries[entry.url]
+            self.total_bytes -= entry.size
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import random
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+import aiohttp
+
+from src.config import settings
+from src.scraper.cache import CacheEntry, ResponseCache
+
+# Statuses worth another attempt: the server is overloaded, rate limiting us or temporarily unavailable. Anything else
+# in the 4xx/5xx range is treated as permanent (e.g. a motion page that does not exist).
+RETRYABLE_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+class RetryableFetchError(Exception):
+    def __init__(self, url: str, reason: str, retry_after: Optional[float] = None):
+        super().__init__(f"{reason} ({url})")
+        self.url = url
+        self.retry_after = retry_after
+
+
+# Network-level failures that are retried the same way as a retryable status
+TRANSIENT_ERRORS = (
+    RetryableFetchError,
+    aiohttp.ClientConnectionError,
+    aiohttp.ClientPayloadError,
+    asyncio.TimeoutError,
+)
+
+
+class FetchResult(NamedTuple):
+    text: str
+    changed: bool  # False if the body is identical to the cached copy (fresh cache hit, 304, or same content hash)
+    parsed: Optional[str] = None  # Cached parse result, only set for unchanged bodies that were parsed before
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter: allows bursts of up to `capacity` requests, refilled at `rate` tokens per second.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class FetchStats:
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self.latencies: List[float] = []
+        self.bytes = 0
+        self.retries = 0
+        self.failures = 0
+        self.cache_hits = 0
+        self.not_modified = 0
+        self.unchanged = 0
+        self.statuses: Dict[int, int] = {}
+
+    def record(self, status: int, latency: float, size: int = 0) -> None:
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.latencies.append(latency)
+        self.bytes += size
+
+    def percentile(self, q: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+    def summary(self) -> Dict[str, float]:
+        elapsed = time.monotonic() - self.started
+        return {
+            "requests": len(self.latencies),
+            "retries": self.retries,
+            "failures": self.failures,
+            "cache_hits": self.cache_hits,
+            "not_modified": self.not_modified,
+            "unchanged": self.unchanged,
+            "elapsed_s": round(elapsed, 2),
+            "requests_per_s": round(len(self.latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+            "megabytes": round(self.bytes / 1e6, 2),
+            "latency_p50_ms": round(self.percentile(50) * 1000, 1),
+            "latency_p95_ms": round(self.percentile(95) * 1000, 1),
+            "latency_p99_ms": round(self.percentile(99) * 1000, 1),
+        }
+
+    def __str__(self) -> str:
+        return ", ".join(f"{key}={value}" for key, value in self.summary().items())
+
+
+class FetchScheduler:
+    """
+    Shared HTTP layer for the scraper. Bounds the number of requests in flight to `workers`, spaces them out with a
+    token bucket, pools connections per host and retries transient failures with exponential backoff and jitter.
+
+    With a `ResponseCache`, requests for cached URLs are made conditional (If-None-Match / If-Modified-Since), and
+    `fetch_response` reports whether the body actually changed.
+
+    Use it as an async context manager:
+
+        async with FetchScheduler() as scheduler:
+            html = await scheduler.fetch(url)
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.SCRAPE_WORKERS,
+        rate_limit: float = settings.SCRAPE_RATE_LIMIT,
+        retries: int = settings.SCRAPE_RETRIES,
+        timeout: float = settings.SCRAPE_TIMEOUT,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        user_agent: str = settings.USER_AGENT,
+        cache: Optional[ResponseCache] = None,
+    ):
+        self.workers = workers
+        self.retries = retries
+        self.timeout = timeout
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.user_agent = user_agent
+        self.cache = cache
+        self.stats = FetchStats()
+        self._bucket = TokenBucket(rate=rate_limit)
+        self._semaphore = asyncio.Semaphore(workers)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> "FetchScheduler":
+        connector = aiohttp.TCPConnector(
+            limit=self.workers,
+            limit_per_host=self.workers,
+            ttl_dns_cache=300,
+            keepalive_timeout=30,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={"User-Agent": self.user_agent},
+        )
+        self.stats = FetchStats()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        if self.cache is not None:
+            self.cache.save()
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        if retry_after is not None:
+            return min(self.max_backoff, retry_after)
+        delay = min(self.max_backoff, self.backoff * 2**attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    async def fetch(self, url: str, revalidate: bool = False) -> str:
+        """
+        Fetches `url` and returns the body as text. Raises `aiohttp.ClientResponseError` for permanent HTTP errors, and
+        `RetryableFetchError` (or the last network error) once all retries are used up.
+        """
+        return (await self.fetch_response(url, revalidate)).text
+
+    async def fetch_response(self, url: str, revalidate: bool = False) -> FetchResult:
+        """
+        Like `fetch`, but also reports whether the body changed since it was cached. With `revalidate`, a cached copy is
+        never served without asking the server, however recently it was fetched.
+        """
+        entry = self.cache.get(url) if self.cache is not None else None
+        if entry is not None and not revalidate and self.cache.is_fresh(entry):
+            self.stats.cache_hits += 1
+            return self._unchanged(entry)
+
+        async with self._semaphore:
+            attempt = 0
+            while True:
+                await self._bucket.acquire()
+                try:
+                    return await self._fetch_once(url, entry)
+                except TRANSIENT_ERRORS as e:
+                    if attempt >= self.retries:
+                        self.stats.failures += 1
+                        raise
+                    retry_after = e.retry_after if isinstance(e, RetryableFetchError) else None
+                    self.stats.retries += 1
+                    await asyncio.sleep(self.backoff_delay(attempt, retry_after))
+                    attempt += 1
+                except aiohttp.ClientResponseError:
+                    self.stats.failures += 1
+                    raise
+
+    def _unchanged(self, entry: CacheEntry) -> FetchResult:
+        return FetchResult(text=self.cache.read_body(entry), changed=False, parsed=self.cache.read_parsed(entry))
+
+    async def _fetch_once(self, url: str, entry: Optional[CacheEntry]) -> FetchResult:
+        if self._session is None:
+            raise RuntimeError("FetchScheduler must be used as an async context manager")
+        headers = ResponseCache.conditional_headers(entry) if entry is not None else {}
+        start = time.monotonic()
+        async with self._session.get(url, headers=headers) as response:
+            if response.status in RETRYABLE_STATUSES:
+                self.stats.record(response.status, time.monotonic() - start)
+                raise RetryableFetchError(url, f"HTTP {response.status}", parse_retry_after(response))
+            if response.status == 304 and entry is not None:
+                self.stats.record(response.status, time.monotonic() - start)
+                self.stats.not_modified += 1
+                self.cache.revalidated(entry)
+                return self._unchanged(entry)
+            response.raise_for_status()
+            body = await response.read()
+            self.stats.record(response.status, time.monotonic() - start, len(body))
+            encoding = response.get_encoding()
+
+        if self.cache is None:
+            return FetchResult(text=body.decode(encoding), changed=True)
+        changed = self.cache.store(
+            url,
+            body,
+            encoding,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+        if not changed:
+            self.stats.unchanged += 1
+            return self._unchanged(self.cache.entries[url])
+        return FetchResult(text=body.decode(encoding), changed=True)
+
+
+def parse_retry_after(response: aiohttp.ClientResponse) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
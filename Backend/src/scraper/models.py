@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from typing import Dict, List, Optional, Union
+
+from pydantic import BaseModel
+
+
+class ParliamentMotionLocator(BaseModel):
+    id: str
+    did: str
+    url: str
+
+
+class PartyVote(BaseModel):
+    party: str
+    seats: int
+    vote: str
+    # Only for factions whose members did not all vote the same way: the number of members per vote
+    split: Optional[Dict[str, int]] = None
+
+
+class ParliamentMotion(BaseModel):
+    id: str
+    did: str
+    url: str
+    title: str
+    votes: List[PartyVote]
+
+
+class ParliamentMotionDataset(BaseModel):
+    motions: List[Union[ParliamentMotionLocator, ParliamentMotion]]
+
+
+class NoTableFound(Exception):
+    pass
@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+import re
+from collections import Counter
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+
+from src.scraper.models import NoTableFound, ParliamentMotion, ParliamentMotionLocator, PartyVote
+
+# Version of the motions `parse_motion` returns. Raise it with every change to the parser or to `ParliamentMotion` that
+# changes what is parsed from a page, so the parse results the scraper cached for unchanged pages are not reused.
+PARSER_VERSION = 2
+
+FACTION_COLUMN = "Fracties"
+SEATS_COLUMN = "Zetels"
+VOTE_COLUMN = "Voor/Tegen"
+
+# Same whitespace normalisation and missing-value strings as `pandas.read_html`, so the parsed values match the
+# BeautifulSoup + pandas pipeline this parser replaces.
+_WHITESPACE = re.compile(r"[\r\n]+|\s{2,}")
+_NA_VALUES = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA",
+    "NULL", "NaN", "None", "n/a", "nan", "null",
+})
+
+# (text, rowspan, colspan)
+Cell = Tuple[str, int, int]
+
+
+class _Row:
+    def __init__(self, section: Optional[str]):
+        self.section = section
+        self.cells: List[Cell] = []
+        self.all_th = True
+
+
+class MotionPageParser(HTMLParser):
+    """
+    Single-pass extractor for a motion detail page. Collects the text of the first `<h1>` and the rows of the first
+    `<table>` from the parser events, without building a document tree.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.title: Optional[str] = None
+        self.found_table = False
+        self.rows: List[_Row] = []
+
+        self._h1_depth = 0
+        self._h1_parts: List[str] = []
+        self._skip_depth = 0  # Inside <script> or <style>
+        self._table_depth = 0  # Nesting depth while inside the first table
+        self._table_done = False
+        self._section: Optional[str] = None
+        self._row: Optional[_Row] = None
+        self._cell: Optional[List[str]] = None
+        self._cell_spans = (1, 1)
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag in ("script", "style"):
+            self._skip_depth += 1
+        elif tag == "h1" and self.title is None:
+            self._h1_depth += 1
+        elif tag == "table" and not self._table_done:
+            self.found_table = True
+            self._table_depth += 1
+        elif self._table_depth == 1:
+            if tag in ("thead", "tbody", "tfoot"):
+                self._close_row()
+                self._section = tag
+            elif tag == "tr":
+                self._close_row()
+                self._row = _Row(self._section)
+            elif tag in ("td", "th"):
+                self._close_cell()
+                if self._row is None:
+                    self._row = _Row(self._section)
+                attributes = dict(attrs)
+                self._cell = []
+                self._cell_spans = (_span(attributes.get("rowspan")), _span(attributes.get("colspan")))
+                if tag == "td":
+                    self._row.all_th = False
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in ("script", "style"):
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == "h1" and self._h1_depth > 0:
+            self._h1_depth -= 1
+            if self._h1_depth == 0:
+                self.title = "".join(self._h1_parts)
+        elif tag == "table" and self._table_depth > 0:
+            self._table_depth -= 1
+            if self._table_depth == 0:
+                self._close_row()
+                self._table_done = True
+        elif self._table_depth == 1:
+            if tag in ("td", "th"):
+                self._close_cell()
+            elif tag == "tr":
+                self._close_row()
+            elif tag in ("thead", "tbody", "tfoot"):
+                self._close_row()
+                self._section = None
+
+    def handle_data(self, data: str) -> None:
+        if self._skip_depth:
+            return
+        if self._h1_depth > 0:
+            self._h1_parts.append(data)
+        if self._cell is not None:
+            self._cell.append(data)
+
+    def _close_cell(self) -> None:
+        if self._cell is None or self._row is None:
+            return
+        text = _WHITESPACE.sub(" ", "".join(self._cell).strip())
+        self._row.cells.append((text, *self._cell_spans))
+        self._cell = None
+
+    def _close_row(self) -> None:
+        self._close_cell()
+        if self._row is not None and self._row.cells:
+            self.rows.append(self._row)
+        self._row = None
+
+    def close(self) -> None:
+        super().close()
+        if self._h1_depth > 0 and self.title is None:
+            self.title = "".join(self._h1_parts)
+        self._close_row()
+
+
+def _span(value: Optional[str]) -> int:
+    try:
+        return max(1, int(value)) if value else 1
+    except ValueError:
+        return 1
+
+
+def expand_spans(rows: List[List[Cell]]) -> List[List[str]]:
+    """
+    Repeats the text of cells with a colspan or rowspan into every position they cover, like `pandas.read_html`.
+    """
+    all_texts: List[List[str]] = []
+    remainder: List[Tuple[int, str, int]] = []  # (column, text, rows left) carried over from rowspans above
+
+    for cells in rows:
+        texts: List[str] = []
+        next_remainder: List[Tuple[int, str, int]] = []
+        index = 0
+        for text, rowspan, colspan in cells:
+            while remainder and remainder[0][0] <= index:
+                _, prev_text, prev_rowspan = remainder.pop(0)
+                texts.append(prev_text)
+                if prev_rowspan > 1:
+                    next_remainder.append((len(texts) - 1, prev_text, prev_rowspan - 1))
+                index += 1
+            for _ in range(colspan):
+                texts.append(text)
+                if rowspan > 1:
+                    next_remainder.append((len(texts) - 1, text, rowspan - 1))
+                index += 1
+        for _, prev_text, prev_rowspan in remainder:
+            texts.append(prev_text)
+            if prev_rowspan > 1:
+                next_remainder.append((len(texts) - 1, prev_text, prev_rowspan - 1))
+        all_texts.append(texts)
+        remainder = next_remainder
+
+    while remainder:
+        next_remainder = []
+        texts = []
+        for _, prev_text, prev_rowspan in remainder:
+            texts.append(prev_text)
+            if prev_rowspan > 1:
+                next_remainder.append((len(texts) - 1, prev_text, prev_rowspan - 1))
+        all_texts.append(texts)
+        remainder = next_remainder
+
+    return all_texts
+
+
+def _value(text: str) -> Optional[str]:
+    return None if text in _NA_VALUES else text
+
+
+def _seats(text: str) -> float:
+    value = _value(text)
+    return 0.0 if value is None else float(value)
+
+
+def faction_seat_count(row_seats: List[float]) -> float:
+    """
+    The seats of a faction from those of its rows. In a roll-call vote every member has a row that repeats the seats of
+    the whole faction (members who did not vote may be left out), so rows that all repeat a count at least as large as
+    their number are taken to be those, and the count is the seats. Otherwise each row counts its own seats, as the
+    single row of a faction or the rows of members voting one seat each do, and they are summed.
+    """
+    if len(row_seats) > 1 and len(set(row_seats)) == 1 and row_seats[0] >= len(row_seats):
+        return row_seats[0]
+    return sum(row_seats)
+
+
+def aggregate_votes(header: List[str], body: List[List[str]]) -> List[PartyVote]:
+    """
+    Collapses the member/faction rows into one vote per faction: the vote is the most common one (ties broken
+    alphabetically, no vote at all becomes ""). When the members of a faction voted differently, the number of members
+    per vote is kept as the split. The seats are counted by `faction_seat_count`. Factions come out in sorted order.
+    """
+    try:
+        columns = [header.index(name) for name in (FACTION_COLUMN, SEATS_COLUMN, VOTE_COLUMN)]
+    except ValueError:
+        raise ValueError(f"Vote table is missing one of the columns {FACTION_COLUMN}, {SEATS_COLUMN}, {VOTE_COLUMN}")
+
+    seats: Dict[str, List[float]] = {}
+    votes: Dict[str, Counter] = {}
+    for row in body:
+        faction, seat_count, vote = (_value(row[c]) if c < len(row) else None for c in columns)
+        if faction is None:
+            continue
+        seats.setdefault(faction, []).append(0.0 if seat_count is None else _seats(seat_count))
+        counter = votes.setdefault(faction, Counter())
+        if vote is not None:
+            counter[vote] += 1
+
+    result: List[PartyVote] = []
+    for faction in sorted(seats):
+        faction_seats = faction_seat_count(seats[faction])
+        counter = votes[faction]
+        if counter:
+            top = max(counter.values())
+            vote = min(v for v, n in counter.items() if n == top)
+        else:
+            vote = ""
+        split = dict(sorted(counter.items())) if len(counter) > 1 else None
+        result.append(PartyVote(party=faction, seats=int(faction_seats), vote=vote, split=split))
+    return result
+
+
+def parse_motion_page(html_content: str) -> Tuple[str, List[PartyVote]]:
+    """
+    Extracts the title and the per-faction votes from the html of a motion detail page.
+    """
+    parser = MotionPageParser()
+    parser.feed(html_content)
+    parser.close()
+
+    if not parser.found_table:
+        raise NoTableFound()
+    if parser.title is None:
+        raise ValueError("Motion page has no title")
+
+    header_rows = [row for row in parser.rows if row.section == "thead"]
+    body_rows = [row for row in parser.rows if row.section not in ("thead", "tfoot")]
+    footer_rows = [row for row in parser.rows if row.section == "tfoot"]
+    if not header_rows:
+        while body_rows and body_rows[0].all_th:
+            header_rows.append(body_rows.pop(0))
+    if not header_rows:
+        raise ValueError("Vote table has no header row")
+
+    header = expand_spans([row.cells for row in header_rows])[0]
+    body = expand_spans([row.cells for row in body_rows]) + expand_spans([row.cells for row in footer_rows])
+    return parser.title, aggregate_votes(header, body)
+
+
+def parse_motion(motion: ParliamentMotionLocator, html_content: str) -> ParliamentMotion:
+    """
+    This function parses the votes and title from the html of a motion page.
+    """
+    title, votes = parse_motion_page(html_content)
+    return ParliamentMotion(
+        id=motion.id,
+        did=motion.did,
+        url=motion.url,
+        title=title,
+        votes=votes,
+    )
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Optional, TypeVar
+
+from src.config import settings
+
+T = TypeVar("T")
+
+
+class ParsePool:
+    """
+    Runs the CPU-bound page parsing in worker processes, so the event loop only moves bytes and every download keeps
+    progressing while pages are parsed on the other cores. With `processes=0` parsing happens inline on the event loop.
+
+    `slot()` provides the backpressure between fetching and parsing: a page may only be fetched while holding a slot,
+    and the slot is released once it is parsed. With `max_pending` slots, at most that many pages are downloaded but not
+    yet parsed, so fetching pauses whenever the parse workers fall behind.
+    """
+
+    def __init__(self, processes: int = settings.SCRAPE_PARSE_PROCESSES, max_pending: Optional[int] = None):
+        self.processes = processes
+        self.max_pending = max_pending or max(1, processes) * 4
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots = asyncio.Semaphore(self.max_pending)
+
+    def __enter__(self) -> "ParsePool":
+        if self.processes > 0:
+            self._executor = ProcessPoolExecutor(max_workers=self.processes)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        if self._executor is None:
+            yield
+            return
+        async with self._slots:
+            yield
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        """
+        Runs `fn(*args)` in a worker process. `fn` and its arguments must be picklable, i.e. module-level functions and
+        plain data or pydantic models.
+        """
+        if self._executor is None:
+            return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
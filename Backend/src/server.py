@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Pre-forking server for the API. The data is loaded once in the parent process (the bundle and the vote store are
+memory-mapped, the windowed counts and the search index are built), the heap is frozen, and only then are the workers
+forked. They all serve from the parent's pages, which the kernel shares until a worker writes to them, instead of each
+importing the app and building the data on its own as `uvicorn --workers` does.
+
+With several workers, the parent also watches the data files and reloads them (see `Supervisor`); `kill -HUP` on the
+parent, or POST /admin/reload on any worker, reloads them at once. Each worker keeps its own metrics, so /metrics
+reports the worker that answered it, and its request counts start over when the workers are replaced after a reload.
+
+Usage (from the Backend directory):
+    python -m src.server --host 0.0.0.0 --port 80 --workers 4
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import time
+from typing import Dict, Set
+
+import uvicorn
+
+from src.config import settings
+from src.logging import logger
+
+
+def preload() -> None:
+    """
+    Imports the app and builds everything the workers would otherwise build on their first requests.
+    """
+    from src.api.v1.votes.router import SNAPSHOTS
+
+    snapshot = SNAPSHOTS.current
+    snapshot.windows.title_words
+    snapshot.search_index
+
+
+def serve(config: uvicorn.Config, sock: socket.socket) -> None:
+    for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+        signal.signal(signum, signal.SIG_DFL)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Supervisor:
+    """
+    Keeps `workers` forked workers serving `sock`, and owns the data they serve. It polls the data files every
+    `reload_interval` seconds (0 disables that) and reloads on SIGHUP, which a worker's /admin/reload sends it. A new
+    snapshot is built here, in the parent, so the workers forked from then on share it; then every worker is replaced
+    by a fresh one and stopped gracefully, finishing the requests it has in flight. All workers thus serve the same
+    data version, shortly after the swap.
+    """
+
+    def __init__(self, config: uvicorn.Config, sock: socket.socket, workers: int, reload_interval: float):
+        self.config = config
+        self.sock = sock
+        self.workers = workers
+        self.reload_interval = reload_interval
+        self.children: Dict[int, int] = {}  # Worker pid to slot
+        self.retiring: Set[int] = set()  # Replaced workers that are finishing their requests
+        self.stopping = False
+        self.reload_requested = False
+
+    def spawn(self, slot: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            try:
+                serve(self.config, self.sock)
+            finally:
+                os._exit(0)
+        self.children[pid] = slot
+
+    def stop(self, signum: int, _) -> None:
+        self.stopping = True
+        for pid in [*self.children, *self.retiring]:
+            os.kill(pid, signum)
+
+    def request_reload(self, *_) -> None:
+        self.reload_requested = True
+
+    def reload(self) -> None:
+        from src.api.v1.votes.router import SNAPSHOTS
+
+        try:
+            reloaded = SNAPSHOTS.reload_now()
+        except Exception as e:
+            # Keep the workers serving the current snapshot
+            logger.error("data_snapshot_reload_failed", error=repr(e))
+            return
+        if not reloaded:
+            return
+        # Let the collector see what was frozen before, so the snapshot just swapped out can be freed if anything in it
+        # is part of a cycle, then freeze what the new workers will share
+        gc.unfreeze()
+        gc.collect()
+        gc.freeze()
+        for pid, slot in list(self.children.items()):
+            self.spawn(slot)
+            del self.children[pid]
+            self.retiring.add(pid)
+            os.kill(pid, signal.SIGTERM)
+        logger.info("workers_replaced", workers=len(self.children), data_version=SNAPSHOTS.current.version)
+
+    def reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if pid in self.retiring:
+                self.retiring.discard(pid)
+                continue
+            slot = self.children.pop(pid, None)
+            if slot is not None and not self.stopping:
+                logger.warning("worker_exited", pid=pid, status=status)
+                self.spawn(slot)
+
+    def run(self) -> None:
+        from src.api.v1.votes.router import SNAPSHOTS
+
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGHUP, self.request_reload)
+        for slot in range(self.workers):
+            self.spawn(slot)
+        logger.info("server_started", workers=self.workers, pid=os.getpid())
+
+        pending = None
+        next_poll = time.monotonic() + self.reload_interval
+        while self.children or self.retiring:
+            self.reap()
+            if not self.stopping and self.reload_requested:
+                self.reload_requested = False
+                self.reload()
+            elif not self.stopping and self.reload_interval > 0 and time.monotonic() >= next_poll:
+                next_poll = time.monotonic() + self.reload_interval
+                due, pending = SNAPSHOTS.poll(pending)
+                if due:
+                    self.reload()
+            time.sleep(0.2)
+        self.sock.close()
+
+
+def main(host: str, port: int, workers: int) -> None:
+    from src.api.v1.votes.router import SNAPSHOTS
+    from src.main import app
+
+    config = uvicorn.Config(app, host=host, port=port, log_level=settings.LOG_LEVEL.lower())
+    preload()
+    if workers <= 1:
+        uvicorn.Server(config).run()
+        return
+
+    sock = config.bind_socket()
+    # The workers leave watching and reloading the data to this process
+    SNAPSHOTS.reloads_in_parent = True
+    # Objects created so far are never collected; without this, the first collection in a worker touches (and copies)
+    # every page holding one of them
+    gc.freeze()
+    Supervisor(config, sock, workers, settings.DATA_RELOAD_INTERVAL).run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=settings.WEB_WORKERS)
+    args = parser.parse_args()
+    main(args.host, args.port, args.workers)
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+Startup report for the API: how long a fresh process takes to import `src.main`, run the app's startup and answer the
+first request of each kind, and which imports the time goes to, from `python -X importtime`.
+
+Usage (from the Backend directory):
+    python -m src.startup --top 20
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+# Modules the app should only import once a request needs them
+HEAVY_MODULES = ("numpy", "pandas")
+
+# The first request of each kind, in order: the prepared data first, then the ones that load the vote store
+FIRST_REQUESTS = {
+    "root": "/",
+    "matrix": "{api}/votes/matrix",
+    "disagreements": "{api}/votes/disagreements?party_a=VVD&party_b=SP",
+    "filtered_matrix": "{api}/votes/matrix?from=2024-01-01",
+    "search": "{api}/votes/motions/search?q=klimaat",
+}
+
+_IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+class ImportTime(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def probe() -> None:
+    """
+    Runs in the measured process: times each phase and prints them as JSON on stdout.
+    """
+    start = time.perf_counter()
+    from src.main import app
+    from src.config import settings
+
+    phases: Dict[str, float] = {"import": time.perf_counter() - start}
+    loaded = {name: name in sys.modules for name in HEAVY_MODULES}
+
+    from fastapi.testclient import TestClient
+
+    client = TestClient(app)
+    start = time.perf_counter()
+    client.__enter__()  # Runs the lifespan
+    phases["startup"] = time.perf_counter() - start
+    ready = {name: name in sys.modules for name in HEAVY_MODULES}
+
+    headers = {"Authorization": "Bearer startup"}
+    for name, path in FIRST_REQUESTS.items():
+        start = time.perf_counter()
+        response = client.get(path.format(api=settings.API_V1_STR), headers=headers)
+        phases[name] = time.perf_counter() - start
+        if response.status_code != 200:
+            raise RuntimeError(f"{path}: {response.status_code} {response.text}")
+    client.__exit__(None, None, None)
+    print(json.dumps({"phases": phases, "imported_at_import": loaded, "imported_at_ready": ready}))
+
+
+def run_probe(importtime: bool = False, env: Optional[Dict[str, str]] = None) -> Dict[str, object]:
+    """
+    Runs `probe` in a fresh interpreter. With `importtime`, the result also holds the `-X importtime` records.
+    """
+    command = [sys.executable, *(["-X", "importtime"] if importtime else []), "-c", "from src.startup import probe; probe()"]
+    env = {**os.environ, "API_V1_STR": os.getenv("API_V1_STR", "/api/v1"), "LOG_LEVEL": "WARNING", **(env or {})}
+    start = time.perf_counter()
+    process = subprocess.run(command, cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if process.returncode != 0:
+        raise RuntimeError(f"Startup probe failed:\n{process.stderr[-2000:]}")
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    result["process"] = elapsed
+    if importtime:
+        result["imports"] = parse_importtime(process.stderr)
+    return result
+
+
+def parse_importtime(output: str) -> List[ImportTime]:
+    imports = []
+    for line in output.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            imports.append(ImportTime(module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return imports
+
+
+def by_package(imports: List[ImportTime]) -> Dict[str, int]:
+    """
+    Self time summed per top-level package, in microseconds.
+    """
+    totals: Dict[str, int] = defaultdict(int)
+    for record in imports:
+        totals[record.module.partition(".")[0]] += record.self_us
+    return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+
+def report(result: Dict[str, object], top: int) -> None:
+    phases: Dict[str, float] = result["phases"]
+    print(f"Process wall time {result['process'] * 1000:.0f} ms, of which:")
+    for name, seconds in phases.items():
+        print(f"  {name:<16} {seconds * 1000:8.1f} ms")
+    for moment in ("import", "ready"):
+        heavy = [name for name, loaded in result[f"imported_at_{moment}"].items() if loaded]
+        print(f"Heavy modules imported at {moment}: {', '.join(heavy) or 'none'}")
+
+    imports: List[ImportTime] = result["imports"]
+    print(f"\nTop {top} imports by cumulative time (-X importtime, over all phases):")
+    roots = [record for record in imports if record.depth == 0]
+    for record in sorted(roots, key=lambda r: -r.cumulative_us)[:top]:
+        print(f"  {record.cumulative_us / 1000:8.1f} ms  {record.module}")
+    nested = sorted(imports, key=lambda r: -r.cumulative_us)
+    print(f"\nTop {top} modules by cumulative time, at any depth:")
+    for record in nested[:top]:
+        print(f"  {record.cumulative_us / 1000:8.1f} ms  {'  ' * record.depth}{record.module}")
+    print(f"\nTop {top} packages by self time:")
+    for package, self_us in list(by_package(imports).items())[:top]:
+        print(f"  {self_us / 1000:8.1f} ms  {package}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=15, help="Entries per table")
+    args = parser.parse_args()
+    report(run_probe(importtime=True), args.top)
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from typing import Dict, Iterator, Optional
+
+import pytest
+from fastapi.testclient import TestClient
+
+AUTH_HEADERS = {"Authorization": "Bearer test"}
+
+
+@pytest.fixture(scope="session")
+def client() -> Iterator[TestClient]:
+    """
+    The app serving the shipped data in `data/`, with its lifespan run.
+    """
+    from src.main import app
+
+    with TestClient(app, headers=AUTH_HEADERS) as test_client:
+        yield test_client
+
+
+def make_motion(
+    motion_id: str, votes: Dict[str, str], title: str = "Motie over iets", date: Optional[str] = None, seats: int = 10
+) -> dict:
+    """
+    A filled motion as the scraper writes it to the dataset.
+    """
+    motion = {
+        "id": motion_id,
+        "did": motion_id.replace("Z", "D"),
+        "url": f"https://www.tweedekamer.nl/kamerstukken/moties/detail?id={motion_id}",
+        "title": title,
+        "votes": [{"party": party, "seats": seats, "vote": vote} for party, vote in votes.items()],
+    }
+    if date is not None:
+        motion["date"] = date
+    return motion
@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers shared by the tests and the benchmarks:
+- offline stand-ins for the parliament website's pages (the listing pages and the motion detail pages), rendered from
+  the motions in `data/dataset.json`, so the scraper can be exercised and benchmarked without network access;
+- the implementations the optimized code replaced, which the tests check it against and the benchmarks time it
+  against;
+- a dated vote store for the date range queries, as the dataset has no motion dates yet.
+"""
+import asyncio
+import datetime
+import json
+import random
+from html import escape
+from io import StringIO
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from aiohttp import web
+from bs4 import BeautifulSoup
+
+from run.generate_matrix import calculate_similarity
+from src.api.schemas import parties
+from src.api.v1.votes.schemas import Disagreements, VoteMatrix
+from src.data.bundle import BUNDLE_FILE, DISAGREEMENTS_PREFIX, MATRIX_KEY, DataBundle
+from src.data.votes import VoteStore, read_dataset
+from src.scraper.models import NoTableFound, ParliamentMotion, PartyVote
+
+DATA_DIR: Path = Path(__file__).parent.parent / "data"
+
+# Motions per listing page, as on the website
+LISTING_PAGE_SIZE = 15
+
+_PAGE_HEAD = """<!DOCTYPE html>
+<html lang="nl">
+<head>
+  <meta charset="utf-8">
+  <title>Motie | Tweede Kamer der Staten-Generaal</title>
+  <style>.m-table td { padding: 0 4px; }</style>
+  <script>window.dataLayer = window.dataLayer || []; if (1 < 2) { dataLayer.push({"page": "motie"}); }</script>
+</head>
+<body>
+  <nav class="m-navigation"><ul><li><a href="/kamerstukken">Kamerstukken</a></li><li><a href="/kamerstukken/moties">Moties</a></li></ul></nav>
+  <main>
+"""
+_PAGE_TAIL = """
+  </main>
+  <footer><p>&copy; Tweede Kamer der Staten-Generaal</p></footer>
+</body>
+</html>
+"""
+
+
+def load_filled_motions() -> List[ParliamentMotion]:
+    with open(DATA_DIR / "dataset.json", "r", encoding="utf-8") as f:
+        motions = json.load(f)["motions"]
+    return [ParliamentMotion.model_validate(m) for m in motions if "votes" in m]
+
+
+def synthetic_motions(n: int) -> List[dict]:
+    """
+    `n` filled motions for the dataset, the scraped ones repeated under new ids (which keep the year of the original)
+    as often as needed.
+    """
+    with open(DATA_DIR / "dataset.json", "r", encoding="utf-8") as f:
+        motions = [m for m in json.load(f)["motions"] if "votes" in m]
+    copies = (divmod(k, len(motions)) for k in range(n))
+    return [{**motions[k], "id": f"{motions[k]['id']}-{copy}"} for copy, k in copies]
+
+
+def _vote_rows(vote: PartyVote, rng: random.Random) -> Iterator[str]:
+    """
+    Renders a faction either as a single row or, now and then, as a split vote with one row per member, where the
+    majority still votes the way the faction did.
+    """
+    party = escape(vote.party)
+    if vote.seats < 3 or vote.vote == "" or rng.random() > 0.1:
+        yield f"<tr><td><a href=\"/fracties/{party}\">{party}</a></td><td>{vote.seats}</td><td>{escape(vote.vote)}</td><td></td></tr>"
+        return
+    other = "Tegen" if vote.vote == "Voor" else "Voor"
+    dissenters = rng.randint(1, (vote.seats - 1) // 2)
+    for k in range(vote.seats):
+        member_vote = other if k < dissenters else vote.vote
+        yield f"<tr><td>{party}</td><td>1</td><td>{member_vote}</td><td>Lid {k + 1}</td></tr>"
+
+
+def render_motion_page(motion: ParliamentMotion, seed: int = 0) -> str:
+    rng = random.Random(f"{motion.id}-{seed}")
+    rows = "\n".join(row for vote in motion.votes for row in _vote_rows(vote, rng))
+    return (
+        f"{_PAGE_HEAD}"
+        f"    <h1 class=\"h-mb-0\">{escape(motion.title)}</h1>\n"
+        f"    <p class=\"m-intro\">Zaaknummer {escape(motion.id)}, documentnummer {escape(motion.did)}</p>\n"
+        f"    <table class=\"m-table\">\n"
+        f"      <thead><tr><th>Fracties</th><th>Zetels</th><th>Voor/Tegen</th><th>Niet deelgenomen</th></tr></thead>\n"
+        f"      <tbody>\n{rows}\n      </tbody>\n"
+        f"    </table>"
+        f"{_PAGE_TAIL}"
+    )
+
+
+def motion_path(motion: ParliamentMotion) -> str:
+    return f"/kamerstukken/moties/detail?id={motion.id}&did={motion.did}"
+
+
+def render_listing_page(motions: Sequence[ParliamentMotion]) -> str:
+    cards = "\n".join(
+        f"    <div class=\"m-card\"><h3><a class=\"h-link-inverse\" href=\"{escape(motion_path(motion))}\">"
+        f"{escape(motion.title.strip())}</a></h3></div>"
+        for motion in motions
+    )
+    return f"{_PAGE_HEAD}{cards}{_PAGE_TAIL}"
+
+
+def create_fixture_app(motions: List[ParliamentMotion], latency: float = 0.0) -> web.Application:
+    """
+    aiohttp application serving the rendered detail page of every motion at its usual path, and the motions
+    `LISTING_PAGE_SIZE` at a time on the listing pages (`?page=0` onwards), after `latency` seconds.
+    """
+    pages = {(m.id, m.did): render_motion_page(m).encode("utf-8") for m in motions}
+
+    async def listing(request: web.Request) -> web.Response:
+        page = int(request.query.get("page", "0"))
+        if latency:
+            await asyncio.sleep(latency)
+        body = render_listing_page(motions[page * LISTING_PAGE_SIZE : (page + 1) * LISTING_PAGE_SIZE])
+        return web.Response(text=body, content_type="text/html", charset="utf-8")
+
+    async def detail(request: web.Request) -> web.Response:
+        page = pages.get((request.query.get("id"), request.query.get("did")))
+        if page is None:
+            raise web.HTTPNotFound()
+        if latency:
+            await asyncio.sleep(latency)
+        return web.Response(body=page, content_type="text/html", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/kamerstukken/moties", listing)
+    app.router.add_get("/kamerstukken/moties/detail", detail)
+    return app
+
+
+def serve_fixtures(
+    port: int,
+    limit: Optional[int] = None,
+    latency: float = 0.0,
+    motions: Optional[List[ParliamentMotion]] = None,
+) -> None:
+    """
+    Serves the fixture pages of `motions` (by default the scraped ones) on localhost until the process is killed.
+    Meant to run in its own process, so it does not compete with the scraper being measured for the same event loop.
+    """
+    motions = (load_filled_motions() if motions is None else motions)[:limit]
+    web.run_app(create_fixture_app(motions, latency), host="127.0.0.1", port=port, print=None)
+
+
+def legacy_parse_motion_page(html_content: str) -> Tuple[str, List[PartyVote]]:
+    """
+    The BeautifulSoup + pandas.read_html pipeline that `src.scraper.parser.parse_motion_page` replaced.
+    """
+    soup = BeautifulSoup(html_content, "html.parser")
+    table = soup.find("table")
+    if table is None:
+        raise NoTableFound()
+    df = pd.read_html(StringIO(str(table)))[0]
+    df = df[["Fracties", "Zetels", "Voor/Tegen"]]
+
+    def safe_mode(x):
+        if len(x.mode()) > 0:
+            result = x.mode().iloc[0]
+        else:
+            result = x.iloc[0]
+        if isinstance(result, float):
+            return ""
+        elif result:
+            return result
+        else:
+            return ""
+
+    grouped_df = df.groupby("Fracties").agg({"Zetels": "sum", "Voor/Tegen": safe_mode}).reset_index()
+    votes = [
+        PartyVote(party=row["Fracties"], seats=int(row["Zetels"]), vote=row["Voor/Tegen"])
+        for _, row in grouped_df.iterrows()
+    ]
+    return soup.find("h1").get_text(), votes
+
+
+def loop_similarity_matrix(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The vote matrix as `run/generate_matrix.py` computed it before `src.data.matrix`, with `calculate_similarity`
+    per pair.
+    """
+    matrix = pd.DataFrame(index=parties, columns=parties, dtype=float)
+    for party1 in parties:
+        for party2 in parties:
+            if party1 == party2:
+                matrix.loc[party1, party2] = 100.0
+            else:
+                matrix.loc[party1, party2] = calculate_similarity(df[party1], df[party2])
+    return matrix.round(1)
+
+
+def legacy_load() -> Tuple[VoteMatrix, Dict[str, Disagreements]]:
+    """
+    The votes router's loader before the data bundle: matrix.json plus every file in party_disagreements/.
+    """
+    with open(DATA_DIR / "matrix.json", "r") as f:
+        matrix = VoteMatrix.model_validate_json(f.read())
+
+    cache: Dict[str, Disagreements] = {}
+    for cache_file in (DATA_DIR / "party_disagreements").iterdir():
+        if cache_file.suffix != ".json":
+            continue
+        with open(cache_file, "rb") as f:
+            data = f.read()
+            for enc in ("utf-8", "latin-1", "cp1252"):
+                try:
+                    text = data.decode(enc)
+                    break
+                except UnicodeDecodeError:
+                    continue
+            cache[cache_file.stem] = Disagreements.model_validate_json(text)
+    return matrix, cache
+
+
+def bundle_load() -> Tuple[VoteMatrix, Dict[str, Disagreements]]:
+    """
+    The same data as `legacy_load`, from the data bundle.
+    """
+    bundle = DataBundle.open(BUNDLE_FILE)
+    matrix = VoteMatrix.model_validate_json(bundle.read(MATRIX_KEY))
+    cache = {key: Disagreements.model_validate_json(bundle.read(key)) for key in bundle.keys(DISAGREEMENTS_PREFIX)}
+    return matrix, cache
+
+
+# The scrape window of the dataset
+WINDOW_START = np.datetime64("2023-11-22")
+WINDOW_DAYS = 708
+
+
+def dated_store(scale: int, rng: np.random.Generator) -> VoteStore:
+    """
+    The scraped motions repeated `scale` times, each dated at random within the scrape window.
+    """
+    votes, seats, _ = read_dataset()
+    votes, seats = pd.concat([votes] * scale), pd.concat([seats] * scale)
+    votes["date"] = [str(day) for day in WINDOW_START + rng.integers(0, WINDOW_DAYS, len(votes))]
+    return VoteStore.from_frame(votes, parties, seats)
+
+
+def random_ranges(n: int, rng: np.random.Generator) -> List[Tuple[datetime.date, datetime.date]]:
+    """
+    `n` date ranges over the scrape window, some starting before it or ending after it.
+    """
+    ranges = []
+    for _ in range(n):
+        start = WINDOW_START + int(rng.integers(-30, WINDOW_DAYS))
+        end = start + int(rng.integers(0, WINDOW_DAYS))
+        ranges.append((start.astype(datetime.date), end.astype(datetime.date)))
+    return ranges
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.schemas import parties, party_aliases, party_index
+
+DISAGREEMENTS = "/api/v1/votes/disagreements"
+
+
+@pytest.mark.parametrize("name", parties)
+def test_party_names_resolve_to_themselves(name: str) -> None:
+    assert party_index(name) == parties.index(name)
+
+
+@pytest.mark.parametrize("alias, party", party_aliases.items())
+def test_aliases_resolve_to_their_party(alias: str, party: str) -> None:
+    assert party_index(alias) == parties.index(party)
+
+
+@pytest.mark.parametrize("name", ["gl-pvda", "GL PVDA", "gl_pvda", " GroenLinks/PvdA ", "groenlinks.pvda", "Gl&PvdA"])
+def test_case_whitespace_and_punctuation_do_not_matter(name: str) -> None:
+    assert party_index(name) == parties.index("GroenLinks-PvdA")
+
+
+@pytest.mark.parametrize("name", ["", "PvdA", "GroenLinks", "Partij", "VVD2"])
+def test_unknown_names_do_not_resolve(name: str) -> None:
+    assert party_index(name) is None
+
+
+def test_aliases_and_order_give_the_same_disagreements(client: TestClient) -> None:
+    expected = client.get(DISAGREEMENTS, params={"party_a": "ChristenUnie", "party_b": "GroenLinks-PvdA"})
+    assert expected.status_code == 200
+    for party_a, party_b in (("CU", "GL-PvdA"), ("christen unie", "pvda-gl"), ("GL/PvdA", "CU")):
+        response = client.get(DISAGREEMENTS, params={"party_a": party_a, "party_b": party_b})
+        assert response.status_code == 200, (party_a, party_b)
+        assert response.content == expected.content
+        assert response.headers["ETag"] == expected.headers["ETag"]
+
+
+def test_unknown_party_is_a_bad_request(client: TestClient) -> None:
+    response = client.get(DISAGREEMENTS, params={"party_a": "CU", "party_b": "PvdA"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid party name: PvdA"
+
+
+def test_batch_resolves_aliases_and_skips_repeated_pairs(client: TestClient) -> None:
+    response = client.get(
+        f"{DISAGREEMENTS}/batch", params={"pairs": ["CU,GL-PvdA", "GroenLinks-PvdA,ChristenUnie", "vvd,pvv"]}
+    )
+    assert response.status_code == 200
+    pairs = [{item["party_a"], item["party_b"]} for item in response.json()["data"]]
+    assert pairs == [{"ChristenUnie", "GroenLinks-PvdA"}, {"VVD", "PVV"}]
+
+    response = client.get(f"{DISAGREEMENTS}/batch", params={"pairs": ["CU,PvdA"]})
+    assert response.status_code == 400
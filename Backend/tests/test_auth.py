@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+import os
+from pathlib import Path
+
+import pytest
+
+from src.api.middlewares.auth import TokenSet
+
+
+def write_tokens(path: Path, text: str, mtime_ns: int) -> None:
+    # Explicit mtimes, so every rewrite is seen as a change however quickly the test runs
+    path.write_text(text)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def tokens_file(tmp_path: Path) -> Path:
+    path = tmp_path / "tokens"
+    write_tokens(path, "alpha,beta", 1_000_000_000)
+    return path
+
+
+def test_accepts_only_listed_tokens():
+    tokens = TokenSet(["alpha", "beta"])
+    assert tokens.accepts("alpha")
+    assert tokens.accepts("beta")
+    assert not tokens.accepts("gamma")
+    assert not tokens.accepts("")
+
+
+def test_reloads_changed_file(tokens_file: Path):
+    tokens = TokenSet(["alpha", "beta"], path=tokens_file, reload_interval=0)
+    write_tokens(tokens_file, "gamma", 2_000_000_000)
+    assert tokens.accepts("gamma")
+    assert not tokens.accepts("alpha")
+
+
+def test_explicit_wildcard_accepts_any_token(tokens_file: Path):
+    tokens = TokenSet(["alpha", "beta"], path=tokens_file, reload_interval=0)
+    write_tokens(tokens_file, "*", 2_000_000_000)
+    assert tokens.accepts("anything")
+
+
+@pytest.mark.parametrize("text", ["", "\n", " , ,"])
+def test_empty_file_keeps_previous_tokens(tokens_file: Path, text: str):
+    tokens = TokenSet(["alpha", "beta"], path=tokens_file, reload_interval=0)
+    write_tokens(tokens_file, text, 2_000_000_000)
+    assert not tokens.accepts("anything")
+    assert tokens.accepts("alpha")
+
+    write_tokens(tokens_file, "gamma", 3_000_000_000)
+    assert tokens.accepts("gamma")
+    assert not tokens.accepts("alpha")
+
+
+def test_unreadable_file_keeps_previous_tokens(tokens_file: Path, monkeypatch: pytest.MonkeyPatch):
+    tokens = TokenSet(["alpha", "beta"], path=tokens_file, reload_interval=0)
+    write_tokens(tokens_file, "gamma", 2_000_000_000)
+
+    def replaced(self, *args, **kwargs):
+        raise FileNotFoundError(self)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(Path, "read_text", replaced)
+        assert tokens.accepts("alpha")
+        assert not tokens.accepts("gamma")
+    # The change is picked up once the file can be read again
+    assert tokens.accepts("gamma")
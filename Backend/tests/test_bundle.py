@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+from tests.helpers import bundle_load, legacy_load
+
+
+def test_bundle_matches_the_source_files() -> None:
+    legacy_matrix, legacy_cache = legacy_load()
+    matrix, cache = bundle_load()
+    assert matrix == legacy_matrix
+    assert cache.keys() == legacy_cache.keys()
+    for key, disagreements in legacy_cache.items():
+        assert cache[key] == disagreements, key
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.responses import PreparedResponse, etag_matches, parse_accept_encoding
+from src.api.snapshot import VERSION_HEADER
+from src.config import Settings
+
+DISAGREEMENTS = "/api/v1/votes/disagreements?party_a=VVD&party_b=PVV"
+BATCH = "/api/v1/votes/disagreements/batch?party=VVD"
+
+
+@pytest.mark.parametrize(
+    "auth_enabled, cache_control",
+    [
+        ("true", "private, max-age=3600"),
+        ("false", "public, max-age=3600, stale-while-revalidate=86400"),
+    ],
+)
+def test_cache_control_default_follows_auth(
+    monkeypatch: pytest.MonkeyPatch, auth_enabled: str, cache_control: str
+) -> None:
+    monkeypatch.setenv("AUTH_ENABLED", auth_enabled)
+    monkeypatch.delenv("CACHE_CONTROL", raising=False)
+    assert Settings().CACHE_CONTROL == cache_control
+
+
+def test_cache_control_public_is_explicit(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("AUTH_ENABLED", "true")
+    monkeypatch.setenv("CACHE_CONTROL", "public, max-age=60")
+    assert Settings().CACHE_CONTROL == "public, max-age=60"
+
+
+@pytest.mark.parametrize("path", ["/api/v1/votes/matrix", "/api/v1/votes/matrix?date_from=2023-01-01"])
+def test_authenticated_responses_are_private(client: TestClient, path: str) -> None:
+    response = client.get(path)
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"].startswith("private")
+
+
+def test_parse_accept_encoding() -> None:
+    assert parse_accept_encoding(None) == {}
+    codings = parse_accept_encoding("gzip, br;q=0.5, *;q=0, deflate;q=x")
+    assert codings == {"gzip": 1.0, "br": 0.5, "*": 0.0, "deflate": 0.0}
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, coding",
+    [
+        (None, "identity"),
+        ("gzip", "gzip"),
+        ("gzip, br", "br"),
+        ("br;q=0, gzip", "gzip"),
+        ("*", "br"),
+        ("*;q=0", "identity"),
+        ("gzip;q=0, *", "br"),
+        ("deflate", "identity"),
+    ],
+)
+def test_choose_encoding_prefers_br_then_gzip(accept_encoding: str, coding: str) -> None:
+    prepared = PreparedResponse(b"{}", "0" * 64, compressed={"br": b"br", "gzip": b"gzip"})
+    assert prepared.choose_encoding(accept_encoding) == coding
+
+
+def test_etag_matches_any_listed_weak_or_wildcard_tag() -> None:
+    etags = ['"abc"', '"abc-gzip"']
+    assert etag_matches('"abc"', etags)
+    assert etag_matches('W/"abc-gzip"', etags)
+    assert etag_matches('"other", "abc"', etags)
+    assert etag_matches("*", etags)
+    assert not etag_matches('"abcd"', etags)
+
+
+def test_encodings_have_their_own_etag_and_the_same_content(client: TestClient) -> None:
+    identity = client.get(DISAGREEMENTS, headers={"Accept-Encoding": "identity"})
+    gzipped = client.get(DISAGREEMENTS, headers={"Accept-Encoding": "gzip"})
+    assert identity.status_code == gzipped.status_code == 200
+    assert "Content-Encoding" not in identity.headers
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert gzipped.headers["ETag"] == identity.headers["ETag"][:-1] + '-gzip"'
+    assert identity.headers["Vary"] == gzipped.headers["Vary"] == "Accept-Encoding"
+    # The test client decodes the gzip body
+    assert gzipped.content == identity.content
+    assert int(gzipped.headers["Content-Length"]) < len(identity.content)
+
+
+@pytest.mark.parametrize("variant", ["identity", "gzip"])
+def test_matching_if_none_match_is_not_modified(client: TestClient, variant: str) -> None:
+    etag = client.get(DISAGREEMENTS, headers={"Accept-Encoding": variant}).headers["ETag"]
+    # A tag of either variant matches, whichever encoding the request accepts
+    for accept_encoding in ("identity", "gzip"):
+        for if_none_match in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+            response = client.get(
+                DISAGREEMENTS, headers={"Accept-Encoding": accept_encoding, "If-None-Match": if_none_match}
+            )
+            assert response.status_code == 304, if_none_match
+            assert response.content == b""
+            assert response.headers["ETag"].endswith('-gzip"') == (accept_encoding == "gzip")
+            assert VERSION_HEADER in response.headers
+
+
+def test_stale_if_none_match_gets_the_body(client: TestClient) -> None:
+    response = client.get(DISAGREEMENTS, headers={"If-None-Match": '"0123456789abcdef0123456789abcdef"'})
+    assert response.status_code == 200
+    assert response.json()
+
+
+def test_batch_etag_depends_on_the_format(client: TestClient) -> None:
+    as_json = client.get(BATCH)
+    as_ndjson = client.get(f"{BATCH}&format=ndjson")
+    assert as_json.status_code == as_ndjson.status_code == 200
+    assert as_json.headers["ETag"].endswith('-json"')
+    assert as_ndjson.headers["ETag"].endswith('-ndjson"')
+    assert as_json.headers["ETag"][:-6] == as_ndjson.headers["ETag"][:-8]
+
+    for response, url in ((as_json, BATCH), (as_ndjson, f"{BATCH}&format=ndjson")):
+        assert client.get(url, headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+    assert client.get(BATCH, headers={"If-None-Match": as_ndjson.headers["ETag"]}).status_code == 200
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import random
+import socket
+import time
+from typing import Awaitable, Callable, List, Optional, TypeVar
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.scraper.fetch import RETRYABLE_STATUSES, FetchScheduler, FetchStats, RetryableFetchError, TokenBucket
+
+T = TypeVar("T")
+
+
+class FlakyPage:
+    """
+    Handler answering with each of `statuses` in turn, then with 200 and a body; records when it was requested and
+    how many requests it was handling at once.
+    """
+
+    def __init__(self, statuses: List[int], retry_after: Optional[str] = None, delay: float = 0.0):
+        self.statuses = list(statuses)
+        self.retry_after = retry_after
+        self.delay = delay
+        self.requests: List[float] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests.append(time.monotonic())
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            if self.statuses:
+                headers = {"Retry-After": self.retry_after} if self.retry_after is not None else {}
+                return web.Response(status=self.statuses.pop(0), headers=headers)
+            return web.Response(text="<html>motie</html>", content_type="text/html")
+        finally:
+            self.in_flight -= 1
+
+
+def serve(page: FlakyPage, test: Callable[[str], Awaitable[T]]) -> T:
+    """
+    Runs `test` with the url of `page`, served by a local test server.
+    """
+
+    async def run() -> T:
+        app = web.Application()
+        app.router.add_get("/page", page.handle)
+        async with TestServer(app) as server:
+            return await test(str(server.make_url("/page")))
+
+    return asyncio.run(run())
+
+
+def scheduler(**kwargs) -> FetchScheduler:
+    options = {"workers": 4, "rate_limit": 0, "retries": 3, "timeout": 5, "backoff": 0.01, "max_backoff": 0.05}
+    return FetchScheduler(**{**options, **kwargs})
+
+
+@pytest.mark.parametrize("status", sorted(RETRYABLE_STATUSES))
+def test_retries_retryable_statuses(status: int) -> None:
+    page = FlakyPage([status, status])
+
+    async def test(url: str) -> FetchStats:
+        async with scheduler() as fetcher:
+            assert await fetcher.fetch(url) == "<html>motie</html>"
+            return fetcher.stats
+
+    stats = serve(page, test)
+    assert len(page.requests) == 3
+    assert stats.retries == 2
+    assert stats.failures == 0
+    assert stats.statuses == {status: 2, 200: 1}
+
+
+def test_gives_up_after_the_retries() -> None:
+    page = FlakyPage([503] * 10)
+
+    async def test(url: str) -> FetchStats:
+        async with scheduler(retries=2) as fetcher:
+            with pytest.raises(RetryableFetchError) as error:
+                await fetcher.fetch(url)
+            assert "HTTP 503" in str(error.value)
+            return fetcher.stats
+
+    stats = serve(page, test)
+    assert len(page.requests) == 3
+    assert (stats.retries, stats.failures) == (2, 1)
+
+
+@pytest.mark.parametrize("status", [400, 403, 404, 410])
+def test_does_not_retry_other_client_errors(status: int) -> None:
+    page = FlakyPage([status])
+
+    async def test(url: str) -> FetchStats:
+        async with scheduler() as fetcher:
+            with pytest.raises(aiohttp.ClientResponseError) as error:
+                await fetcher.fetch(url)
+            assert error.value.status == status
+            return fetcher.stats
+
+    stats = serve(page, test)
+    assert len(page.requests) == 1
+    assert (stats.retries, stats.failures) == (0, 1)
+
+
+def test_waits_as_long_as_retry_after_says() -> None:
+    # Without the header, the backoff would wait 5 to 10 seconds
+    page = FlakyPage([429], retry_after="0.2")
+
+    async def test(url: str) -> None:
+        async with scheduler(backoff=10, max_backoff=30) as fetcher:
+            await fetcher.fetch(url)
+
+    serve(page, test)
+    assert 0.2 <= page.requests[1] - page.requests[0] < 2
+
+
+def test_backoff_doubles_with_jitter_up_to_the_maximum() -> None:
+    fetcher = scheduler(backoff=0.5, max_backoff=3)
+    random.seed(0)
+    for attempt, delay in enumerate([0.5, 1, 2, 3, 3]):
+        for _ in range(20):
+            assert delay / 2 <= fetcher.backoff_delay(attempt) <= delay
+    assert fetcher.backoff_delay(0, retry_after=2.5) == 2.5
+    assert fetcher.backoff_delay(0, retry_after=60) == 3
+
+
+def test_retries_timeouts() -> None:
+    page = FlakyPage([])
+
+    async def test(url: str) -> FetchStats:
+        async with scheduler(timeout=0.2) as fetcher:
+            page.delay = 1
+            loop = asyncio.get_running_loop()
+            # Answer quickly from the second attempt on
+            loop.call_later(0.3, setattr, page, "delay", 0)
+            assert await fetcher.fetch(url) == "<html>motie</html>"
+            return fetcher.stats
+
+    stats = serve(page, test)
+    assert stats.retries >= 1
+    assert stats.failures == 0
+
+
+def test_retries_connection_errors_then_raises() -> None:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    # Nothing listens on the port any more
+
+    async def test() -> FetchStats:
+        async with scheduler(retries=2) as fetcher:
+            with pytest.raises(aiohttp.ClientConnectionError):
+                await fetcher.fetch(f"http://127.0.0.1:{port}/page")
+            return fetcher.stats
+
+    stats = asyncio.run(test())
+    assert (stats.retries, stats.failures) == (2, 1)
+    assert stats.latencies == []
+
+
+def test_token_bucket_spaces_requests_after_a_burst() -> None:
+    async def test() -> float:
+        bucket = TokenBucket(rate=20, capacity=2)
+        start = time.monotonic()
+        for _ in range(6):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    # Two tokens at once, then one every 50 ms
+    assert 0.18 <= asyncio.run(test()) < 1
+
+
+def test_rate_limit_spaces_requests_after_a_burst() -> None:
+    page = FlakyPage([])
+
+    async def test(url: str) -> FetchStats:
+        async with scheduler(rate_limit=20) as fetcher:
+            await asyncio.gather(*(fetcher.fetch(url) for _ in range(30)))
+            return fetcher.stats
+
+    stats = serve(page, test)
+    # A burst of 20, then 20 per second
+    assert page.requests[-1] - page.requests[0] >= 9 / 20
+    assert stats.statuses == {200: 30}
+
+
+def test_workers_bound_the_requests_in_flight() -> None:
+    page = FlakyPage([], delay=0.05)
+
+    async def test(url: str) -> None:
+        async with scheduler(workers=2) as fetcher:
+            await asyncio.gather(*(fetcher.fetch(url) for _ in range(8)))
+
+    serve(page, test)
+    assert page.max_in_flight == 2
+
+
+def test_stats_count_requests_and_bytes() -> None:
+    page = FlakyPage([500])
+
+    async def test(url: str) -> FetchStats:
+        async with scheduler() as fetcher:
+            await fetcher.fetch(url)
+            await fetcher.fetch(url)
+            return fetcher.stats
+
+    stats = serve(page, test)
+    summary = stats.summary()
+    assert summary["requests"] == 3
+    assert summary["retries"] == 1
+    assert summary["failures"] == 0
+    assert stats.bytes == 2 * len("<html>motie</html>")
+    assert 0 < stats.percentile(50) <= stats.percentile(99)
+    assert "requests=3" in str(stats)
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+import pytest
+
+from src.api.schemas import parties
+from src.data.counts import MatrixCounts
+from src.data.matrix import pairwise_counts, similarity_from_counts, similarity_matrix
+from src.data.modes import MatrixMode, all_mode_similarities, block_counts, block_layout
+from src.data.votes import VoteStore, load_vote_store, read_dataset
+from tests.helpers import loop_similarity_matrix
+
+
+@pytest.fixture(scope="module")
+def store() -> VoteStore:
+    votes, seats, splits = read_dataset()
+    return VoteStore.from_frame(votes, parties, seats, splits)
+
+
+def test_engine_matches_the_per_pair_loop() -> None:
+    votes = load_vote_store(parties).to_frame()[parties]
+    pd.testing.assert_frame_equal(similarity_matrix(votes, parties), loop_similarity_matrix(votes))
+
+
+def test_agreement_mode_matches_the_plain_matrix(store: VoteStore) -> None:
+    modes = all_mode_similarities(block_counts(store, slice(None)), block_layout(store), parties)
+    assert set(modes) == set(MatrixMode)
+    pd.testing.assert_frame_equal(
+        modes[MatrixMode.AGREEMENT], similarity_from_counts(pairwise_counts(store.encoded), parties)
+    )
+
+
+def test_saved_counts_match_the_dataset(store: VoteStore) -> None:
+    saved = MatrixCounts.load()
+    assert saved.differences(MatrixCounts.from_store(store)) == []
+    # In the order `run/generate_matrix.py` counts them, which incremental updates append to
+    assert saved.ids == list(store.ids)
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+import datetime
+
+import numpy as np
+
+from src.data.modes import block_counts
+from src.data.votes import VoteStore, motion_frames
+from src.data.windows import WindowedCounts
+from tests.conftest import make_motion
+from tests.helpers import dated_store, random_ranges
+
+PARTIES = ["A", "B"]
+
+
+def windows_of(motions) -> WindowedCounts:
+    votes, seats, splits = motion_frames(motions)
+    return WindowedCounts(VoteStore.from_frame(votes, PARTIES, seats, splits))
+
+
+def test_bounds_within_a_year_dated_only_by_year_are_unresolved():
+    windows = windows_of(
+        [
+            make_motion("2024Z00001", {"A": "Voor", "B": "Tegen"}),
+            make_motion("2025Z00001", {"A": "Voor", "B": "Voor"}, date="2025-03-04"),
+        ]
+    )
+    assert windows.unresolved_bound(datetime.date(2024, 3, 1), None) == datetime.date(2024, 3, 1)
+    assert windows.unresolved_bound(None, datetime.date(2024, 6, 30)) == datetime.date(2024, 6, 30)
+    # Whole years, and any bound in a year whose motions all have their date
+    assert windows.unresolved_bound(datetime.date(2024, 1, 1), datetime.date(2024, 12, 31)) is None
+    assert windows.unresolved_bound(datetime.date(2025, 3, 1), datetime.date(2025, 6, 30)) is None
+
+
+def test_exact_dates_survive_save_and_append(tmp_path):
+    votes, seats, splits = motion_frames([make_motion("2025Z00001", {"A": "Voor", "B": "Voor"}, date="2025-03-04")])
+    dated = VoteStore.from_frame(votes, PARTIES, seats, splits)
+    votes, seats, splits = motion_frames([make_motion("2024Z00001", {"A": "Voor", "B": "Tegen"})])
+    store = dated.append(VoteStore.from_frame(votes, PARTIES, seats, splits))
+    store.save(tmp_path / "votes.bin")
+    opened = VoteStore.open(tmp_path / "votes.bin")
+    assert list(opened.ids) == ["2024Z00001", "2025Z00001"]
+    assert opened.exact_dates.tolist() == [False, True]
+
+
+def test_windowed_counts_match_counting_the_selected_motions():
+    rng = np.random.default_rng(0)
+    store = dated_store(1, rng)
+    windows = WindowedCounts(store)
+    # The ranges include some that start before the first motion and some that end after the last
+    for date_from, date_to in random_ranges(50, rng):
+        mask = (store.dates >= np.datetime64(date_from)) & (store.dates <= np.datetime64(date_to))
+        assert np.allclose(windows.counts(date_from, date_to), block_counts(store, mask)), (date_from, date_to)
+
+
+def test_keyword_filter_matches_whole_words_as_search_does():
+    windows = windows_of(
+        [
+            make_motion("2024Z00001", {"A": "Voor", "B": "Tegen"}, title="Motie over de overheid en financiële plannen"),
+            make_motion("2024Z00002", {"A": "Voor", "B": "Voor"}, title="Motie over het plan voor stikstof"),
+        ]
+    )
+    present = windows.layout.index("present")
+
+    def selected(q):
+        return int(windows.counts(q=q)[present][0, 0])
+
+    assert selected("overheid") == 1
+    assert selected("ov") == 0
+    assert selected("Financiele PLANNEN") == 1
+    assert selected("plan") == 2
+    assert selected("plan stikstof") == 1
+    # Stopwords only: nothing to match
+    assert selected("de over") == 0
+
+
+def test_sub_year_range_over_year_dated_motions_is_rejected(client):
+    for query in ("from=2024-03-01&to=2024-12-31", "to=2025-06-30"):
+        response = client.get(f"/api/v1/votes/matrix?{query}")
+        assert response.status_code == 422, query
+
+
+def test_filter_without_motions_is_not_found(client):
+    for query in ("from=2030-01-01", "q=zzzqqqxyz", "from=2023-01-01&to=2023-12-31"):
+        response = client.get(f"/api/v1/votes/matrix?{query}")
+        assert response.status_code == 404, query
+
+
+def test_whole_year_range_is_served(client):
+    response = client.get("/api/v1/votes/matrix?from=2024-01-01&to=2024-12-31")
+    assert response.status_code == 200
+    matrix = response.json()
+    assert matrix["VVD"]["VVD"] == 100.0
+    assert 0.0 < matrix["VVD"]["PVV"] < 100.0
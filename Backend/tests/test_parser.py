@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+from pathlib import Path
+from typing import List, Tuple
+
+import pytest
+
+from src.scraper.models import NoTableFound, PartyVote
+from src.scraper.parser import aggregate_votes, parse_motion_page
+from tests.helpers import legacy_parse_motion_page, load_filled_motions, render_motion_page
+
+FIXTURES_DIR: Path = Path(__file__).parent / "fixtures"
+HEADER = ["Fracties", "Zetels", "Voor/Tegen", "Niet deelgenomen"]
+
+
+def read_fixture(name: str) -> str:
+    return (FIXTURES_DIR / name).read_text(encoding="utf-8")
+
+
+def assert_same_parse(actual: Tuple[str, List[PartyVote]], expected: Tuple[str, List[PartyVote]]) -> None:
+    """
+    Compares two parse results field by field. The BeautifulSoup pipeline did not record split votes, so only the
+    aggregated vote of a faction is compared.
+    """
+    actual_title, actual_votes = actual
+    expected_title, expected_votes = expected
+    assert actual_title == expected_title
+    assert [vote.party for vote in actual_votes] == [vote.party for vote in expected_votes]
+    for vote, expected_vote in zip(actual_votes, expected_votes):
+        assert vote.seats == expected_vote.seats, vote.party
+        assert vote.vote == expected_vote.vote, vote.party
+
+
+@pytest.mark.parametrize("name", ["motion_page.html", "motion_page_malformed.html"])
+def test_matches_the_beautifulsoup_parser(name: str) -> None:
+    html = read_fixture(name)
+    assert_same_parse(parse_motion_page(html), legacy_parse_motion_page(html))
+
+
+def test_page_without_vote_table() -> None:
+    html = read_fixture("motion_page_no_votes.html")
+    with pytest.raises(NoTableFound):
+        legacy_parse_motion_page(html)
+    with pytest.raises(NoTableFound):
+        parse_motion_page(html)
+
+
+def test_malformed_page() -> None:
+    # Unclosed cells and rows, unquoted attributes, upper case tags, a table inside a script and a commented out title
+    title, votes = parse_motion_page(read_fixture("motion_page_malformed.html"))
+    assert " ".join(title.split()) == "Motie : Motie van het lid Dijk over huren & energiein 2025"
+    by_party = {vote.party: vote for vote in votes}
+    assert list(by_party) == ["BBB", "CDA", "D66", "DENK", "GroenLinks-PvdA", "PVV", "VVD"]
+    assert (by_party["BBB"].seats, by_party["BBB"].vote) == (7, "Tegen")
+    assert (by_party["D66"].seats, by_party["D66"].vote) == (9, "Voor")
+    denk = by_party["DENK"]
+    assert (denk.seats, denk.vote, denk.split) == (3, "Voor", {"Voor": 2, "Tegen": 1})
+    assert (by_party["VVD"].seats, by_party["VVD"].vote) == (24, "")
+
+
+def test_split_votes_are_aggregated_per_faction() -> None:
+    _, votes = parse_motion_page(read_fixture("motion_page.html"))
+    denk = next(vote for vote in votes if vote.party == "DENK")
+    assert (denk.seats, denk.vote, denk.split) == (3, "Voor", {"Voor": 2, "Tegen": 1})
+    assert sum(vote.split is not None for vote in votes) == 1
+
+
+def test_rendered_pages_round_trip() -> None:
+    for motion in load_filled_motions()[:100]:
+        html = render_motion_page(motion)
+        title, votes = parse_motion_page(html)
+        assert_same_parse((title, votes), legacy_parse_motion_page(html))
+        assert_same_parse((title, votes), (motion.title, motion.votes))
+
+
+def test_roll_call_counts_the_faction_seats_once() -> None:
+    # Every member on a row of their own with the seats of the faction; one Volt member and two of SP did not vote and
+    # are not listed
+    body = [["PVV", "37", "Tegen", ""]] * 37 + [["Volt", "2", "Voor", ""]]
+    body += [["SP", "5", "Voor", ""]] * 2 + [["SP", "5", "Tegen", ""]]
+    votes = {vote.party: vote for vote in aggregate_votes(HEADER, body)}
+    assert (votes["PVV"].seats, votes["PVV"].vote, votes["PVV"].split) == (37, "Tegen", None)
+    assert (votes["Volt"].seats, votes["Volt"].vote) == (2, "Voor")
+    assert (votes["SP"].seats, votes["SP"].vote, votes["SP"].split) == (5, "Voor", {"Tegen": 1, "Voor": 2})
+
+
+def test_rows_counting_their_own_seats_are_summed() -> None:
+    body = [["VVD", "20", "Voor", ""], ["VVD", "4", "Tegen", ""], ["DENK", "1", "Voor", ""], ["DENK", "1", "Tegen", ""]]
+    votes = {vote.party: vote for vote in aggregate_votes(HEADER, body)}
+    assert votes["VVD"].seats == 24
+    assert (votes["DENK"].seats, votes["DENK"].split) == (2, {"Tegen": 1, "Voor": 1})
+
+
+def test_dataset_has_no_more_seats_than_the_chamber() -> None:
+    for motion in load_filled_motions():
+        assert sum(vote.seats for vote in motion.votes) <= 150, motion.id
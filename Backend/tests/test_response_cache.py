@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import json
+from pathlib import Path
+
+import pytest
+
+from src.scraper import cache
+from src.scraper.cache import ResponseCache
+
+URL = "https://www.tweedekamer.nl/kamerstukken/moties/detail?id=2024Z00001"
+
+
+def cached(directory: Path) -> ResponseCache:
+    response_cache = ResponseCache(directory, max_bytes=1 << 20)
+    response_cache.store(URL, b"<html>motie</html>", "utf-8")
+    response_cache.store_parsed(URL, '{"id": "2024Z00001"}')
+    response_cache.save()
+    return response_cache
+
+
+def test_parse_result_is_reused_for_the_same_body(tmp_path: Path) -> None:
+    cached(tmp_path)
+    reopened = ResponseCache(tmp_path, max_bytes=1 << 20)
+    assert reopened.read_parsed(reopened.get(URL)) == '{"id": "2024Z00001"}'
+
+
+def test_changed_body_is_parsed_again(tmp_path: Path) -> None:
+    response_cache = cached(tmp_path)
+    assert response_cache.store(URL, b"<html>gewijzigde motie</html>", "utf-8")
+    assert response_cache.read_parsed(response_cache.get(URL)) is None
+
+
+def test_parse_result_of_another_parser_version_is_parsed_again(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    cached(tmp_path)
+    monkeypatch.setattr(cache, "PARSER_VERSION", cache.PARSER_VERSION + 1)
+    reopened = ResponseCache(tmp_path, max_bytes=1 << 20)
+    assert reopened.read_parsed(reopened.get(URL)) is None
+
+    reopened.store_parsed(URL, '{"id": "2024Z00001", "title": "Motie"}')
+    assert reopened.read_parsed(reopened.get(URL)) == '{"id": "2024Z00001", "title": "Motie"}'
+
+
+def test_parse_result_cached_without_a_version_is_parsed_again(tmp_path: Path) -> None:
+    cached(tmp_path)
+    # An index written before the parser version was recorded
+    index_file = tmp_path / ResponseCache.INDEX_FILE
+    index = json.loads(index_file.read_text())
+    del index[URL]["parser_version"]
+    index_file.write_text(json.dumps(index))
+
+    reopened = ResponseCache(tmp_path, max_bytes=1 << 20)
+    assert reopened.read_parsed(reopened.get(URL)) is None
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+from pathlib import Path
+from typing import List
+
+from aiohttp.test_utils import TestServer
+
+from run.scrape import MotionCheckpoint, StreamCounts, fill_streaming
+from src.scraper.fetch import FetchScheduler
+from src.scraper.models import ParliamentMotion, ParliamentMotionDataset, ParliamentMotionLocator
+from src.scraper.pool import ParsePool
+from tests.helpers import create_fixture_app, load_filled_motions, motion_path
+
+
+def locators(motions: List[ParliamentMotion], base_url: str = "http://localhost") -> List[ParliamentMotionLocator]:
+    return [ParliamentMotionLocator(id=m.id, did=m.did, url=f"{base_url}{motion_path(m)}") for m in motions]
+
+
+def test_compact_copies_checkpointed_motions_in_dataset_order(tmp_path: Path) -> None:
+    motions = load_filled_motions()[:4]
+    dataset = ParliamentMotionDataset(motions=locators(motions))
+    checkpoint = MotionCheckpoint(tmp_path / "dataset.checkpoint.jsonl")
+    for motion in (motions[2], motions[0]):
+        checkpoint.append(motion)
+    checkpoint.close()
+    with open(checkpoint.path, "a", encoding="utf-8") as file:
+        file.write('{"id": "truncated by a cr')
+
+    dataset_file = tmp_path / "dataset.json"
+    assert checkpoint.compact(dataset, dataset_file) == 2
+    assert not checkpoint.path.exists()
+
+    written = json.loads(dataset_file.read_text())["motions"]
+    assert [m["id"] for m in written] == [m.id for m in motions]
+    assert ParliamentMotion.model_validate(written[0]) == motions[0]
+    assert ParliamentMotion.model_validate(written[2]) == motions[2]
+    assert "votes" not in written[1] and "votes" not in written[3]
+
+
+def test_fill_streaming_resumes_from_the_checkpoint(tmp_path: Path) -> None:
+    motions = load_filled_motions()[:20]
+    checkpoint = MotionCheckpoint(tmp_path / "dataset.checkpoint.jsonl")
+    checkpoint.append(motions[0])
+    checkpoint.close()
+    dataset_file = tmp_path / "dataset.json"
+
+    async def run() -> StreamCounts:
+        async with TestServer(create_fixture_app(motions)) as server:
+            base_url = str(server.make_url("")).rstrip("/")
+            dataset = ParliamentMotionDataset(motions=locators(motions, base_url))
+            with ParsePool(processes=0, max_pending=4) as pool:
+                async with FetchScheduler(workers=4, rate_limit=0) as scheduler:
+                    return await fill_streaming(scheduler, pool, dataset, checkpoint, dataset_file)
+
+    counts = asyncio.run(run())
+    assert counts == StreamCounts(attempted=19, filled=19, compacted=20)
+
+    written = ParliamentMotionDataset.model_validate_json(dataset_file.read_text())
+    assert [m.id for m in written.motions] == [m.id for m in motions]
+    assert all(isinstance(m, ParliamentMotion) for m in written.motions)
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+import pytest
+from fastapi.testclient import TestClient
+
+from src.data.search import SearchIndex, fold, stem, tokenize
+
+SEARCH = "/api/v1/votes/motions/search"
+
+TITLES = [
+    "Motie van het lid Jansen over de stikstofuitstoot van de landbouw",
+    "Motie van het lid De Vries over stikstof en natuur",
+    "Gewijzigde motie van het lid Bakker over plannen voor financiële ondersteuning",
+    "Motie van het lid Visser over planologische procedures",
+    "Motie van de leden Smit en Mulder over mogelijkheden voor huurders",
+]
+
+
+@pytest.fixture(scope="module")
+def index() -> SearchIndex:
+    return SearchIndex(TITLES)
+
+
+def test_fold_strips_case_and_diacritics() -> None:
+    assert fold("Financiële Appèl") == "financiele appel"
+
+
+@pytest.mark.parametrize(
+    "word, stemmed",
+    [
+        ("plannen", "plan"),
+        ("mogelijkheden", "mogelijkheid"),
+        ("huurders", "huurder"),
+        ("woningen", "woning"),
+        ("regels", "regel"),
+        ("ideeen", "ideeen"),
+        ("zien", "zien"),
+        ("plan", "plan"),
+    ],
+)
+def test_stem_strips_regular_plurals(word: str, stemmed: str) -> None:
+    assert stem(word) == stemmed
+
+
+def test_tokenize_drops_stopwords_and_numbers() -> None:
+    assert tokenize("Gewijzigde motie van het lid Bakker over 2 plannen") == ["bakker", "plan"]
+
+
+def test_exact_terms_and_their_completions_match(index: SearchIndex) -> None:
+    total, hits = index.search("stikstof")
+    assert total == 2
+    # The exact match ranks above the completion
+    assert [hit.doc for hit in hits] == [1, 0]
+    assert hits[0].score > hits[1].score
+
+
+def test_plural_and_diacritics_do_not_matter(index: SearchIndex) -> None:
+    assert [hit.doc for hit in index.search("plan financiele")[1]][0] == 2
+    assert [hit.doc for hit in index.search("Mogelijkheid huurder")[1]] == [4]
+
+
+def test_stopwords_alone_match_nothing(index: SearchIndex) -> None:
+    assert index.search("motie van het lid over") == (0, [])
+
+
+def test_limit_keeps_the_best_hits_and_counts_all(index: SearchIndex) -> None:
+    total, hits = index.search("stikstof plan", limit=1)
+    assert total == 4
+    assert len(hits) == 1
+    assert hits[0].score == max(hit.score for hit in index.search("stikstof plan")[1])
+
+
+def test_endpoint_returns_ranked_motions_with_votes(client: TestClient) -> None:
+    response = client.get(SEARCH, params={"q": "stikstof", "limit": 3})
+    assert response.status_code == 200
+    results = response.json()
+    assert results["query"] == "stikstof"
+    assert results["total"] > 3
+    assert len(results["results"]) == 3
+    scores = [hit["score"] for hit in results["results"]]
+    assert scores == sorted(scores, reverse=True)
+    for hit in results["results"]:
+        assert f"id={hit['id']}" in hit["url"]
+        assert hit["votes"]
+
+
+@pytest.mark.parametrize("query", ["q=", "q=stikstof&limit=0", "q=stikstof&limit=101", "limit=3"])
+def test_endpoint_rejects_invalid_queries(client: TestClient, query: str) -> None:
+    assert client.get(f"{SEARCH}?{query}").status_code == 422
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+import datetime
+import gc
+import weakref
+
+from src.api.snapshot import Snapshot
+from src.api.v1.votes.schemas import MatrixMode
+
+
+def test_retired_snapshot_is_freed_with_the_heap_frozen() -> None:
+    snapshot = Snapshot.load()
+    # Build everything a snapshot builds lazily, as the server does before forking
+    snapshot.windows
+    snapshot.search_index
+    assert snapshot.windowed_matrix(datetime.date(2024, 1, 1), None, None, MatrixMode.AGREEMENT) is not None
+    retired = weakref.ref(snapshot)
+
+    gc.freeze()
+    try:
+        del snapshot
+        assert retired() is None
+    finally:
+        gc.unfreeze()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import json
+from pathlib import Path
+from typing import List, Tuple
+
+import pytest
+
+from run.update_matrix import check, read_motions
+from src.api.schemas import parties
+from src.data.counts import MatrixCounts
+from src.data.votes import DATASET_FILE, VoteStore, motion_frames
+
+
+def incremental(base: List[dict], new: List[dict]) -> Tuple[MatrixCounts, VoteStore]:
+    """
+    The counts and vote store as `run/update_matrix.py` leaves them after adding `new` to those built from `base`.
+    """
+    votes, seats, splits = motion_frames(base)
+    store = VoteStore.from_frame(votes, parties, seats, splits)
+    counts = MatrixCounts.from_store(store)
+    votes, seats, splits = motion_frames(new)
+    added = ~votes.index.isin(counts.ids) & ~votes.index.duplicated(keep="first")
+    counts, _ = counts.update(votes[added])
+    return counts, store.append(VoteStore.from_frame(votes[added], parties, seats[added], splits))
+
+
+@pytest.fixture(scope="module")
+def motions() -> List[dict]:
+    return [motion for motion in read_motions(DATASET_FILE) if "votes" in motion][:400]
+
+
+def test_incremental_update_matches_full_rebuild_over_the_checkpoint(tmp_path: Path, motions: List[dict]) -> None:
+    dataset_file = tmp_path / "dataset.json"
+    dataset_file.write_text(json.dumps({"motions": motions[:300]}))
+    # The checkpoint repeats a motion that is counted already, which the update skips
+    checkpoint_file = tmp_path / "dataset.checkpoint.jsonl"
+    checkpoint_file.write_text("".join(json.dumps(motion) + "\n" for motion in motions[299:]))
+
+    counts, store = incremental(motions[:300], motions[299:])
+    assert len(counts.ids) == 400
+    assert check(counts, store, checkpoint_file, dataset_file)
+
+
+def test_check_reports_motions_missing_from_the_update(tmp_path: Path, motions: List[dict]) -> None:
+    dataset_file = tmp_path / "dataset.json"
+    dataset_file.write_text(json.dumps({"motions": motions[:300]}))
+    checkpoint_file = tmp_path / "dataset.checkpoint.jsonl"
+    checkpoint_file.write_text("".join(json.dumps(motion) + "\n" for motion in motions[300:]))
+
+    counts, store = incremental(motions[:300], motions[300:350])
+    assert not check(counts, store, checkpoint_file, dataset_file)
+
+
+def test_saved_counts_updated_with_new_motions_match_full_rebuild(tmp_path: Path, motions: List[dict]) -> None:
+    # The motions repeated under new ids, as when the dataset grows by a batch the saved counts have not seen
+    history = motions + [{**motion, "id": f"{motion['id']}-1"} for motion in motions[:350]]
+    batch = [{**motion, "id": f"{motion['id']}-1"} for motion in motions[350:]]
+    counts_file = tmp_path / "matrix_counts.npz"
+    votes, seats, splits = motion_frames(history)
+    MatrixCounts.from_store(VoteStore.from_frame(votes, parties, seats, splits)).save(counts_file)
+
+    counts, added = MatrixCounts.load(counts_file).update(motion_frames(batch)[0])
+    counts.save(counts_file)
+    counts = MatrixCounts.load(counts_file)
+
+    votes, seats, splits = motion_frames(history + batch)
+    rebuilt = MatrixCounts.from_store(VoteStore.from_frame(votes, parties, seats, splits))
+    assert added == len(batch)
+    assert counts.differences(rebuilt) == []
+    assert counts.similarity().equals(rebuilt.similarity())
+
+
+def test_update_skips_motions_counted_already(motions: List[dict]) -> None:
+    votes, seats, splits = motion_frames(motions[:300])
+    counts = MatrixCounts.from_store(VoteStore.from_frame(votes, parties, seats, splits))
+    updated, added = counts.update(motion_frames(motions[250:300])[0])
+    assert added == 0
+    assert updated.differences(counts) == []
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import itertools
+import json
+
+from run.generate_matrix import load_votes
+from src.data.votes import StringColumn, VoteStore, motion_frames
+from src.disagreements.pairs import disagreeing_titles
+from tests.conftest import make_motion
+
+PARTIES = ["A", "B"]
+
+
+def store_of(motions) -> VoteStore:
+    votes, seats, splits = motion_frames(motions)
+    return VoteStore.from_frame(votes, PARTIES, seats, splits)
+
+
+def test_columns_index_the_same_in_memory_appended_and_opened(tmp_path):
+    built = store_of(
+        [
+            make_motion("2024Z00001", {"A": "Voor", "B": "Tegen"}, title="Motie over wonen"),
+            make_motion("2024Z00002", {"A": "Voor", "B": "Voor"}, title="Motie over zorg"),
+        ]
+    )
+    appended = built.append(store_of([make_motion("2024Z00003", {"A": "Tegen", "B": "Voor"}, title="Motie over geld")]))
+    appended.save(tmp_path / "votes.bin")
+    opened = VoteStore.open(tmp_path / "votes.bin")
+
+    for store in (appended, opened):
+        assert isinstance(store.titles, StringColumn)
+        mask = store.disagreeing("A", "B")
+        assert store.titles[mask] == ["Motie over wonen", "Motie over geld"]
+        assert store.ids[mask] == ["2024Z00001", "2024Z00003"]
+        assert store.urls[1].endswith("2024Z00002")
+    assert built.titles[built.disagreeing("A", "B")] == ["Motie over wonen"]
+
+
+
+def test_disagreeing_leaves_out_motions_either_party_has_no_vote_on(tmp_path):
+    motions = [
+        make_motion("2024Z00001", {"A": "Voor", "B": "Tegen", "C": "Voor"}, title="Motie over wonen"),
+        make_motion("2024Z00002", {"A": "Voor", "B": "Voor"}, title="Motie over zorg"),
+        make_motion("2024Z00003", {"A": "Tegen", "C": "Voor"}, title="Motie over geld"),
+        make_motion("2024Z00004", {"B": "Tegen", "C": "Tegen"}, title="Motie over onderwijs"),
+    ]
+    dataset_file = tmp_path / "dataset.json"
+    dataset_file.write_text(json.dumps({"motions": motions}))
+    # The pivot votes.json was written from, with NaN where a party has no vote
+    legacy = load_votes(dataset_file)
+    store = VoteStore.from_dataset(["A", "B", "C"], dataset_file)
+
+    for party_a, party_b in itertools.combinations("ABC", 2):
+        selected = legacy[legacy[party_a] != legacy[party_b]]
+        voted = selected[party_a].notna() & selected[party_b].notna()
+        assert store.titles[store.disagreeing(party_a, party_b)] == list(selected["title"][voted].str.strip())
+    assert disagreeing_titles(store, [("A", "B"), ("A", "C"), ("B", "C")]) == {
+        ("A", "B"): ["Motie over wonen"],
+        ("A", "C"): ["Motie over geld"],
+        ("B", "C"): ["Motie over wonen"],
+    }
+    # Where one of the two has no vote, votes.json counted a disagreement
+    assert list(legacy.index[legacy["A"] != legacy["B"]]) == ["2024Z00001", "2024Z00003", "2024Z00004"]